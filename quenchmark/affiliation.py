@@ -0,0 +1,163 @@
+"""
+Implements deciding whether GitHub users belong to the company owning a
+repository, by fuzzy matching the company in their profile against the
+login and the name of the owner.
+
+Verdicts are memoized per user and owner for the whole run, hence every
+user is looked up once, however many Issues, comments and repositories of
+the owner they appear in.
+"""
+
+import functools
+import os
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher as SM
+
+from quenchmark.logger import LoggerMixin
+
+# Company and owner match if their similarity ratio exceeds this
+RATIO = 0.9
+
+
+def normalize(company):
+    """
+    Returns the company string in the form it is compared in: without
+    surrounding whitespace, the '@' of GitHub mentions, and case.
+    """
+
+    if not company:
+        return ''
+    return company.strip().lstrip('@').strip().casefold()
+
+
+@functools.lru_cache(maxsize=4096)
+def matches(company, target):
+    """
+    Returns True if the normalized strings are similar enough. The ratio
+    is 2 * M / (len(company) + len(target)) with M matching characters,
+    M can not exceed the shorter length nor the common characters, hence
+    the cheap upper bounds rule out most pairs before the full ratio.
+    """
+
+    if not company or not target:
+        return False
+
+    shorter, total = min(len(company), len(target)), len(company) + len(target)
+    if 2 * shorter <= RATIO * total:
+        return False
+
+    matcher = SM(None, company, target)
+    return matcher.quick_ratio() > RATIO and matcher.ratio() > RATIO
+
+
+class Affiliations(LoggerMixin):
+    """
+    Memoizes the company of every user and the verdict of every pair of
+    user and owner. If path is given, the companies are also stored in a
+    SQLite database for max_age seconds, so that later runs do not fetch
+    the profiles of the users again.
+    """
+
+    def __init__(self, path=None, max_age=7 * 24 * 3600):
+        self.max_age = max_age
+        self.companies = {}
+        self.names = {}
+        self.verdicts = {}
+        self.lock = threading.Lock()
+        self.db = None
+
+        if path is not None:
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS companies (
+                    login TEXT PRIMARY KEY,
+                    company TEXT,
+                    stored_at REAL
+                )
+            """)
+            self.db.commit()
+
+    def stored(self, login):
+        """
+        Returns the stored company of the user, None if it is not stored or
+        has expired.
+        """
+
+        with self.lock:
+            row = self.db.execute(
+                "SELECT company FROM companies WHERE login = ? AND stored_at > ?",
+                (login, time.time() - self.max_age)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def store(self, login, company):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO companies VALUES (?, ?, ?)",
+                (login, company, time.time())
+            )
+            self.db.commit()
+
+    def company(self, user):
+        """
+        Returns the normalized company of the user. Reading user.company
+        may fetch the profile of the user, which happens once per user.
+        """
+
+        login = user.login
+        if login in self.companies:
+            return self.companies[login]
+
+        company = self.stored(login) if self.db is not None else None
+        if company is None:
+            company = normalize(user.company)
+            self.count('affiliation_lookups')
+            if self.db is not None:
+                self.store(login, company)
+
+        self.companies[login] = company
+        return company
+
+    def owner_name(self, owner):
+        """
+        Returns the normalized name of the owner, fetched once per owner.
+        """
+
+        if owner.login not in self.names:
+            # some users have only login and no name
+            self.names[owner.login] = normalize(owner.name)
+        return self.names[owner.login]
+
+    def is_affiliated(self, user, owner):
+        """
+        Returns True if the user is part of the company of the owner.
+        """
+
+        key = (user.login, owner.login)
+        verdict = self.verdicts.get(key)
+
+        if verdict is None:
+            company = self.company(user)
+            verdict = bool(company) and (matches(company, normalize(owner.login))
+                                         or matches(company, self.owner_name(owner)))
+            self.verdicts[key] = verdict
+
+        return verdict
+
+
+# The affiliations used by MetaCollector
+affiliations = Affiliations()
+
+
+def install(instance):
+    """
+    Makes the given affiliations the ones used by MetaCollector.
+    """
+
+    global affiliations
+    affiliations = instance
@@ -0,0 +1,3 @@
+"""
+Benchmarks of the collection pipeline, see quenchmark.benchmarks.suite.
+"""
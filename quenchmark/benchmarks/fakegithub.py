@@ -0,0 +1,423 @@
+"""
+Implements a local fake of the GitHub REST API, serving synthetic
+repositories of configurable size. Only the endpoints used by the
+collectors are implemented.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from quenchmark.transport import Request, TransportWrapper
+
+PUBLIC_URL = 'https://api.github.com'
+
+WEEK = 7 * 24 * 3600
+
+
+def timestamp(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+@dataclass
+class SyntheticRepository:
+    """
+    A repository generated from the given sizes. The same sizes and seed
+    always yield the same repository.
+
+    The repository is young, licensed under MIT and actively developed, and
+    most of its issues are answered by the core developers, hence it passes
+    all the criteria of MetaCollector and every criterion is evaluated. If
+    the owner is an organization, the developers are its members.
+    """
+
+    owner: str
+    name: str
+    commits: int = 200
+    contributors: int = 5
+    issues: int = 50
+    comments: int = 3
+    seed: int = 0
+    organization: bool = False
+    now: dt.datetime = field(default_factory=lambda: dt.datetime.now(dt.timezone.utc))
+
+    def __post_init__(self):
+        rng = random.Random(f'{self.owner}/{self.name}/{self.seed}')
+        self.created_at = self.now - dt.timedelta(weeks=30)
+        self.developers = [f'{self.name}-dev{index}' for index in range(self.contributors)]
+        self.externals = [f'{self.name}-user{index}' for index in range(max(self.issues // 2, 1))]
+
+        # Commit authorship follows a Zipf like distribution
+        weights = [1 / (rank + 1) for rank in range(self.contributors)]
+        self.commit_list = [
+            {
+                'sha': hashlib.sha1(f'{self.name}-{index}'.encode('utf-8')).hexdigest(),
+                'author': rng.choices(self.developers, weights)[0],
+                'date': self.now - dt.timedelta(hours=index),
+                'additions': rng.randint(1, 200),
+                'deletions': rng.randint(0, 100),
+            }
+            for index in range(self.commits)
+        ]
+
+        self.issue_list = []
+        for number in range(1, self.issues + 1):
+            created = self.created_at + dt.timedelta(days=number % 180, hours=number)
+            comments = [
+                {
+                    'id': number * 1000 + index,
+                    # three of four issues are answered by a core developer
+                    'user': (self.developers[0] if number % 4 and index == 0
+                             else rng.choice(self.externals)),
+                    'created_at': created + dt.timedelta(days=index + 1),
+                }
+                for index in range(self.comments)
+            ]
+            self.issue_list.append({
+                'number': number,
+                'user': rng.choice(self.externals),
+                'pull_request': number % 3 == 0,
+                'created_at': created,
+                'updated_at': comments[-1]['created_at'] if comments else created,
+                'comments': comments,
+            })
+
+        self.users = {login: None for login in self.developers}
+        self.users.update({login: f'Company {index % 7}'
+                           for index, login in enumerate(self.externals)})
+        self.users[self.owner] = None
+
+    @property
+    def full_name(self):
+        return f'{self.owner}/{self.name}'
+
+    def user(self, login, complete=False):
+        data = {
+            'login': login,
+            'id': int(hashlib.sha1(login.encode('utf-8')).hexdigest()[:8], 16),
+            'type': 'Organization' if self.organization and login == self.owner else 'User',
+            'url': f'{PUBLIC_URL}/users/{login}',
+        }
+        if complete:
+            data.update({'name': login.title(), 'company': self.users.get(login)})
+        return data
+
+    def repository(self):
+        return {
+            'id': int(hashlib.sha1(self.full_name.encode('utf-8')).hexdigest()[:8], 16),
+            'name': self.name,
+            'full_name': self.full_name,
+            'owner': self.user(self.owner),
+            'url': f'{PUBLIC_URL}/repos/{self.full_name}',
+            'created_at': timestamp(self.created_at),
+            'has_issues': True,
+            'default_branch': 'master',
+        }
+
+    def commit(self, commit):
+        return {
+            'sha': commit['sha'],
+            'url': f"{PUBLIC_URL}/repos/{self.full_name}/commits/{commit['sha']}",
+            'author': self.user(commit['author']),
+            'commit': {
+                'message': f"Commit {commit['sha'][:7]}",
+                'author': {'name': commit['author'], 'date': timestamp(commit['date'])},
+                'committer': {'name': commit['author'], 'date': timestamp(commit['date'])},
+            },
+        }
+
+    def issue(self, issue):
+        url = f"{PUBLIC_URL}/repos/{self.full_name}/issues/{issue['number']}"
+        data = {
+            'number': issue['number'],
+            'url': url,
+            'html_url': f"https://github.com/{self.full_name}/"
+                        f"{'pull' if issue['pull_request'] else 'issues'}/{issue['number']}",
+            'comments_url': f'{url}/comments',
+            'title': f"Issue {issue['number']}",
+            'state': 'open',
+            'user': self.user(issue['user']),
+            'comments': len(issue['comments']),
+            'created_at': timestamp(issue['created_at']),
+            'updated_at': timestamp(issue['updated_at']),
+        }
+        if issue['pull_request']:
+            data['pull_request'] = {'url': f"{PUBLIC_URL}/repos/{self.full_name}/pulls/{issue['number']}"}
+        return data
+
+    def comment(self, comment):
+        return {
+            'id': comment['id'],
+            'issue_url': f"{PUBLIC_URL}/repos/{self.full_name}/issues/{comment['id'] // 1000}",
+            'user': self.user(comment['user']),
+            'body': 'Thanks!',
+            'created_at': timestamp(comment['created_at']),
+        }
+
+    def weeks(self):
+        """
+        Returns the weekly (week, additions, deletions, commits) totals per
+        author.
+        """
+
+        weeks = {}
+        for commit in self.commit_list:
+            week = int(commit['date'].timestamp()) // WEEK * WEEK
+            totals = weeks.setdefault(commit['author'], {}).setdefault(week, [0, 0, 0])
+            totals[0] += commit['additions']
+            totals[1] += commit['deletions']
+            totals[2] += 1
+        return weeks
+
+    def contributor_statistics(self):
+        return [
+            {
+                'author': self.user(author),
+                'total': sum(totals[2] for totals in weeks.values()),
+                'weeks': [{'w': week, 'a': a, 'd': d, 'c': c}
+                          for week, (a, d, c) in sorted(weeks.items())],
+            }
+            for author, weeks in self.weeks().items()
+        ]
+
+    def code_frequency(self):
+        totals = {}
+        for weeks in self.weeks().values():
+            for week, (additions, deletions, commits) in weeks.items():
+                total = totals.setdefault(week, [0, 0])
+                total[0] += additions
+                total[1] -= deletions
+
+        # Never a single week, PyGithub sums the statistics pairwise
+        rows = [[week, a, d] for week, (a, d) in sorted(totals.items())]
+        return rows if len(rows) > 1 else rows + [[0, 0, 0]]
+
+
+class FakeGitHub(object):
+    """
+    A threaded HTTP server serving the given synthetic repositories. Links
+    (and the URLs of the served objects) point to the public GitHub API, see
+    LocalGitHub for redirecting them to the server.
+    """
+
+    routes = [
+        (r'^/search/users$', 'search_users'),
+        (r'^/users/(?P<login>[^/]+)$', 'get_user'),
+        (r'^/orgs/(?P<org>[^/]+)$', 'get_organization'),
+        (r'^/orgs/(?P<org>[^/]+)/members$', 'list_members'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)$', 'get_repository'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/commits$', 'list_commits'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/compare/(?P<base>\w+)\.\.\.(?P<head>\w+)$', 'compare'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/license$', 'get_license'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/stats/contributors$', 'get_stats_contributors'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/stats/code_frequency$', 'get_stats_code_frequency'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/issues$', 'list_issues'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/issues/comments$', 'list_repository_comments'),
+        (r'^/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/issues/(?P<number>\d+)/comments$', 'list_comments'),
+    ]
+
+    def __init__(self, repositories, latency=0.0):
+        self.repositories = {repository.full_name: repository for repository in repositories}
+        self.latency = latency
+        self.requests = 0
+        self.paths = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            protocol_version = 'HTTP/1.1'
+
+            # Headers and body are written separately, which would wait for
+            # the delayed acknowledgement on kept alive connections
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                    server.paths.append(urlsplit(self.path).path)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                status, headers, body = server.dispatch(self.path)
+                body = json.dumps(body).encode('utf-8')
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-RateLimit-Limit', '5000')
+                self.send_header('X-RateLimit-Remaining', '5000')
+                self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       args=(0.01,), daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def dispatch(self, target):
+        parts = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        for pattern, handler in self.routes:
+            match = re.match(pattern, parts.path)
+            if match is None:
+                continue
+
+            arguments = match.groupdict()
+            if 'owner' in arguments:
+                repository = self.repositories.get(
+                    f"{arguments.pop('owner')}/{arguments.pop('name')}"
+                )
+                if repository is None:
+                    break
+                arguments['repository'] = repository
+
+            return getattr(self, handler)(parts.path, query, **arguments)
+
+        return 404, {}, {'message': 'Not Found'}
+
+    @staticmethod
+    def page(path, query, items):
+        """
+        Returns the requested page of the items along with the Link header
+        pointing to the next and last pages.
+        """
+
+        per_page = int(query.get('per_page', 30))
+        number = int(query.get('page', 1))
+        last = max((len(items) + per_page - 1) // per_page, 1)
+
+        def link(page, rel):
+            return f'<{PUBLIC_URL}{path}?{urlencode({**query, "page": page})}>; rel="{rel}"'
+
+        links = []
+        if number < last:
+            links.append(link(number + 1, 'next'))
+        links.append(link(last, 'last'))
+
+        start = (number - 1) * per_page
+        return 200, {'Link': ', '.join(links)}, items[start:start + per_page]
+
+    def search_users(self, path, query):
+        login = query.get('q', '').lstrip('@')
+        for repository in self.repositories.values():
+            if repository.owner == login:
+                return 200, {}, {'total_count': 1, 'incomplete_results': False,
+                                 'items': [repository.user(login)]}
+        return 200, {}, {'total_count': 0, 'incomplete_results': False, 'items': []}
+
+    def get_user(self, path, query, login):
+        for repository in self.repositories.values():
+            if login in repository.users:
+                return 200, {}, repository.user(login, complete=True)
+        return 404, {}, {'message': 'Not Found'}
+
+    def get_organization(self, path, query, org):
+        for repository in self.repositories.values():
+            if repository.organization and repository.owner == org:
+                return 200, {}, {**repository.user(org), 'url': f'{PUBLIC_URL}/orgs/{org}'}
+        return 404, {}, {'message': 'Not Found'}
+
+    def list_members(self, path, query, org):
+        members = [repository.user(login)
+                   for repository in self.repositories.values()
+                   if repository.organization and repository.owner == org
+                   for login in repository.developers]
+        if not members:
+            return 404, {}, {'message': 'Not Found'}
+        return self.page(path, query, members)
+
+    def get_repository(self, path, query, repository):
+        return 200, {}, repository.repository()
+
+    def list_commits(self, path, query, repository):
+        return self.page(path, query, [repository.commit(commit)
+                                       for commit in repository.commit_list])
+
+    def compare(self, path, query, repository, base, head):
+        shas = [commit['sha'] for commit in repository.commit_list]
+        ahead_by = shas.index(base) - shas.index(head) if base in shas and head in shas else 0
+        return 200, {}, {'status': 'ahead' if ahead_by > 0 else 'identical',
+                         'ahead_by': ahead_by, 'behind_by': 0, 'commits': [], 'files': []}
+
+    def get_license(self, path, query, repository):
+        return 200, {}, {'name': 'LICENSE', 'path': 'LICENSE',
+                         'license': {'key': 'mit', 'name': 'MIT License', 'spdx_id': 'MIT'}}
+
+    def get_stats_contributors(self, path, query, repository):
+        return 200, {}, repository.contributor_statistics()
+
+    def get_stats_code_frequency(self, path, query, repository):
+        return 200, {}, repository.code_frequency()
+
+    def list_issues(self, path, query, repository):
+        issues = repository.issue_list
+        if 'since' in query:
+            since = dt.datetime.fromisoformat(query['since'].replace('Z', '+00:00'))
+            issues = [issue for issue in issues if issue['updated_at'] >= since]
+        if query.get('sort') in ('created', 'updated'):
+            issues = sorted(issues, key=lambda issue: issue[f"{query['sort']}_at"],
+                            reverse=query.get('direction', 'desc') == 'desc')
+        return self.page(path, query, [repository.issue(issue) for issue in issues])
+
+    def list_comments(self, path, query, repository, number):
+        issue = repository.issue_list[int(number) - 1]
+        return self.page(path, query, [repository.comment(comment)
+                                       for comment in issue['comments']])
+
+    def list_repository_comments(self, path, query, repository):
+        comments = [comment for issue in repository.issue_list for comment in issue['comments']]
+        if 'since' in query:
+            since = dt.datetime.fromisoformat(query['since'].replace('Z', '+00:00'))
+            comments = [comment for comment in comments if comment['created_at'] >= since]
+        # sorted by creation, the comments are never updated
+        comments.sort(key=lambda comment: comment['created_at'],
+                      reverse=query.get('direction', 'desc') == 'desc')
+        return self.page(path, query, [repository.comment(comment) for comment in comments])
+
+
+class LocalGitHub(TransportWrapper):
+    """
+    Redirects the requests for the public GitHub API to the local fake,
+    counting the requests and the transferred bytes.
+    """
+
+    def __init__(self, inner, url):
+        super().__init__(inner)
+        self.url = url
+        self.requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def send(self, request):
+        url = re.sub(r'^https://api\.github\.com(:443)?', self.url, request.url)
+        response = self.inner.send(Request(request.method, url, request.headers, request.body))
+
+        with self.lock:
+            self.requests += 1
+            self.bytes += len(response.body)
+
+        return response
@@ -0,0 +1,293 @@
+"""
+Implements the benchmark suite of the collection pipeline. Every scenario
+runs against a local fake GitHub (see quenchmark.benchmarks.fakegithub)
+and is compared against the stored baseline.
+
+Run it as:
+
+    python -m quenchmark.benchmarks.suite [--memory] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from quenchmark import affiliation, owners, transport
+from quenchmark.benchmarks.fakegithub import FakeGitHub, LocalGitHub, SyntheticRepository
+from quenchmark.logger import LoggerMixin
+from quenchmark.ratelimit import RequestScheduler
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+DEFAULT_SIZES = {
+    'projects': 8,
+    'commits': 1000,
+    'contributors': 20,
+    'issues': 100,
+    'comments': 3,
+}
+
+
+@dataclass
+class Measurement:
+    """
+    The cost of a single scenario. The peak memory (in KiB) is the peak of
+    the Python allocations made while the scenario ran, the fake GitHub
+    included, None unless the allocations were traced.
+    """
+
+    scenario: str
+    projects: int
+    requests: int
+    bytes: int
+    wall: float
+    peak_memory: int = None
+
+    @property
+    def throughput(self):
+        """
+        Returns the number of projects processed per minute.
+        """
+
+        return self.projects / self.wall * 60 if self.wall else 0.0
+
+
+def make_repositories(sizes):
+    return [
+        SyntheticRepository(
+            owner=f'owner{index}', name=f'project{index}',
+            commits=sizes['commits'], contributors=sizes['contributors'],
+            issues=sizes['issues'], comments=sizes['comments'], seed=index
+        )
+        for index in range(sizes['projects'])
+    ]
+
+
+def criteria(repositories):
+    """
+    Evaluates every reported criterion of MetaCollector separately.
+    """
+
+    from quenchmark.collectors.meta import MetaCollector
+
+    for repository in repositories:
+        collector = MetaCollector(repository.owner, repository.name)
+        for name in MetaCollector.reported:
+            getattr(collector, name)
+
+    return len(repositories)
+
+
+def is_valid(repositories):
+    """
+    Runs the decision tree of MetaCollector.
+    """
+
+    from quenchmark.collectors.meta import MetaCollector
+
+    for repository in repositories:
+        MetaCollector(repository.owner, repository.name).is_valid()
+
+    return len(repositories)
+
+
+def collect_data(repositories):
+    """
+    Runs the whole collection of MetaCollector data through the engine.
+    """
+
+    from quenchmark.collectors.meta import MetaCollector
+    from quenchmark.engine import ExecutionEngine
+    from quenchmark.main import EntryPoint, Project
+
+    entry_point = EntryPoint()
+    entry_point.projects = [
+        Project(name=repository.name, identifier=repository.name,
+                repo_url=f'https://github.com/{repository.full_name}')
+        for repository in repositories
+    ]
+    entry_point.plugin_classes = [MetaCollector]
+    entry_point.engine = ExecutionEngine()
+
+    entry_point.collect_data()
+    if entry_point.failures:
+        raise RuntimeError(f"Collection failed: {entry_point.failures}")
+
+    return len(repositories)
+
+
+SCENARIOS = {
+    'criteria': criteria,
+    'is_valid': is_valid,
+    'collect_data': collect_data,
+}
+
+
+class BenchmarkSuite(LoggerMixin):
+    """
+    Runs the scenarios against a fake GitHub serving synthetic repositories
+    of the given sizes. If memory is set, the allocations of every scenario
+    are traced, which slows them down.
+    """
+
+    def __init__(self, sizes=None, latency=0.0, memory=False):
+        self.sizes = {**DEFAULT_SIZES, **(sizes or {})}
+        self.latency = latency
+        self.memory = memory
+
+    def measure(self, name, scenario):
+        repositories = make_repositories(self.sizes)
+
+        with FakeGitHub(repositories, latency=self.latency) as server:
+            local = LocalGitHub(transport.Transport(), server.url)
+            transport.install(RequestScheduler(local))
+            # every scenario starts without memoized owners and users
+            owners.install(owners.OwnerDirectory())
+            affiliation.install(affiliation.Affiliations())
+
+            peak_memory = None
+            if self.memory:
+                tracemalloc.start()
+            try:
+                start = time.perf_counter()
+                projects = scenario(repositories)
+                wall = time.perf_counter() - start
+            finally:
+                if self.memory:
+                    peak_memory = tracemalloc.get_traced_memory()[1] // 1024
+                    tracemalloc.stop()
+                transport.uninstall()
+
+        return Measurement(
+            scenario=name,
+            projects=projects,
+            requests=local.requests,
+            bytes=local.bytes,
+            wall=wall,
+            peak_memory=peak_memory
+        )
+
+    def run(self, names=None):
+        measurements = []
+        for name in names or SCENARIOS:
+            self.info(f"Running the {name} scenario")
+            measurements.append(self.measure(name, SCENARIOS[name]))
+        return measurements
+
+
+def import_time(module='quenchmark.main'):
+    """
+    Returns the cumulative import time of the module in a fresh
+    interpreter, in milliseconds, as reported by python -X importtime.
+    """
+
+    child = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                           encoding='utf-8', check=True)
+
+    cumulative = [int(line.split('|')[1]) for line in child.stderr.splitlines()
+                  if line.split('|')[-1].strip() == module]
+    return cumulative[0] / 1000
+
+
+def compare(measurements, baseline, sizes):
+    """
+    Returns the list of regressions against the baseline. Request counts
+    are deterministic and must not grow at all. The wall time and memory
+    depend on the machine, hence they are reported but not compared.
+    Baselines recorded with other sizes are not comparable.
+    """
+
+    if baseline.get('sizes') != sizes:
+        return []
+
+    regressions = []
+    for measurement in measurements:
+        previous = baseline['scenarios'].get(measurement.scenario)
+        if previous is None:
+            continue
+
+        if measurement.requests > previous['requests']:
+            regressions.append(f"{measurement.scenario}: {measurement.requests} requests, "
+                               f"baseline {previous['requests']}")
+
+    return regressions
+
+
+def report(measurements):
+    print(f"{'scenario':<14}{'requests':>10}{'KiB':>10}{'wall [s]':>10}"
+          f"{'peak [MiB]':>11}{'projects/min':>14}")
+    for m in measurements:
+        peak = f'{m.peak_memory / 1024:.1f}' if m.peak_memory is not None else '-'
+        print(f"{m.scenario:<14}{m.requests:>10}{m.bytes // 1024:>10}{m.wall:>10.2f}"
+              f"{peak:>11}{m.throughput:>14.1f}")
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, measurements, sizes):
+    """
+    Stores the request counts of the measurements, the only ones compared.
+    """
+
+    with open(path, 'w') as f:
+        json.dump({
+            'sizes': sizes,
+            'scenarios': {m.scenario: {'requests': m.requests} for m in measurements},
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the collection pipeline against a local fake GitHub."
+    )
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="run the given scenario only (repeatable)")
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f'--{name}', type=int, default=default,
+                            help=f"number of {name} (default: {default})")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="seconds the fake GitHub waits before every response")
+    parser.add_argument('--baseline', default=BASELINE,
+                        help="path of the baseline to compare against")
+    parser.add_argument('--memory', action='store_true',
+                        help="trace the peak memory of every scenario (slower)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store the measurements as the new baseline")
+    args = parser.parse_args()
+
+    sizes = {name: getattr(args, name) for name in DEFAULT_SIZES}
+    suite = BenchmarkSuite(sizes, latency=args.latency, memory=args.memory)
+    measurements = suite.run(args.scenario)
+    report(measurements)
+    print(f"quenchmark.main imported in {import_time():.1f} ms")
+
+    if args.update_baseline:
+        save_baseline(args.baseline, measurements, suite.sizes)
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get('sizes') != suite.sizes:
+        suite.important("The baseline was recorded with other sizes, not comparing")
+
+    regressions = compare(measurements, baseline, suite.sizes)
+    for regression in regressions:
+        suite.error(f"Regression in {regression}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Implements a persistent cache of HTTP responses, revalidated using
+conditional requests.
+
+GitHub does not count requests answered with '304 Not Modified' against the
+rate limit, hence re-running the benchmark on unchanged repositories costs
+almost no API quota.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+from quenchmark.logger import LoggerMixin
+from quenchmark.transport import Response, TransportWrapper
+
+
+class ResponseCache(LoggerMixin):
+    """
+    Stores responses in a SQLite database, keyed by the request URL (with
+    normalized parameters) and the credentials it was sent with. The cache
+    is bounded both in size (least recently used entries are evicted first)
+    and in age.
+
+    The total size is tracked as responses are stored, the least recently
+    used entries are only evicted once it exceeds the limit, and expired
+    entries every evict_every stores (and when the cache is opened).
+    """
+
+    evict_every = 1000
+
+    def __init__(self, path, max_size=256 * 1024 * 1024, max_age=30 * 24 * 3600):
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.total = 0
+        self.stores = 0
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER,
+                stored_at REAL,
+                used_at REAL
+            )
+        """)
+        self.db.commit()
+        self.evict()
+
+    @staticmethod
+    def key(request):
+        """
+        Computes the cache key of the given request. Query parameters are
+        sorted, so that their order does not matter. Responses to requests
+        made with different credentials are kept apart, the credentials
+        are only part of the key as a hash.
+        """
+
+        url = urllib.parse.urlsplit(request.url)
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(url.query)))
+        headers = {k.lower(): v for k, v in request.headers.items()}
+        path = urllib.parse.urlunsplit((url.scheme, url.netloc, url.path, query, ''))
+        key = f"{request.method} {path} {headers.get('accept', '')}"
+
+        authorization = headers.get('authorization')
+        if authorization:
+            key += f" {hashlib.sha256(authorization.encode('utf-8')).hexdigest()[:16]}"
+        return key
+
+    def get(self, key):
+        """
+        Returns a tuple (response, etag, last_modified) for the given key or
+        None if the key is not cached.
+        """
+
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, headers, body, etag, last_modified "
+                "FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        status, headers, body, etag, last_modified = row
+        return Response(status, json.loads(headers), body), etag, last_modified
+
+    def store(self, key, response):
+        """
+        Stores the response under the given key.
+        """
+
+        now = time.time()
+        with self.lock:
+            replaced = self.db.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.status, json.dumps(response.headers),
+                 response.body, response.headers.get('etag'),
+                 response.headers.get('last-modified'), len(response.body),
+                 now, now)
+            )
+            self.db.commit()
+
+            self.total += len(response.body) - (replaced[0] if replaced else 0)
+            self.stores += 1
+            due = self.total > self.max_size or self.stores % self.evict_every == 0
+
+        if due:
+            self.evict()
+
+    def touch(self, key):
+        """
+        Marks the entry as revalidated and recently used.
+        """
+
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET stored_at = ?, used_at = ? WHERE key = ?",
+                (now, now, key)
+            )
+            self.db.commit()
+
+    @property
+    def size(self):
+        with self.lock:
+            return self.total
+
+    def evict(self):
+        """
+        Removes expired entries, and then the least recently used ones until
+        the cache fits into its size limit.
+        """
+
+        with self.lock:
+            self.db.execute(
+                "DELETE FROM responses WHERE stored_at < ?",
+                (time.time() - self.max_age,)
+            )
+
+            total = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+
+            if total > self.max_size:
+                rows = self.db.execute(
+                    "SELECT key, size FROM responses ORDER BY used_at ASC"
+                ).fetchall()
+
+                for key, size in rows:
+                    if total <= self.max_size:
+                        break
+                    self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+
+            self.db.commit()
+            self.total = total
+
+
+class CachingTransport(TransportWrapper):
+    """
+    Serves GET requests from the response cache, revalidating every cached
+    entry with a conditional request (If-None-Match / If-Modified-Since).
+    """
+
+    def __init__(self, inner, cache):
+        super().__init__(inner)
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def send(self, request):
+        if request.method != 'GET':
+            return self.inner.send(request)
+
+        key = self.cache.key(request)
+        cached = self.cache.get(key)
+
+        if cached is not None:
+            cached_response, etag, last_modified = cached
+            headers = dict(request.headers)
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+            request = type(request)(request.method, request.url, headers, request.body)
+
+        response = self.inner.send(request)
+
+        if response.status == 304 and cached is not None:
+            self.hits += 1
+            self.count('cache_hits')
+            self.cache.touch(key)
+            self.debug(f"Revalidated cached response for {request.url}")
+
+            # Rate limit related headers of the fresh response take precedence
+            cached_response.headers.update({
+                name: value for name, value in response.headers.items()
+                if name.startswith('x-ratelimit')
+            })
+            return cached_response
+
+        self.misses += 1
+        if response.status == 200 and ('etag' in response.headers or
+                                       'last-modified' in response.headers):
+            self.cache.store(key, response)
+
+        return response
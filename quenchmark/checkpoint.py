@@ -0,0 +1,73 @@
+"""
+Implements durable checkpoints of the collection run, which allow resuming a
+run that crashed or was interrupted.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass, field
+
+from quenchmark.logger import LoggerMixin
+
+
+@dataclass
+class Checkpoint:
+    """
+    The outcome of running a single collector for a single project.
+    """
+
+    status: str
+    data: dict = field(default_factory=dict)
+    error: str = None
+
+    @property
+    def done(self):
+        return self.status == 'done'
+
+
+class CheckpointStore(LoggerMixin):
+    """
+    Keeps a checkpoint file per project and collector in the given
+    directory. Files are written atomically, hence a crash never leaves a
+    partially written checkpoint behind.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def location(self, project, collector):
+        return os.path.join(self.path, project, f'{collector}.json')
+
+    def save(self, project, collector, checkpoint):
+        location = self.location(project, collector)
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(location),
+                                                 suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as f:
+            json.dump(asdict(checkpoint), f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary, location)
+
+    def load(self, project, collector):
+        """
+        Returns the checkpoint of the collector for the project, None if
+        the collector did not finish yet.
+        """
+
+        try:
+            with open(self.location(project, collector)) as f:
+                return Checkpoint(**json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    def clear(self):
+        """
+        Removes all the checkpoints, so that a fresh run can start.
+        """
+
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -1,8 +1,16 @@
-import os
-import glob
+"""
+The manifest of the bundled collectors, mapping their names to the modules
+implementing them and the artifacts they provide. Collector modules are
+only imported once the collector is selected, see Collector.load.
 
-__all__ = [
-    os.path.basename(fname)[:-3]
-    for fname in glob.glob(os.path.dirname(__file__) + "/*.py")
-    if os.path.isfile(fname) and not os.path.basename(fname).startswith('_')
-]
+Collectors of other packages are registered using the 'quenchmark.collectors'
+entry point group, as 'Name = package.module:Name'.
+"""
+
+MANIFEST = {
+    'MetaCollector': ('quenchmark.collectors.meta',
+                      ('repository', 'head', 'contributors', 'clone')),
+    'TestCollector': ('quenchmark.collectors.tests', ()),
+}
+
+ENTRY_POINT_GROUP = 'quenchmark.collectors'
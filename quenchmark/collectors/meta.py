@@ -1,40 +1,253 @@
 import datetime as dt
-from functools import reduce
-from difflib import SequenceMatcher as SM
+import heapq
+import itertools
+import math
+from dataclasses import asdict
 
 from cached_property import cached_property
 import github
+import numpy as np
 
+from quenchmark import affiliation, owners
 from quenchmark.config import OAUTH_TOKEN
+from quenchmark.contributors import ContributorStats
+from quenchmark.criteria import CriteriaEngine, Criterion, check_cancelled
+from quenchmark.graphql import GraphQLBackend, HTTPTransport
+from quenchmark.latency import ResponseLatencies
+from quenchmark.mirror import GitMirror
+from quenchmark.pagination import paginate
+from quenchmark.ratelimit import SCAN_PRIORITY, priority
+from quenchmark.sampling import StratifiedSample
 from quenchmark.plugins import Collector
+from quenchmark.utils import count
 
 class MetaCollector(Collector):
 
     osi_license_ids = ["MPL-2.0", "GPL-2.0", "MIT", "LGPL-3.0", "BSD-2-Clause",
                "EPL-2.0", "Apache-2.0", "BSD-3-Clause", "GPL-3.0", "LGPL-2.1"]
 
-    def run(self):
-        pass
+    # Criteria reported in the collected data, if is_valid evaluated them
+    reported = ['osi_license', 'contributor_count', 'is_young', 'commit_count',
+                'has_recent_commits', 'has_xtrnl_issues_or_prs',
+                'has_ignored_issues_and_prs']
 
-    def __init__(self, user_name, repo_name):
+    # The GraphQL backend shared by the projects, see prepare
+    graphql = None
+
+    # Shared with the collectors requiring them, versioned by the head commit
+    provides = ('repository', 'head', 'contributors', 'clone')
+
+    # The decision tree of is_valid, evaluated cheapest first (see
+    # quenchmark.criteria.CriteriaEngine), costs are estimated in requests
+    criteria = [
+        Criterion('osi_license', lambda c: c.osi_license, cost=1,
+                  requires=('osi_license',),
+                  description="is licensed under an OSI approved license"),
+        Criterion('multiple_contributors', lambda c: c.contributor_count != 1, cost=5,
+                  requires=('contributor_count',),
+                  description="has more than one contributor"),
+        # the commits are only looked at if the age of the repository needs it
+        Criterion('young_or_mature', lambda c: c.is_young or c.commit_count >= 100, cost=1,
+                  requires=lambda c: ('is_young',) if c.is_young else ('is_young', 'commit_count'),
+                  description="is young, or old with at least 100 commits"),
+        Criterion('recently_active', lambda c: not c.is_young or c.has_recent_commits, cost=1,
+                  requires=lambda c: ('is_young', 'has_recent_commits') if c.is_young else ('is_young',),
+                  description="is old, or young with recent commits"),
+        Criterion('external_issues', lambda c: c.has_xtrnl_issues_or_prs, cost=100,
+                  requires=('has_xtrnl_issues_or_prs',),
+                  description="has Issues and PRs from external people"),
+        # the share of ignored Issues and PRs needs some external ones
+        Criterion('responsive', lambda c: not c.has_ignored_issues_and_prs, cost=0,
+                  requires=('has_ignored_issues_and_prs',), after=('external_issues',),
+                  description="ignores at most half of the external Issues and PRs"),
+    ]
+
+    # Defaults of the opt-in 'sampling' option, see sample_issue_verdicts
+    sampling_defaults = {'confidence': 0.95, 'initial': 30, 'growth': 2.0, 'seed': None}
+
+    # The estimated fraction of ignored Issues and PRs, if sampled
+    ignored_estimate = None
+
+    # Pages of the Issue and comment listings fetched concurrently, see
+    # quenchmark.pagination (overridden by the 'page_concurrency' option)
+    page_concurrency = 4
+
+    # Core developers made more than core_share of the additions or
+    # deletions, or more than core_commit_share of the commits
+    core_share = 0.10
+    core_commit_share = 0.15
+
+    @classmethod
+    def configure(cls, **options):
+        super().configure(**options)
+
+        # companies of the users are kept across runs if a path is given
+        if options.get('affiliations'):
+            affiliation.install(affiliation.Affiliations(options['affiliations']))
+
+    @classmethod
+    def prepare(cls, projects):
+        """
+        Resolves the owners of the projects up front, each owner once, so
+        that the projects of an owner share its profile and members. With
+        the GraphQL backend, the metadata and the first page of Issues of
+        the repositories are fetched several at a time, those of an owner
+        together, the following pages by the collector of every project.
+        """
+        groups = owners.group_by_owner(projects)
+        shared = {login: len(group) for login, group in groups.items() if len(group) > 1}
+        if shared:
+            cls.debug(f"Owners shared by several projects: {shared}")
+
+        client = github.Github(OAUTH_TOKEN, seconds_between_requests=None)
+        owners.directory.prefetch(
+            client, [owners.owner_login(group[0].repo_url) for group in groups.values()]
+        )
+
+        if cls.options.get('backend') == 'graphql':
+            cls.graphql = GraphQLBackend(HTTPTransport(token=OAUTH_TOKEN))
+            cls.graphql.prefetch([
+                tuple(project.repo_url.rstrip('/').split('/')[-2:])
+                for group in groups.values() for project in group
+            ])
+
+    def run(self, project):
+        """
+        Evaluates the criteria for the given project. Values which can be
+        carried over from the previous snapshot are not collected again.
+        """
+        user_name, repo_name = project.repo_url.rstrip('/').split('/')[-2:]
+
+        if self.options.get('backend') == 'graphql':
+            self.backend = self.graphql or GraphQLBackend(HTTPTransport(token=OAUTH_TOKEN))
+        if self.options.get('mirrors'):
+            self.mirror = GitMirror(project.repo_url, self.options['mirrors'])
+
+        self.connect(user_name, repo_name)
+        self.restore(self.previous)
+
+        verdict = self.evaluate_criteria()
+        data = {'meta_valid': verdict.valid, 'meta_verdict': verdict.as_dict()}
+        if self.ignored_estimate is not None:
+            data['meta_ignored_estimate'] = asdict(self.ignored_estimate)
+        if 'response_latencies' in self.__dict__:
+            data['meta_response_latency'] = asdict(self.response_latencies.distribution())
+        data.update({
+            f'meta_{name}': self.__dict__[name]
+            for name in self.reported if name in self.__dict__
+        })
+
+        self.publish('repository', self.repo, fingerprint=self.head)
+        self.publish('head', self.head, fingerprint=self.head)
+        self.publish('contributors', load=self.get_contributors, fingerprint=self.head)
+        self.publish('clone', load=self.clone_path, fingerprint=self.head)
+        return data
+
+    def __init__(self, user_name=None, repo_name=None, backend=None, mirror=None):
+        """
+        Gets the repo with repo_name from user_name's profile. Commits are
+        listed lazily, pages are only fetched as the criteria consume them.
+
+        Issues are fetched using the given backend (see
+        quenchmark.graphql.GraphQLBackend) if any, using the REST API
+        otherwise. If a mirror (see quenchmark.mirror.GitMirror) is given,
+        commit and contributor statistics are mined from it instead of
+        using the GitHub statistics endpoints.
+        """
+        self.backend = backend
+        self.mirror = mirror
+        self.marks = {}
+
+        if user_name is not None:
+            self.connect(user_name, repo_name)
+
+    def connect(self, user_name, repo_name):
         """
-        Gets the repo with repo_name from user_name's profile
-        and already retrieves a list of all commits.
+        Gets the repo with repo_name from user_name's profile.
         """
-        # create a Github instance with OAuth token
-        self.github = github.Github(OAUTH_TOKEN)
+        # create a Github instance with OAuth token, requests are paced by
+        # quenchmark.ratelimit.RequestScheduler rather than by PyGithub
+        self.github = github.Github(OAUTH_TOKEN, seconds_between_requests=None)
 
-        # adding @ ensures finding users exactly
-        self.user = self.github.search_users('@'+user_name)[0]
+        # the owner is resolved once for all of its repositories
+        self.owner = owners.directory.resolve(self.github, user_name)
+        self.user = self.owner.user
         self.repo = self.user.get_repo(repo_name)
-        self.commits = [commit for commit in self.repo.get_commits()]
+        self.commits = self.repo.get_commits()
+
+    @cached_property
+    def mirror_statistics(self):
+        """
+        Returns the statistics mined from the up to date mirror.
+        """
+        self.mirror.sync()
+        return self.mirror.statistics()
+
+    @cached_property
+    def head(self):
+        """
+        Returns the SHA of the most recent commit, None if nothing was
+        committed yet.
+        """
+        if self.mirror is not None:
+            return self.mirror_statistics.head
+        commit = next(iter(self.commits), None)
+        return commit.sha if commit is not None else None
+
+    def clone_path(self):
+        """
+        Returns the path of the up to date mirror, None if mirrors are not used.
+        """
+        if self.mirror is None:
+            return None
+        self.mirror_statistics  # syncs the mirror
+        return self.mirror.path
+
+    def restore(self, snapshot):
+        """
+        Carries over the values of the previous snapshot which are still
+        valid. Once something was committed, the commit count is listed
+        again, which takes a single request (see quenchmark.utils.count).
+        """
+        if snapshot is None or not snapshot.marks.get('head') or self.head is None:
+            return
+
+        if snapshot.marks['head'] == self.head:
+            # Nothing was committed, the contributor statistics did not change
+            for name in ('commit_count', 'contributor_count'):
+                if f'meta_{name}' in snapshot.metrics:
+                    self.__dict__[name] = snapshot.metrics[f'meta_{name}']
+            if 'core_developers' in snapshot.state:
+                self.__dict__['core_developers'] = snapshot.state['core_developers']
+
+    def snapshot(self, project, data):
+        """
+        Records the high water marks along with the per issue verdicts, so
+        that the next run only needs to evaluate issues updated since.
+        """
+        snapshot = super().snapshot(project, data)
+        snapshot.marks = {**self.marks, 'head': self.head}
+
+        if 'core_developers' in self.__dict__:
+            snapshot.state['core_developers'] = self.core_developers
+        # verdicts on a sample can not be updated incrementally
+        if 'issue_verdicts' in self.__dict__ and self.ignored_estimate is None:
+            snapshot.state['issue_verdicts'] = self.issue_verdicts
+            snapshot.state['core_developer_names'] = sorted(
+                dev['name'] for dev in self.core_developers
+            )
+
+        return snapshot
 
     @cached_property
     def commit_count(self):
         """
-        Returns the total number of commits.
+        Returns the total number of commits, without paging
+        through the entire history.
         """
-        return len([commit for commit in self.commits])
+        if self.mirror is not None:
+            return self.mirror_statistics.commit_count
+        return count(self.commits)
 
     @cached_property
     def is_young(self):
@@ -42,7 +255,9 @@ class MetaCollector(Collector):
         Returns True if the repository
         is younger than one year.
         """
-        return (dt.datetime.now() - self.repo.created_at) < dt.timedelta(weeks=52)
+        created_at = self.repo.created_at
+        # PyGithub returns timezone aware datetimes since its 2.0 release
+        return (dt.datetime.now(created_at.tzinfo) - created_at) < dt.timedelta(weeks=52)
 
     @cached_property
     def has_recent_commits(self):
@@ -50,9 +265,17 @@ class MetaCollector(Collector):
         Returns True if the repository had at
         least 20 commits in the past year.
         """
-        last_twenty_commits = self.commits[:19]
-        extract_date = lambda text_date: dt.datetime.strptime(text_date.stats.last_modified[5:16], "%d %b %Y")
-        in_past_year = lambda date: (dt.datetime.now() - date) < dt.timedelta(weeks=52)
+        now = dt.datetime.now(dt.timezone.utc)
+
+        if self.mirror is not None:
+            last_twenty_commits = self.mirror_statistics.commit_dates[:19]
+            extract_date = lambda date: date
+        else:
+            last_twenty_commits = itertools.islice(self.commits, 19)
+            # the commit date is part of the listing, no need to fetch each commit
+            extract_date = lambda commit: commit.commit.committer.date
+
+        in_past_year = lambda date: (now - date.replace(tzinfo=date.tzinfo or dt.timezone.utc)) < dt.timedelta(weeks=52)
         return any(map(in_past_year, map(extract_date, last_twenty_commits)))
 
     @cached_property
@@ -61,7 +284,7 @@ class MetaCollector(Collector):
         Returns the number of contributors
         for this project.
         """    
-        return len(self.get_contributors())
+        return len(self.contributor_stats.names)
         
     @cached_property
     def osi_license(self):
@@ -69,7 +292,12 @@ class MetaCollector(Collector):
         Returns True if the license associated
         with this repository is a valid OSI license.
         """
-        license_name = self.repo.get_license().license.spdx_id
+        metadata = self.backend.metadata(self.user.login, self.repo.name) \
+            if self.backend is not None else None
+        if metadata is not None:
+            license_name = metadata['license']
+        else:
+            license_name = self.repo.get_license().license.spdx_id
         return license_name in self.osi_license_ids
 
     @cached_property
@@ -78,7 +306,7 @@ class MetaCollector(Collector):
         Returns True if the repository has Issues
         and Pull Requests from external people.
         """
-        if not self.repo.has_issues or len(self.get_xtrnl_issues_and_prs()) == 0:
+        if not self.repo.has_issues or len(self.issue_verdicts) == 0:
             return False
         else:
             return True
@@ -89,87 +317,331 @@ class MetaCollector(Collector):
         Returns a list of names of core
         developers (>10% of total additions OR deletions OR >15% of total commits).
         """
+        return self.find_core_developers()
+
+    def find_core_developers(self, share=None, commit_share=None):
+        """
+        Returns the core developers for the given thresholds (core_share and
+        core_commit_share by default). The statistics are fetched once, any
+        other thresholds are evaluated on the loaded arrays.
+        """
         adds_and_dels = self.get_total_adds_and_dels()
+        core = self.contributor_stats.core(
+            adds_and_dels['additions'], adds_and_dels['deletions'], self.commit_count,
+            share=self.core_share if share is None else share,
+            commit_share=self.core_commit_share if commit_share is None else commit_share
+        )
+        developers = self.contributor_stats.as_dicts(core)
 
-        is_core_dev = lambda contributor: (contributor['additions']/adds_and_dels['additions'] > 0.10) \
-                        or (contributor['deletions']/adds_and_dels['deletions']*-1 > 0.10) \
-                        or (contributor['commits']/self.commit_count > 0.15)
+        # Issues and comments name their authors by login
+        if self.mirror is not None:
+            for developer in developers:
+                developer['name'] = self.github_login(developer['name'])
+        return developers
 
-        return list(filter(is_core_dev, self.get_contributors()))
+    def github_login(self, author):
+        """
+        Returns the GitHub login of an author of the mirror, looked up from
+        one of their commits if the mirror only knows their git name. The
+        git name is kept if the commit is not linked to any account.
+        """
+        sha = self.mirror_statistics.samples.get(author)
+        if sha is None:
+            return author
+
+        user = self.repo.get_commit(sha).author
+        return user.login if user is not None else author
 
     @cached_property
-    def has_ignored_issues_and_prs(self):
+    def issue_verdicts(self):
         """
-        Returns True if more than 50% of external Issues and PRs
-        were ignored within their first month of existence.
+        Returns a dictionary mapping the number of external Issues
+        and PRs to True if it was ignored. If the core developers did not
+        change, only Issues and PRs updated since the previous snapshot
+        are evaluated. The scan stops once the share of ignored ones is
+        decided (see ignorance_is_decided), hence not every external Issue
+        and PR needs to be present.
+
+        With the 'latency' option, the verdicts are read off the response
+        latencies of all the external Issues and PRs instead.
+        """
+        core_dev_names = [dev['name'] for dev in self.core_developers]
+
+        if self.options.get('latency'):
+            return self.response_latencies.ignored(weeks=4)
+
+        sampling = self.options.get('sampling')
+        if sampling:
+            settings = sampling if isinstance(sampling, dict) else {}
+            return self.sample_issue_verdicts(core_dev_names,
+                                              **{**self.sampling_defaults, **settings})
+
+        state = self.previous.state if self.previous else {}
+        since = self.previous.marks.get('issues_updated') if self.previous else None
+
+        if (self.backend is None and since and state.get('issue_verdicts') is not None
+                and state.get('core_developer_names') == sorted(core_dev_names)):
+            verdicts = {int(number): ignored for number, ignored in state['issue_verdicts'].items()}
+            self.marks['issues_updated'] = since
+            since = dt.datetime.fromisoformat(since)
+        else:
+            verdicts = {}
+            since = None
+
+        # The listing is streamed, least recently updated first, and the scan
+        # stops as soon as has_ignored_issues_and_prs is decided
+        issues = self.list_issues(since=since)
+        remaining = len(issues) if isinstance(issues, list) else issues.totalCount
+        revisable = bool(verdicts)
+        ignored = sum(verdicts.values())
+
+        for issue in issues:
+            check_cancelled()
+            remaining -= 1
+            if not self.is_external(issue, core_dev_names):
+                continue
+
+            verdict = self.is_ignored(issue, core_dev_names)
+            ignored += verdict - verdicts.get(issue.number, False)
+            verdicts[issue.number] = verdict
+
+            if self.ignorance_is_decided(ignored, len(verdicts), remaining, revisable):
+                self.count('issues_skipped', remaining)
+                break
+
+        return verdicts
+
+    def sample_issue_verdicts(self, core_dev_names, confidence, initial, growth, seed):
+        """
+        Evaluates a random sample of the external Issues and PRs, stratified
+        by the year of creation and by Issue vs PR. The sample grows by the
+        growth factor until the confidence interval of the ignored fraction
+        clears 50% (or covers all of them), the estimate is kept in
+        ignored_estimate. Listing the Issues takes a request per page, the
+        comments of every sampled one take a request each.
+        """
+        # members of the company are only recognized among the sampled ones,
+        # which saves looking up the profiles of all the authors
+        population = [issue for issue in self.list_issues()
+                      if self.is_external(issue, core_dev_names, company=False)]
+        verdicts = {}
+        if not population:
+            return verdicts
+
+        sample = StratifiedSample(
+            population, key=lambda issue: (issue.created_at.year, self.is_pull_request(issue)),
+            seed=seed
+        )
+
+        size = initial
+        while True:
+            for stratum, issue in list(sample.draw(size)):
+                check_cancelled()
+                if self.is_part_of_company(issue.user):
+                    sample.record(stratum, None)
+                    continue
+                verdicts[issue.number] = self.is_ignored(issue, core_dev_names)
+                sample.record(stratum, verdicts[issue.number])
+
+            self.ignored_estimate = sample.estimate(confidence)
+            if self.ignored_estimate.decided(0.50) or sample.exhausted:
+                break
+            size = max(size + 1, math.ceil(size * growth))
+
+        self.count('issues_sampled', sample.size)
+        self.debug(f"Ignored fraction {self.ignored_estimate.fraction:.2f} "
+                   f"[{self.ignored_estimate.low:.2f}, {self.ignored_estimate.high:.2f}] "
+                   f"from {sample.size} of {sample.population} Issues and PRs")
+        return verdicts
+
+    def is_pull_request(self, issue):
+        """
+        Returns True if the listed Issue is a PR.
+        """
+        if self.backend is not None:
+            return issue.pull_request
+
+        # plain Issues are listed without the pull_request link, reading it
+        # would fetch every one of them
+        return '/pull/' in issue.html_url
+
+    @cached_property
+    def response_latencies(self):
+        """
+        Returns the time to the first response of a core developer or a
+        member of the company to every external Issue and PR (see
+        quenchmark.latency.ResponseLatencies). The comments of the whole
+        repository are listed oldest first in a single listing, which takes
+        a request per page rather than per Issue.
         """
-        external_issues_and_prs = self.get_xtrnl_issues_and_prs()
         core_dev_names = [dev['name'] for dev in self.core_developers]
-        ignorance_counter = 0
 
-        for ext_issue in external_issues_and_prs:
-            replied_on_time = False
+        def responds(user):
+            check_cancelled()
+            return user.login in core_dev_names or self.is_part_of_company(user)
+
+        if self.backend is not None:
+            issues = [issue for issue in self.list_issues()
+                      if self.is_external(issue, core_dev_names)]
+            issues.sort(key=lambda issue: issue.created_at)
+            # the first comments of every Issue come along with it
+            comments = heapq.merge(*[
+                [(comment.created_at, issue.number, comment.user) for comment in issue.get_comments()]
+                for issue in issues
+            ], key=lambda comment: comment[0])
+        else:
+            issues = (issue for issue in self.paged(self.repo.get_issues(
+                          state='all', sort='created', direction='asc'))
+                      if self.is_external(issue, core_dev_names))
+            comments = ((comment.created_at, int(comment.issue_url.rsplit('/', 1)[-1]), comment.user)
+                        for comment in self.paged(self.repo.get_issues_comments(
+                            sort='created', direction='asc')))
+
+        with self.span('latencies'):
+            return ResponseLatencies.merge(
+                ((issue.created_at, issue.number) for issue in issues), comments, responds
+            )
+
+    @staticmethod
+    def ignorance_is_decided(ignored, evaluated, remaining, revisable=False):
+        """
+        Returns True if more than half of the evaluated Issues and PRs are
+        ignored, or at most half are, whatever the remaining ones turn out
+        to be. If revisable, the remaining ones may also be re-evaluations
+        of the evaluated ones, changing their verdicts.
+        """
+        if evaluated == 0:
+            return False
+
+        if revisable:
+            lowest = (ignored - remaining) / (evaluated + remaining)
+            highest = (ignored + remaining) / evaluated
+        else:
+            lowest = ignored / (evaluated + remaining)
+            highest = (ignored + remaining) / (evaluated + remaining)
+
+        return lowest > 0.50 or highest <= 0.50
+
+    def is_ignored(self, ext_issue, core_dev_names):
+        """
+        Returns True if no core developer or member of the company
+        replied to the Issue or PR within its first month. Comments
+        come oldest first, those past the first month are not fetched.
+        The comments are requested with SCAN_PRIORITY, after the requests
+        about the repositories.
+        """
+        if ext_issue.comments == 0:
+            return True # no need to list the comments
+
+        with priority(SCAN_PRIORITY):
             for comment in ext_issue.get_comments():
-                if ext_issue.created_at - comment.created_at > dt.timedelta(weeks=4):
+                check_cancelled()
+                if comment.created_at - ext_issue.created_at > dt.timedelta(weeks=4):
                     break # no one replied for one month
                 if comment.user.login in core_dev_names or self.is_part_of_company(comment.user):
-                    replied_on_time = True    
-                    break
+                    return False
+
+        return True
+
+    @cached_property
+    def has_ignored_issues_and_prs(self):
+        """
+        Returns True if more than 50% of external Issues and PRs
+        were ignored within their first month of existence.
+        """
+        ignorance_counter = sum(self.issue_verdicts.values())
 
-            if replied_on_time == False:
-                ignorance_counter += 1
+        if self.ignored_estimate is not None:
+            return self.ignored_estimate.fraction > 0.50
 
         # if more than 50% of Issues and PRs were ignored we consider the project abandoned
-        if ignorance_counter/len(external_issues_and_prs) > 0.50:
+        if ignorance_counter/len(self.issue_verdicts) > 0.50:
             return True
         else:
             return False
 
+    @cached_property
+    def contributor_stats(self):
+        """
+        Returns the weekly statistics of the contributors (see
+        quenchmark.contributors.ContributorStats), fetched once.
+        """
+        if self.mirror is not None:
+            return ContributorStats.from_totals(self.mirror_statistics.contributors)
+
+        stats = ContributorStats.from_github(self.repo.get_stats_contributors())
+
+        # the most recent week covered by the statistics is a high water mark
+        if stats.last_week is not None:
+            self.marks['stats_week'] = stats.last_week.isoformat()
+
+        return stats
+
     def get_contributors(self):
         """
         Returns a list of dictionaries. Each dictionary represents
         as single contributor and provides their name and their
         total number of additions and deletions.
         """
-        extract = lambda list_of_weeks, param: sum([week.a if param == 'a' else
-                                (week.d if param == 'd' else week.c)
-                                for week in list_of_weeks]
-        )
-        return [{'name': contributor.author.login,
-                'additions': extract(contributor.weeks, 'a'),
-                'deletions': extract(contributor.weeks, 'd'),
-                'commits': extract(contributor.weeks, 'c')}
-                for contributor in self.repo.get_stats_contributors()
-        ]
-    
-    def get_xtrnl_issues_and_prs(self):
-        """
-        Returns a list of Issues and PRs from external
-        developers.
+        return self.contributor_stats.as_dicts()
+
+    def list_issues(self, since=None):
         """
-        
-        # get all issues and names of core developers
-        issues = [issue for issue in self.repo.get_issues(state='all')]
-        core_dev_names = [dev['name'] for dev in self.core_developers]    
+        Returns the listing of all Issues and PRs, optionally only those
+        updated since the given time. REST listings are paged lazily, least
+        recently updated first, so that a partial scan still leaves a valid
+        high water mark behind. The pages are fetched a few at a time.
+        """
+        if self.backend is not None:
+            return self.backend.issues(self.user.login, self.repo.name)
+        elif since is not None:
+            return self.paged(self.repo.get_issues(state='all', sort='updated', direction='asc',
+                                                   since=since))
+        else:
+            return self.paged(self.repo.get_issues(state='all', sort='updated', direction='asc'))
 
-        external_issues_and_prs = [] # initialize an empty list
+    def paged(self, listing):
+        """
+        Returns the listing with its following pages fetched while the
+        first ones are consumed (see quenchmark.pagination).
+        """
+        return paginate(listing, self.options.get('page_concurrency', self.page_concurrency))
 
-        for issue in issues:
+    def is_external(self, issue, core_dev_names, company=True):
+        """
+        Returns True if the Issue or PR comes from an external developer,
+        keeping track of the high water mark of the scanned ones. Unless
+        company is set, members of the company are not recognized.
+        """
 
-            if issue.user == self.repo.owner:
-                continue
+        # keep track of the most recent update as the high water mark
+        updated_at = getattr(issue, 'updated_at', None)
+        if isinstance(updated_at, dt.datetime):
+            updated_at = updated_at.isoformat()
+            self.marks['issues_updated'] = max(self.marks.get('issues_updated', updated_at), updated_at)
 
-            # check if author of issue or PR is from the same company that owns the repo
-            if self.is_part_of_company(issue.user):
-                    continue
+        if issue.user.login == self.repo.owner.login:
+            return False
 
-            # check if author of issue is a core developer
-            if issue.user.login in core_dev_names:
-                    continue
-            else:
-                external_issues_and_prs.append(issue)
+        # check if author of issue is a core developer
+        if issue.user.login in core_dev_names:
+            return False
+
+        # check if author of issue or PR is from the same company that owns the
+        # repo, last as it may need the profile of the author
+        return not (company and self.is_part_of_company(issue.user))
+
+    def get_xtrnl_issues_and_prs(self, since=None):
+        """
+        Yields the Issues and PRs from external
+        developers, optionally only those updated since
+        the given time.
+        """
+        core_dev_names = [dev['name'] for dev in self.core_developers]
 
-        return external_issues_and_prs
+        for issue in self.list_issues(since=since):
+            if self.is_external(issue, core_dev_names):
+                yield issue
 
     def is_part_of_company(self, user):
         """
@@ -177,65 +649,50 @@ class MetaCollector(Collector):
         of the company that owns the repo.
         """
 
-        # define lambda for fuzzy string comparison (yields true if >90% overlap)
-        fuzzy_compare = lambda string1, string2: SM(None, string1, string2).ratio() > 0.9
-            
-        if user.company is None:
-            return False
-        elif fuzzy_compare(user.company, self.user.login):
-            # we use fuzzy string comparison to account for spelling or punctuation diffs
+        # members of the owning organization need no profile lookup
+        if user.login in self.owner.members:
             return True
-        elif self.user.name is not None: # some users have only login and no name
-            if fuzzy_compare(user.company, self.user.name):
-                return True
-        else:
-            return False
-    
+
+        # we use fuzzy string comparison to account for spelling or punctuation
+        # diffs, verdicts are memoized per user (see quenchmark.affiliation)
+        return affiliation.affiliations.is_affiliated(user, self.user)
+
     def get_total_adds_and_dels(self):
         """
         Returns a dictionary with the total
         number of additions and deletions
         in this repository.
         """
-        stats = {}
-        stats['additions'] = reduce(lambda x, y: (x + y.additions) if type(x) is int \
-                     else (x.additions + y.additions), self.repo.get_stats_code_frequency()
-        )
-        stats['deletions'] = reduce(lambda x, y: (x + y.deletions) if type(x) is int \
-                     else (x.deletions + y.deletions), self.repo.get_stats_code_frequency()
-        )
-        return stats
-    
+        if self.mirror is not None:
+            return dict(self.mirror_statistics.totals)
+
+        frequency = np.array([(week.additions, week.deletions)
+                              for week in self.repo.get_stats_code_frequency()],
+                             dtype=np.int64).reshape(-1, 2)
+        additions, deletions = frequency.sum(axis=0).tolist()
+        return {'additions': additions, 'deletions': deletions}
+
+    def evaluate_criteria(self):
+        """
+        Executes the entire decision tree and returns the Verdict (see
+        quenchmark.criteria.Verdict), with the outcome and the duration
+        of every evaluated criterion.
+        """
+        engine = CriteriaEngine(self.criteria, prefetch=self.options.get('prefetch', True))
+        verdict = engine.evaluate(self)
+
+        if verdict.valid:
+            self.verbose("All the criteria are satisfied")
+        else:
+            failed = next(c for c in self.criteria if c.name == verdict.failed)
+            self.verbose(f"Criterion {failed.name} is not satisfied: {failed.description}")
+        return verdict
+
     def is_valid(self):
         """
         Executes the entire decision tree and yields True
         if the repo satisfies all conditions. Hence, the repo
         is a valid OSS repo that is valuable to other and also
-        obeys good practices.    
+        obeys good practices.
         """
-
-        if not self.osi_license: 
-            print('license not okay')
-            return False
-        print('license okay')
-        if self.contributor_count == 1:
-              print('only 1 contributor')
-              return False
-        print('>1 contributor')
-        if not self.is_young and self.commit_count < 100:
-              print('project is old and has less than 100 commits.')
-              return False
-        print('project either old and has more than 100 commits or young.')
-        if self.is_young and not self.has_recent_commits:
-              print('project is young but has too little recent commits')
-              return False
-        print('project maybe young and enough recent commits')
-        if not self.has_xtrnl_issues_or_prs:
-              print('project has no xtrnl issues')
-              return False
-        print('project has xtrnl issues')
-        if self.has_ignored_issues_and_prs:
-            print('project is ignorant')
-            return False
-        print('project not ignorant')
-        return True # since it has satisfied all previous conditions
+        return self.evaluate_criteria().valid
@@ -1,49 +1,68 @@
 import os
-from xml.etree import ElementTree
 
+from quenchmark import coverage
+from quenchmark.pipeline import DockerPipeline
 from quenchmark.plugins import Collector
-from quenchmark.utils import run
 
 
 class TestCollector(Collector):
 
+    concurrency_group = 'heavy'
+
+    # The upstream commit to test if MetaCollector is run as well, it is
+    # looked up with git ls-remote otherwise
+    uses = ('head',)
+
+    # Shared by all the projects, see quenchmark.pipeline
+    pipeline = DockerPipeline()
+
+    # Looked up by the instance run for a project, if no collector provides
+    # the head
+    upstream_head = None
+
+    @classmethod
+    def configure(cls, **options):
+        super().configure(**options)
+        cls.pipeline = DockerPipeline(**options)
+
+    def upstream(self, project):
+        """
+        Returns the upstream commit to test.
+        """
+        if 'head' in self.artifacts and self.artifact('head') is not None:
+            return self.artifact('head')
+        if self.upstream_head is None:
+            self.upstream_head = self.pipeline.upstream_head(project)
+        return self.upstream_head
+
+    def fingerprint(self, project):
+        """
+        The coverage only changes with the upstream commit and the image.
+        """
+        if not project.dockerfile:
+            return None
+        return f'{self.upstream(project)}-{self.pipeline.fingerprint(project)}'
+
     def run(self, project):
         if not project.dockerfile:
             self.info("Dockerfile not present")
             return {}
 
-        stdout, stderr, returncode = run([
-          'docker', 'build',
-          '-t', f'qosstest_{project.identifier}',
-          '-f', project.dockerfile,
-          '.'
-        ])
-        self.info(stdout)
-        self.info(stderr)
-
-        # Create coverage storage
-        os.makedirs('/tmp/quenchmark/reports/', exist_ok=True)
-
-        stdout, stderr, returncode = run([
-          'docker',
-          'run',
-          '--network=host',
-          '-v', '/tmp/quenchmark/reports/:/reports/:rw',
-          '--security-opt', 'label=type:container_runtime_t',
-          f'qosstest_{project.identifier}',
-        ])
-        self.info(stdout)
-        self.info(stderr)
-
-        tree = ElementTree.parse('/tmp/quenchmark/reports/coverage.xml')
-        root = tree.getroot()
-        self.info(f"{root.attrib}")
-
-        data =  {
-            'coverage_total_lines': root.attrib['lines-valid'],
-            'coverage_covered_lines': root.attrib['lines-covered'],
-            'coverage_fraction': root.attrib['line-rate']
-        }
-
-        os.unlink('/tmp/quenchmark/reports/coverage.xml')
+        image = self.pipeline.build(project, self.upstream(project))
+
+        with self.pipeline.report_directory(project) as reports:
+            self.pipeline.test(project, image, reports)
+
+            report = coverage.parse(os.path.join(reports, 'coverage.xml'))
+            self.info(f"{report.totals}")
+
+            data = {
+                'coverage_total_lines': report.totals['lines-valid'],
+                'coverage_covered_lines': report.totals['lines-covered'],
+                'coverage_fraction': report.totals['line-rate'],
+                'coverage_branch_fraction': report.totals.get('branch-rate'),
+                'coverage_packages': report.packages,
+                'coverage_files': report.files
+            }
+
         return data
@@ -0,0 +1 @@
+OAUTH_TOKEN = None
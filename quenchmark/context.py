@@ -0,0 +1,31 @@
+"""
+Keeps track of the project and collector the current thread is working on.
+"""
+
+import contextlib
+import contextvars
+
+current_project = contextvars.ContextVar('current_project', default=None)
+current_collector = contextvars.ContextVar('current_collector', default=None)
+
+
+@contextlib.contextmanager
+def activate(variable, value):
+    """
+    Sets the context variable to the given value for the duration of the
+    with block.
+    """
+
+    token = variable.set(value)
+    try:
+        yield value
+    finally:
+        variable.reset(token)
+
+
+def project(identifier):
+    return activate(current_project, identifier)
+
+
+def collector(name):
+    return activate(current_collector, name)
@@ -0,0 +1,135 @@
+"""
+Implements the contributor statistics of a repository as NumPy arrays, so
+that totals, core developers and activity within a time window are
+computed with vectorized operations rather than per contributor dicts.
+"""
+
+import datetime as dt
+from dataclasses import dataclass
+
+import numpy as np
+
+# The last axis of ContributorStats.counts
+FIELDS = ('additions', 'deletions', 'commits')
+ADDITIONS, DELETIONS, COMMITS = range(len(FIELDS))
+
+
+def week_start(moment):
+    """
+    Returns the datetime as a UTC datetime64, naive datetimes are UTC.
+    """
+
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return np.datetime64(moment, 's')
+
+
+@dataclass
+class ContributorStats:
+    """
+    The weekly additions, deletions and commits of the contributors, as an
+    array of shape (contributors, weeks, len(FIELDS)). The weeks holds the
+    start of every week as datetime64, None if only the totals are known
+    (a single week standing for the whole history).
+    """
+
+    names: list
+    counts: np.ndarray
+    weeks: np.ndarray = None
+
+    @classmethod
+    def from_github(cls, stats):
+        """
+        Loads the statistics from the contributors listed by GitHub (see
+        Repository.get_stats_contributors), whose weekly series are aligned.
+        """
+
+        stats = list(stats)
+        length = max((len(contributor.weeks) for contributor in stats), default=0)
+        counts = np.zeros((len(stats), length, len(FIELDS)), dtype=np.int64)
+        starts = []
+
+        for index, contributor in enumerate(stats):
+            weeks = contributor.weeks
+            if weeks:
+                counts[index, :len(weeks)] = [(week.a, week.d, week.c) for week in weeks]
+            if len(weeks) == length and not starts:
+                starts = [getattr(week, 'w', None) for week in weeks]
+
+        weeks = None
+        if starts and all(isinstance(start, dt.datetime) for start in starts):
+            weeks = np.array([week_start(start) for start in starts])
+
+        return cls([contributor.author.login for contributor in stats], counts, weeks)
+
+    @classmethod
+    def from_totals(cls, contributors):
+        """
+        Loads the statistics from the dicts returned by get_contributors.
+        """
+
+        counts = np.array([[[contributor[name] for name in FIELDS]]
+                           for contributor in contributors], dtype=np.int64)
+        return cls([contributor['name'] for contributor in contributors],
+                   counts.reshape(len(contributors), 1, len(FIELDS)))
+
+    @property
+    def last_week(self):
+        """
+        Returns the start of the most recent week covered, None if unknown.
+        """
+
+        if self.weeks is None or not len(self.weeks):
+            return None
+        return self.weeks.max().astype(dt.datetime).replace(tzinfo=dt.timezone.utc)
+
+    def totals(self, since=None, until=None):
+        """
+        Returns the array of shape (contributors, len(FIELDS)) summed over
+        the weeks starting within [since, until).
+        """
+
+        if since is None and until is None:
+            return self.counts.sum(axis=1)
+        if self.weeks is None:
+            raise ValueError("Time windows need the weekly statistics")
+
+        mask = np.ones(len(self.weeks), dtype=bool)
+        if since is not None:
+            mask &= self.weeks >= week_start(since)
+        if until is not None:
+            mask &= self.weeks < week_start(until)
+        return self.counts[:, mask].sum(axis=1)
+
+    def active(self, since, until=None):
+        """
+        Returns the names of the contributors committing within the window.
+        """
+
+        commits = self.totals(since, until)[:, COMMITS]
+        return [self.names[index] for index in np.flatnonzero(commits)]
+
+    def core(self, additions, deletions, commits, share=0.10, commit_share=0.15):
+        """
+        Returns the boolean mask of the core developers, who made more than
+        share of the given total additions or deletions, or more than
+        commit_share of the commits. GitHub reports total deletions as a
+        negative number.
+        """
+
+        totals = self.totals()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return ((totals[:, ADDITIONS] / additions > share)
+                    | (totals[:, DELETIONS] / deletions * -1 > share)
+                    | (totals[:, COMMITS] / commits > commit_share))
+
+    def as_dicts(self, mask=None):
+        """
+        Returns the contributors (selected by the mask, if any) as the dicts
+        of name, additions, deletions and commits.
+        """
+
+        totals = self.totals().tolist()
+        indices = range(len(self.names)) if mask is None else np.flatnonzero(mask)
+        return [{'name': self.names[index], **dict(zip(FIELDS, totals[index]))}
+                for index in indices]
@@ -0,0 +1,94 @@
+"""
+Implements a streaming parser of Cobertura coverage reports (as written by
+coverage.py), which keeps memory use constant regardless of the size of the
+report.
+"""
+
+from dataclasses import dataclass, field
+from xml.etree import ElementTree
+
+from quenchmark.instrumentation import timed
+
+PACKAGE_COLUMNS = ('name', 'line_rate', 'branch_rate')
+FILE_COLUMNS = ('package', 'filename', 'lines', 'covered_lines',
+                'branches', 'covered_branches', 'line_rate', 'branch_rate')
+
+
+def columns(names):
+    return {name: [] for name in names}
+
+
+def rate(value):
+    return float(value) if value is not None else None
+
+
+@dataclass
+class CoverageReport:
+    """
+    The totals of the report, along with the per-package and per-file
+    metrics. The latter are kept in columnar form, as a dictionary of
+    equally long lists.
+    """
+
+    totals: dict = field(default_factory=dict)
+    packages: dict = field(default_factory=lambda: columns(PACKAGE_COLUMNS))
+    files: dict = field(default_factory=lambda: columns(FILE_COLUMNS))
+
+
+@timed('coverage.parse')
+def parse(source):
+    """
+    Parses the coverage report from the given path or file object. Every
+    element is detached from its parent as soon as it was processed, hence
+    only the currently open elements are held in memory.
+
+    Lines are counted from the <line> elements of the classes, the ones
+    listed under their <methods> are skipped as they repeat them.
+    """
+
+    report = CoverageReport()
+    stack = []
+    package = counts = None
+
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(element)
+
+            if element.tag == 'coverage':
+                report.totals = dict(element.attrib)
+            elif element.tag == 'package':
+                package = element.get('name')
+            elif element.tag == 'class':
+                counts = [0, 0, 0, 0]
+            continue
+
+        stack.pop()
+        parents = [parent.tag for parent in stack[-2:]]
+
+        if element.tag == 'line' and parents == ['class', 'lines']:
+            counts[0] += 1
+            counts[1] += int(element.get('hits', 0)) > 0
+
+            # condition-coverage="50% (1/2)"
+            condition = element.get('condition-coverage')
+            if element.get('branch') == 'true' and condition:
+                covered, total = condition.rsplit('(', 1)[1].rstrip(')').split('/')
+                counts[2] += int(total)
+                counts[3] += int(covered)
+
+        elif element.tag == 'class':
+            row = (package, element.get('filename'), *counts,
+                   rate(element.get('line-rate')), rate(element.get('branch-rate')))
+            for name, value in zip(FILE_COLUMNS, row):
+                report.files[name].append(value)
+
+        elif element.tag == 'package':
+            row = (package, rate(element.get('line-rate')), rate(element.get('branch-rate')))
+            for name, value in zip(PACKAGE_COLUMNS, row):
+                report.packages[name].append(value)
+
+        # The element just closed is always the last child of its parent
+        if stack:
+            del stack[-1][-1]
+
+    return report
@@ -0,0 +1,193 @@
+"""
+Implements evaluating a conjunction of criteria, cheapest first, stopping
+at the first failed one. While a criterion is evaluated, the data of the
+next one is fetched in the background.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from quenchmark import context
+from quenchmark.logger import LoggerMixin
+
+current_cancellation = contextvars.ContextVar('current_cancellation', default=None)
+
+
+class Cancelled(Exception):
+    """
+    Raised by check_cancelled once the data being prefetched are no longer
+    needed.
+    """
+    pass
+
+
+def check_cancelled():
+    """
+    Raises Cancelled if the calling thread prefetches the data of a
+    criterion which will not be evaluated. Lengthy computations of the
+    subject call it between their steps (e.g. their requests).
+    """
+
+    cancellation = current_cancellation.get()
+    if cancellation is not None and cancellation.is_set():
+        raise Cancelled()
+
+
+@dataclass
+class Criterion:
+    """
+    A condition the subject has to satisfy. The check is called with the
+    subject and returns True if the condition holds. Requires lists the
+    attributes of the subject the check reads, or is called with the
+    subject to list them if the check only reads some of them depending on
+    the others. Cost estimates the price of computing them (in API
+    requests), after lists the criteria which need to pass before this one
+    can be evaluated.
+    """
+
+    name: str
+    check: object
+    cost: float = 1.0
+    requires: tuple = ()
+    after: tuple = ()
+    description: str = ''
+
+
+@dataclass
+class Evaluation:
+    """
+    The outcome of a single criterion, the duration includes waiting for
+    its prefetched data.
+    """
+
+    criterion: str
+    passed: bool
+    duration: float
+
+
+@dataclass
+class Verdict:
+    """
+    The outcome of all the criteria. Failed is the name of the criterion
+    which failed, the criteria after it were skipped.
+    """
+
+    valid: bool
+    failed: str = None
+    evaluations: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+
+    def __bool__(self):
+        return self.valid
+
+    def as_dict(self):
+        return asdict(self)
+
+
+class CriteriaEngine(LoggerMixin):
+    """
+    Evaluates the criteria in the order of their estimated cost, respecting
+    their after constraints. If prefetch is set, the required attributes of
+    the next criterion are computed in a background thread while the
+    current one is evaluated.
+
+    Attributes are computed by a single thread at a time: the background
+    thread computes them in the evaluation order, and a criterion is only
+    evaluated once all the prefetched data up to it are ready. Hence lazily
+    computed attributes need not be thread safe. Once a criterion fails,
+    the prefetch of the next one is cancelled: it stops at the next step
+    which calls check_cancelled, and the verdict is returned once it did.
+    """
+
+    def __init__(self, criteria, prefetch=True):
+        self.criteria = list(criteria)
+        self.prefetch = prefetch
+        self.order = self.sort()
+
+    def sort(self):
+        names = {criterion.name for criterion in self.criteria}
+        for criterion in self.criteria:
+            unknown = set(criterion.after) - names
+            if unknown:
+                raise ValueError(f"Criterion {criterion.name} comes after "
+                                 f"unknown criteria {sorted(unknown)}")
+
+        order, done = [], set()
+        remaining = list(self.criteria)
+        while remaining:
+            ready = [criterion for criterion in remaining if set(criterion.after) <= done]
+            if not ready:
+                raise ValueError("Circular order of criteria "
+                                 f"{[criterion.name for criterion in remaining]}")
+
+            # min is stable, criteria of the same cost keep their order
+            cheapest = min(ready, key=lambda criterion: criterion.cost)
+            order.append(cheapest)
+            done.add(cheapest.name)
+            remaining.remove(cheapest)
+
+        return order
+
+    @staticmethod
+    def load(subject, criterion):
+        requires = criterion.requires
+        for name in requires(subject) if callable(requires) else requires:
+            getattr(subject, name)
+
+    def prefetched(self, subject, criterion, cancellation):
+        with context.activate(current_cancellation, cancellation):
+            self.load(subject, criterion)
+
+    def evaluate(self, subject):
+        """
+        Returns the Verdict on the subject.
+        """
+
+        verdict = Verdict(valid=True)
+        executor = ThreadPoolExecutor(1, thread_name_prefix='quenchmark-prefetch') \
+            if self.prefetch else None
+        cancellation = threading.Event()
+        pending = {}
+
+        def prefetch(index):
+            if executor is not None and index < len(self.order):
+                criterion = self.order[index]
+                # runs on behalf of the current project and collector
+                pending[criterion.name] = executor.submit(
+                    contextvars.copy_context().run, self.prefetched, subject, criterion,
+                    cancellation
+                )
+
+        try:
+            prefetch(0)
+            for index, criterion in enumerate(self.order):
+                start = time.perf_counter()
+                with self.span('criterion', criterion=criterion.name):
+                    if criterion.name in pending:
+                        pending.pop(criterion.name).result()
+                    prefetch(index + 1)
+                    passed = bool(criterion.check(subject))
+
+                verdict.evaluations.append(
+                    Evaluation(criterion.name, passed, time.perf_counter() - start)
+                )
+                self.verbose(f"Criterion {criterion.name} "
+                             f"{'passed' if passed else 'failed'}")
+
+                if not passed:
+                    verdict.valid = False
+                    verdict.failed = criterion.name
+                    verdict.skipped = [skipped.name for skipped in self.order[index + 1:]]
+                    break
+        finally:
+            if executor is not None:
+                # the data of the next criterion are no longer needed, the
+                # prefetch is waited for so that the subject is left to a
+                # single thread
+                cancellation.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        return verdict
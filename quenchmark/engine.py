@@ -0,0 +1,292 @@
+"""
+Implements the concurrent execution engine used to collect data for many
+projects at once.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from quenchmark import context
+from quenchmark.checkpoint import Checkpoint
+from quenchmark.graph import DependencyGraph
+from quenchmark.logger import LoggerMixin
+
+
+@dataclass
+class Failure:
+    """
+    Describes a single collector that failed for a given project.
+    """
+
+    project: str
+    collector: str
+    error: str
+
+
+@dataclass
+class Outcome:
+    """
+    The result of running a single collector for a single project.
+    """
+
+    data: dict = field(default_factory=dict)
+    artifacts: dict = field(default_factory=dict)
+    failure: Failure = None
+
+
+class ExecutionEngine(LoggerMixin):
+    """
+    Runs the collectors for multiple projects concurrently using a bounded
+    worker pool.
+
+    The collectors of a project are scheduled along their dependency graph
+    (see quenchmark.graph.DependencyGraph): a collector is started as soon
+    as the collectors it requires finished, and receives the artifacts they
+    published. Independent collectors run at the same time. A collector
+    whose inputs did not change since the previous run is skipped (see
+    Collector.fingerprint), unless other collectors require its artifacts.
+
+    Every collector belongs to a concurrency group (see
+    Collector.concurrency_group). Each group has its own limit on the number
+    of collectors that may run at the same time, so that cheap I/O bound
+    collectors are not throttled by the heavyweight ones (and vice versa).
+    Ready collectors wait in a queue of their group and are only handed to
+    the pool once their group and the pool have room, hence a collector
+    waiting for its group never holds a worker.
+
+    If a checkpoint store is given, the outcome of every collector is saved
+    as soon as it finishes. When resuming, collectors which already finished
+    successfully are skipped and their checkpointed data is used instead,
+    unless collectors still to be run require their artifacts.
+    """
+
+    default_workers = 8
+    default_limits = {
+        'io': 8,
+        'heavy': 2,
+    }
+
+    def __init__(self, workers=None, limits=None, store=None,
+                 checkpoints=None, resume=False):
+        self.store = store
+        self.checkpoints = checkpoints
+        self.resume = resume
+        self.workers = workers or self.default_workers
+        self.limits = {**self.default_limits, **(limits or {})}
+
+    def group_of(self, plugin_cls):
+        """
+        Returns the concurrency group of the collector. Unknown groups are
+        treated as I/O bound.
+        """
+
+        group = getattr(plugin_cls, 'concurrency_group', 'io')
+        return group if group in self.limits else 'io'
+
+    def limit_for(self, group):
+        """
+        Returns the number of collectors of the given concurrency group
+        which may run at the same time.
+        """
+
+        return self.limits[group if group in self.limits else 'io']
+
+    def restorable(self, project, graph):
+        """
+        Returns the outcomes of the collectors which can be restored from the
+        checkpoints of the previous run. The artifacts are not checkpointed,
+        hence collectors required by collectors to be run are run again,
+        collectors whose artifacts are only used are not.
+        """
+
+        restored = {}
+        if not self.resume or self.checkpoints is None:
+            return restored
+
+        for plugin_cls in reversed(graph.order):
+            checkpoint = self.checkpoints.load(project.identifier, plugin_cls.__name__)
+            if checkpoint is None or not checkpoint.done:
+                continue
+            if all(requirer in restored for requirer in graph.requirers[plugin_cls]):
+                self.debug(f"{plugin_cls.__name__} already finished for "
+                           f"{project.identifier}, skipping")
+                restored[plugin_cls] = Outcome(checkpoint.data)
+
+        return restored
+
+    def run_collector(self, project, plugin_cls, artifacts, required):
+        """
+        Runs a single collector for the project, given the artifacts it
+        requires. If required is False, no other collector needs its
+        artifacts, hence it may be skipped if its inputs did not change.
+        """
+
+        name = plugin_cls.__name__
+
+        try:
+            with context.project(project.identifier), context.collector(name):
+                plugin = plugin_cls()
+                plugin.artifacts = artifacts
+                plugin.published = {}
+                if self.store is not None:
+                    plugin.previous = self.store.latest(project.identifier, name)
+
+                fingerprint = getattr(plugin, 'fingerprint', None)
+                inputs = fingerprint(project) if fingerprint is not None else None
+                previous = getattr(plugin, 'previous', None)
+
+                if (not required and inputs is not None and previous is not None
+                        and previous.marks.get('inputs') == inputs):
+                    self.info(f"Inputs of {name} unchanged for {project.identifier}, skipping")
+                    self.checkpoint(project, plugin_cls, Checkpoint('done', previous.metrics))
+                    return Outcome(previous.metrics)
+
+                with self.span('collect'):
+                    new_data = plugin.run(project) or {}
+
+            missing = set(getattr(plugin_cls, 'provides', ())) - set(plugin.published)
+            if missing:
+                raise Exception(f"Artifacts not published: {', '.join(sorted(missing))}")
+
+            if self.store is not None:
+                snapshot = plugin.snapshot(project, new_data)
+                if inputs is not None:
+                    snapshot.marks['inputs'] = inputs
+                self.store.record(snapshot)
+
+            self.checkpoint(project, plugin_cls, Checkpoint('done', new_data))
+            return Outcome(new_data, plugin.published)
+        except Exception as exc:
+            self.error(f"{name} failed for {project.identifier}: {exc}")
+            return self.fail(project, plugin_cls, f"{type(exc).__name__}: {exc}")
+
+    def fail(self, project, plugin_cls, error):
+        failure = Failure(project=project.identifier, collector=plugin_cls.__name__,
+                          error=error)
+        self.checkpoint(project, plugin_cls, Checkpoint('failed', error=error))
+        return Outcome(failure=failure)
+
+    def checkpoint(self, project, plugin_cls, checkpoint):
+        if self.checkpoints is not None:
+            self.checkpoints.save(project.identifier, plugin_cls.__name__, checkpoint)
+
+    def merge(self, project, graph, outcomes):
+        """
+        Merges the data of the collectors of the project, in the order of
+        the graph. Returns the merged data and a list of failures.
+        """
+
+        project_data = {}
+        failures = []
+
+        for plugin_cls in graph.order:
+            outcome = outcomes[plugin_cls]
+            if outcome.failure is not None:
+                failures.append(outcome.failure)
+                continue
+
+            duplicates = set(project_data.keys()) & set(outcome.data.keys())
+            if duplicates:
+                failures.append(Failure(
+                    project=project.identifier,
+                    collector=plugin_cls.__name__,
+                    error=f"Exception: Duplicate keys: {', '.join(sorted(duplicates))}"
+                ))
+                continue
+
+            project_data.update(outcome.data)
+
+        return project_data, failures
+
+    def run(self, projects, plugin_classes):
+        """
+        Collects the data for all the given projects. Returns a tuple of the
+        {identifier: data} dictionary (ordered as the projects were given)
+        and the list of failures.
+        """
+
+        graph = DependencyGraph(plugin_classes)
+        outcomes = {project.identifier: {} for project in projects}
+        started = {project.identifier: set() for project in projects}
+        pending = {}
+        ready = {group: deque() for group in self.limits}
+        running = {group: 0 for group in self.limits}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def dispatch():
+                """
+                Submits the ready collectors of every group with room left,
+                as long as the pool has an idle worker.
+                """
+
+                for group, queue in ready.items():
+                    while (queue and running[group] < self.limit_for(group)
+                           and len(pending) < self.workers):
+                        project, plugin_cls, artifacts, required = queue.popleft()
+                        running[group] += 1
+                        future = executor.submit(self.run_collector, project, plugin_cls,
+                                                 artifacts, required)
+                        pending[future] = (project, plugin_cls)
+
+            def advance(project):
+                """
+                Starts the collectors of the project whose requirements are
+                met, fails the ones whose requirements failed.
+                """
+
+                project_outcomes = outcomes[project.identifier]
+
+                for plugin_cls in graph.order:
+                    if plugin_cls in project_outcomes or plugin_cls in started[project.identifier]:
+                        continue
+
+                    dependencies = graph.dependencies[plugin_cls]
+                    if not all(dependency in project_outcomes for dependency in dependencies):
+                        continue
+
+                    failed = [dependency.__name__ for dependency in graph.required[plugin_cls]
+                              if project_outcomes[dependency].failure is not None]
+                    if failed:
+                        project_outcomes[plugin_cls] = self.fail(
+                            project, plugin_cls, f"Required collectors failed: {', '.join(failed)}"
+                        )
+                        continue
+
+                    # used artifacts of failed, skipped or restored collectors
+                    # are left out
+                    provided = {name: project_outcomes[graph.providers[name]].artifacts
+                                for name in graph.inputs[plugin_cls]}
+                    artifacts = {name: published[name] for name, published in provided.items()
+                                 if name in published}
+                    started[project.identifier].add(plugin_cls)
+                    ready[self.group_of(plugin_cls)].append(
+                        (project, plugin_cls, artifacts, bool(graph.requirers[plugin_cls]))
+                    )
+
+            for project in projects:
+                outcomes[project.identifier].update(self.restorable(project, graph))
+                advance(project)
+            dispatch()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    project, plugin_cls = pending.pop(future)
+                    running[self.group_of(plugin_cls)] -= 1
+                    outcomes[project.identifier][plugin_cls] = future.result()
+                    advance(project)
+                dispatch()
+
+        data = {}
+        failures = []
+
+        # Merge in the order of the projects, not in the order of completion
+        for project in projects:
+            project_data, project_failures = self.merge(project, graph,
+                                                        outcomes[project.identifier])
+            data[project.identifier] = project_data
+            failures.extend(project_failures)
+
+        return data, failures
@@ -0,0 +1,87 @@
+"""
+Implements the dependency graph of the collectors, built from the artifacts
+they provide and require (see Collector.provides and Collector.requires).
+"""
+
+
+class DependencyError(Exception):
+    """
+    Raised when the requirements of the collectors can not be satisfied.
+    """
+    pass
+
+
+class DependencyGraph(object):
+    """
+    A directed acyclic graph with an edge from every collector providing an
+    artifact to every collector requiring it, or using it (see
+    Collector.uses) if it is provided. Inputs lists the names of the
+    artifacts every collector receives.
+
+    The edges of used artifacts only order the collectors: required lists
+    the collectors every collector can not run without, and requirers the
+    collectors which can not run without every collector.
+    """
+
+    def __init__(self, plugin_classes):
+        self.plugin_classes = list(plugin_classes)
+        self.providers = {}
+
+        for plugin_cls in self.plugin_classes:
+            for name in getattr(plugin_cls, 'provides', ()):
+                if name in self.providers:
+                    raise DependencyError(
+                        f"Artifact '{name}' is provided by both "
+                        f"{self.providers[name].__name__} and {plugin_cls.__name__}"
+                    )
+                self.providers[name] = plugin_cls
+
+        self.dependencies = {plugin_cls: [] for plugin_cls in self.plugin_classes}
+        self.dependents = {plugin_cls: [] for plugin_cls in self.plugin_classes}
+        self.inputs = {plugin_cls: [] for plugin_cls in self.plugin_classes}
+        self.required = {plugin_cls: [] for plugin_cls in self.plugin_classes}
+        self.requirers = {plugin_cls: [] for plugin_cls in self.plugin_classes}
+
+        for plugin_cls in self.plugin_classes:
+            requires = getattr(plugin_cls, 'requires', ())
+            for name in (*requires, *getattr(plugin_cls, 'uses', ())):
+                provider = self.providers.get(name)
+                if provider is None and name in requires:
+                    raise DependencyError(f"{plugin_cls.__name__} requires '{name}', "
+                                          "which no collector provides")
+                if provider is None:
+                    continue
+                self.inputs[plugin_cls].append(name)
+                if provider not in self.dependencies[plugin_cls]:
+                    self.dependencies[plugin_cls].append(provider)
+                    self.dependents[provider].append(plugin_cls)
+                if name in requires and provider not in self.required[plugin_cls]:
+                    self.required[plugin_cls].append(provider)
+                    self.requirers[provider].append(plugin_cls)
+
+        self.order = self.sort()
+
+    def sort(self):
+        """
+        Returns the collectors in topological order. Independent collectors
+        keep the order they were given in.
+        """
+
+        remaining = {plugin_cls: len(dependencies)
+                     for plugin_cls, dependencies in self.dependencies.items()}
+        order = []
+
+        while len(order) < len(self.plugin_classes):
+            ready = [plugin_cls for plugin_cls in self.plugin_classes
+                     if remaining.get(plugin_cls) == 0]
+            if not ready:
+                cycle = ', '.join(plugin_cls.__name__ for plugin_cls in remaining)
+                raise DependencyError(f"Circular requirements between {cycle}")
+
+            for plugin_cls in ready:
+                del remaining[plugin_cls]
+                order.append(plugin_cls)
+                for dependent in self.dependents[plugin_cls]:
+                    remaining[dependent] -= 1
+
+        return order
@@ -0,0 +1,354 @@
+"""
+Implements a GitHub GraphQL backend for the MetaCollector.
+
+The REST API needs a request per page of issues, another one per issue to
+list its comments and yet another one per author to learn their company.
+The GraphQL API returns issues together with their first comments and the
+login and company of all the authors in a single paginated query, and can
+fetch several repositories (along with their license) at once.
+"""
+
+import datetime as dt
+import functools
+import json
+import threading
+from dataclasses import dataclass, field
+
+from quenchmark import transport
+from quenchmark.logger import LoggerMixin
+from quenchmark.transport import Request
+
+
+class GraphQLError(Exception):
+    """
+    Raised when the GraphQL API reports an error.
+    """
+    pass
+
+
+@dataclass(frozen=True)
+class User:
+    login: str
+    company: str = None
+    name: str = None
+
+
+@dataclass
+class Comment:
+    user: User
+    created_at: dt.datetime
+
+
+@dataclass
+class Issue:
+    """
+    An issue or a pull request, with its first comments already fetched.
+    Provides the subset of the PyGithub Issue interface the MetaCollector
+    relies upon. If the issue has more comments, remaining fetches them
+    once they are first asked for.
+    """
+
+    number: int
+    created_at: dt.datetime
+    user: User
+    pull_request: bool = False
+    updated_at: dt.datetime = None
+    comments: list = field(default_factory=list)
+    remaining: object = None
+
+    def get_comments(self):
+        if self.remaining is not None:
+            self.comments = self.comments + self.remaining()
+            self.remaining = None
+        return self.comments
+
+
+class IssueListing(object):
+    """
+    The issues and pull requests of a repository, starting with the first
+    page already fetched. The following pages are fetched while the listing
+    is iterated, hence a scan stopping early leaves them unfetched.
+    totalCount is the number of both, as reported along the first page.
+    """
+
+    def __init__(self, backend, owner, name, node):
+        self.backend = backend
+        self.owner = owner
+        self.name = name
+        self.node = node
+        self.totalCount = sum((node.get(connection) or {}).get('totalCount', 0)
+                              for connection in ('issues', 'pullRequests'))
+
+    def __iter__(self):
+        return self.backend.page_issues(self.owner, self.name, self.node)
+
+
+class HTTPTransport(object):
+    """
+    Executes GraphQL queries over HTTP, using the given transport chain
+    (the installed one by default).
+    """
+
+    def __init__(self, chain=None, url='https://api.github.com/graphql', token=None):
+        self.transport = chain or transport.installed or transport.Transport()
+        self.url = url
+        self.token = token
+
+    def __call__(self, query, variables):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'bearer {self.token}'
+
+        body = json.dumps({'query': query, 'variables': variables}).encode('utf-8')
+        response = self.transport.send(Request('POST', self.url, headers, body))
+
+        if response.status != 200:
+            raise GraphQLError(f"HTTP {response.status}: {response.read()}")
+
+        return json.loads(response.body)
+
+
+USER_FIELDS = """
+    login
+    ... on User { company name }
+"""
+
+CONNECTION_FIELDS = """
+    totalCount
+    pageInfo { hasNextPage endCursor }
+    nodes {
+        number
+        createdAt
+        updatedAt
+        author { %(user)s }
+        comments(first: %(comments)d) {
+            pageInfo { hasNextPage endCursor }
+            nodes { createdAt author { %(user)s } }
+        }
+    }
+"""
+
+REPOSITORY_FIELDS = """
+    licenseInfo { spdxId }
+"""
+
+
+class GraphQLBackend(LoggerMixin):
+    """
+    Fetches repository metadata and issue/comment trees using bulk GraphQL
+    queries. The transport is any callable accepting the query and its
+    variables and returning the decoded JSON response.
+
+    Repositories fetched up front (see prefetch) are kept, so that the
+    backend can be shared by the collectors of all the projects. Only their
+    metadata and first page are fetched up front, the following pages are
+    fetched by the collector listing the issues.
+    """
+
+    page_size = 100
+    comments_per_issue = 10
+    repositories_per_query = 5
+
+    def __init__(self, execute):
+        self.execute = execute
+        self.requests = 0
+        self.fetched = {}
+        self.lock = threading.Lock()
+
+    def query(self, query, variables=None):
+        with self.lock:
+            self.requests += 1
+        with self.span('graphql'):
+            result = self.execute(query, variables or {})
+
+        if result.get('errors'):
+            raise GraphQLError('; '.join(error['message'] for error in result['errors']))
+
+        return result['data']
+
+    # Query building
+
+    def repository_fields(self, issues_cursor=None, prs_cursor=None,
+                          issues=True, prs=True, metadata=True):
+        """
+        Returns the selection of repository fields. Connections that were
+        already fully paged can be left out.
+        """
+
+        connection = CONNECTION_FIELDS % {
+            'user': USER_FIELDS,
+            'comments': self.comments_per_issue,
+        }
+
+        fields = [REPOSITORY_FIELDS] if metadata else []
+        if issues:
+            fields.append(f'issues(first: {self.page_size}, '
+                          f'after: {json.dumps(issues_cursor)}) {{ {connection} }}')
+        if prs:
+            fields.append(f'pullRequests(first: {self.page_size}, '
+                          f'after: {json.dumps(prs_cursor)}) {{ {connection} }}')
+
+        return '\n'.join(fields)
+
+    # Parsing
+
+    @staticmethod
+    def parse_date(value):
+        return dt.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+    @staticmethod
+    def parse_user(node):
+        if node is None:
+            # Deleted accounts are reported as the 'ghost' user
+            return User(login='ghost')
+
+        return User(login=node['login'], company=node.get('company'),
+                    name=node.get('name'))
+
+    def parse_comment(self, node):
+        return Comment(user=self.parse_user(node['author']),
+                       created_at=self.parse_date(node['createdAt']))
+
+    def parse_issue(self, node, pull_request, owner=None, name=None):
+        comments = node['comments']
+        page = comments.get('pageInfo') or {}
+        remaining = None
+        if page.get('hasNextPage'):
+            remaining = functools.partial(self.page_comments, owner, name, node['number'],
+                                          pull_request, page['endCursor'])
+
+        return Issue(
+            number=node['number'],
+            created_at=self.parse_date(node['createdAt']),
+            user=self.parse_user(node['author']),
+            pull_request=pull_request,
+            updated_at=self.parse_date(node['updatedAt']) if node.get('updatedAt') else None,
+            comments=[self.parse_comment(comment) for comment in comments['nodes']],
+            remaining=remaining
+        )
+
+    def parse_repository(self, node):
+        return {
+            'license': (node.get('licenseInfo') or {}).get('spdxId'),
+        }
+
+    # Fetching
+
+    def page_issues(self, owner, name, node):
+        """
+        Yields the issues and pull requests of the first page contained in
+        the repository node, and then keeps paging until both connections
+        are exhausted.
+        """
+
+        while True:
+            issues = node.get('issues')
+            prs = node.get('pullRequests')
+
+            for connection, pull_request in ((issues, False), (prs, True)):
+                for issue in (connection or {}).get('nodes', []):
+                    yield self.parse_issue(issue, pull_request, owner, name)
+
+            issues_next = bool(issues) and issues['pageInfo']['hasNextPage']
+            prs_next = bool(prs) and prs['pageInfo']['hasNextPage']
+            if not issues_next and not prs_next:
+                return
+
+            fields = self.repository_fields(
+                issues_cursor=issues['pageInfo']['endCursor'] if issues_next else None,
+                prs_cursor=prs['pageInfo']['endCursor'] if prs_next else None,
+                issues=issues_next,
+                prs=prs_next,
+                metadata=False
+            )
+            node = self.query(
+                'query($owner: String!, $name: String!) {'
+                f' repository(owner: $owner, name: $name) {{ {fields} }} }}',
+                {'owner': owner, 'name': name}
+            )['repository']
+
+    def page_comments(self, owner, name, number, pull_request, cursor):
+        """
+        Returns the comments of the issue or pull request following the
+        given cursor.
+        """
+
+        kind = 'pullRequest' if pull_request else 'issue'
+        comments = []
+        while cursor is not None:
+            connection = self.query(
+                'query($owner: String!, $name: String!, $number: Int!, $cursor: String) {'
+                f' repository(owner: $owner, name: $name) {{ {kind}(number: $number) {{'
+                f' comments(first: {self.page_size}, after: $cursor) {{'
+                ' pageInfo { hasNextPage endCursor }'
+                f' nodes {{ createdAt author {{ {USER_FIELDS} }} }} }} }} }} }}',
+                {'owner': owner, 'name': name, 'number': number, 'cursor': cursor}
+            )['repository'][kind]['comments']
+
+            comments.extend(self.parse_comment(comment) for comment in connection['nodes'])
+            page = connection['pageInfo']
+            cursor = page['endCursor'] if page['hasNextPage'] else None
+
+        return comments
+
+    @staticmethod
+    def key(owner, name):
+        return owner.casefold(), name.casefold()
+
+    def prefetch(self, names):
+        """
+        Fetches the metadata and the first page of issues of the given
+        (owner, name) repositories, several of them per query, and keeps
+        them for metadata and issues.
+        """
+
+        names = list(names)
+        for start in range(0, len(names), self.repositories_per_query):
+            for (owner, name), repository in self.repositories(
+                    names[start:start + self.repositories_per_query]).items():
+                self.fetched[self.key(owner, name)] = repository
+
+    def metadata(self, owner, name):
+        """
+        Returns the prefetched metadata of the repository, along with the
+        listing of its issues, None if it was not prefetched.
+        """
+
+        return self.fetched.get(self.key(owner, name))
+
+    def issues(self, owner, name):
+        """
+        Returns the listing of all issues and pull requests of the
+        repository (see IssueListing).
+        """
+
+        repository = self.metadata(owner, name)
+        if repository is None:
+            repository = self.repositories([(owner, name)])[(owner, name)]
+        return repository['issues']
+
+    def repositories(self, names):
+        """
+        Fetches the metadata and the listings of the issues and pull
+        requests of all the given (owner, name) repositories. The first
+        page of every repository is fetched in a single query, the
+        following ones once the listing is iterated.
+        """
+
+        names = list(names)
+        aliases = ' '.join(
+            f'r{index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)})'
+            f' {{ {self.repository_fields()} }}'
+            for index, (owner, name) in enumerate(names)
+        )
+        data = self.query(f'query {{ {aliases} }}')
+
+        result = {}
+        for index, (owner, name) in enumerate(names):
+            node = data[f'r{index}']
+            result[(owner, name)] = {
+                **self.parse_repository(node),
+                'issues': IssueListing(self, owner, name, node),
+            }
+
+        return result
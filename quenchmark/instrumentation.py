@@ -0,0 +1,187 @@
+"""
+Implements timing spans and counters recorded across the collection run,
+exported as JSON or as a Chrome trace (see chrome://tracing or Perfetto).
+
+Recording is disabled by default. While disabled, a span costs a single
+attribute check, so hot paths can be instrumented unconditionally.
+"""
+
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+
+from quenchmark import context
+
+# Returned by the spans of a disabled recorder, nullcontext is reentrant
+NULL_SPAN = contextlib.nullcontext()
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.001, 0.01, 0.1, 1, 10, 100, float('inf'))
+
+
+@dataclass
+class Span:
+    """
+    A timed section of the run, attributed to the project and collector
+    active when it started.
+    """
+
+    name: str
+    start: float
+    duration: float
+    thread: int
+    project: str = None
+    collector: str = None
+    args: dict = field(default_factory=dict)
+
+
+class Recorder(object):
+    """
+    Collects the spans and counters of the run.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.counters = defaultdict(float)
+
+    def enable(self):
+        self.origin = time.perf_counter()
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def record(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            span = Span(name, start - self.origin, time.perf_counter() - start,
+                        threading.get_ident(), context.current_project.get(),
+                        context.current_collector.get(), args)
+            with self.lock:
+                self.spans.append(span)
+
+    def span(self, name, **args):
+        """
+        Returns a context manager timing the with block.
+        """
+
+        if not self.enabled:
+            return NULL_SPAN
+        return self.record(name, args)
+
+    def count(self, name, value=1):
+        """
+        Adds the value to the counter, for the current project and collector.
+        """
+
+        if not self.enabled:
+            return
+
+        key = (name, context.current_project.get(), context.current_collector.get())
+        with self.lock:
+            self.counters[key] += value
+
+    def totals(self):
+        """
+        Returns the counters summed over the projects and collectors.
+        """
+
+        totals = defaultdict(float)
+        for (name, project, collector), value in self.counters.items():
+            totals[name] += value
+        return dict(totals)
+
+    def histograms(self, attribute):
+        """
+        Returns the span durations per project or per collector (given by
+        the attribute) and span name, as the span count, total time and the
+        number of spans falling into each of the BUCKETS.
+        """
+
+        histograms = {}
+        for span in self.spans:
+            group = histograms.setdefault(getattr(span, attribute) or '-', {})
+            histogram = group.setdefault(span.name, {
+                'count': 0, 'total': 0.0, 'buckets': [0] * len(BUCKETS)
+            })
+            histogram['count'] += 1
+            histogram['total'] += span.duration
+            histogram['buckets'][next(index for index, bound in enumerate(BUCKETS)
+                                      if span.duration <= bound)] += 1
+
+        return histograms
+
+    def summary(self):
+        return {
+            'buckets': [str(bound) for bound in BUCKETS],
+            'counters': self.totals(),
+            'projects': self.histograms('project'),
+            'collectors': self.histograms('collector'),
+            'spans': [asdict(span) for span in self.spans],
+        }
+
+    def chrome_trace(self):
+        """
+        Returns the spans and counters in the Chrome trace event format.
+        """
+
+        pid = os.getpid()
+        events = [
+            {
+                'name': span.name,
+                'cat': span.collector or 'main',
+                'ph': 'X',
+                'ts': span.start * 1e6,
+                'dur': span.duration * 1e6,
+                'pid': pid,
+                'tid': span.thread,
+                'args': {'project': span.project, **span.args},
+            }
+            for span in self.spans
+        ]
+
+        end = max((span.start + span.duration for span in self.spans), default=0.0)
+        events.extend(
+            {'name': name, 'ph': 'C', 'ts': end * 1e6, 'pid': pid, 'args': {name: value}}
+            for name, value in self.totals().items()
+        )
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path, format='chrome'):
+        import json
+
+        data = self.chrome_trace() if format == 'chrome' else self.summary()
+        with open(path, 'w') as f:
+            json.dump(data, f, default=str)
+
+
+# The recorder used by LoggerMixin.span and friends
+recorder = Recorder()
+
+
+def timed(name=None):
+    """
+    Decorates a function to be timed as a span named after it.
+    """
+
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return function(*args, **kwargs)
+            with recorder.record(span_name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
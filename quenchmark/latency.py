@@ -0,0 +1,150 @@
+"""
+Implements the time to first response of Issues and PRs. The stream of
+opened Issues and the stream of comments, both oldest first, are merged
+in a single pass, rather than listing the comments of every Issue. The
+latencies are kept in NumPy arrays, so that the distributions of many
+projects are computed with vectorized operations.
+"""
+
+import datetime as dt
+import heapq
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from quenchmark.contributors import week_start
+
+# Opened Issues come before the comments made at the same time
+OPENED, COMMENTED = range(2)
+
+DAY = 24 * 3600
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Summarizes the latencies of a project in days: the median and the 90th
+    percentile (None if the Issues at that rank were never answered), and
+    the fraction of Issues answered within the given numbers of weeks.
+    """
+
+    issues: int
+    answered: int
+    median: float = None
+    p90: float = None
+    within: dict = field(default_factory=dict)
+
+
+@dataclass
+class ResponseLatencies:
+    """
+    The Issue numbers, the times they were opened (as datetime64) and the
+    seconds until their first response, NaN if they were never answered.
+    """
+
+    numbers: np.ndarray
+    opened: np.ndarray
+    latencies: np.ndarray
+
+    @classmethod
+    def merge(cls, issues, comments, responds):
+        """
+        Computes the first responses from the issues, (created_at, number)
+        pairs, and the comments, (created_at, number, user) triples, both
+        ordered by time. A comment is a response if responds(user) is True,
+        responds is only called for comments on unanswered Issues.
+        """
+
+        events = heapq.merge(
+            ((created_at, OPENED, number, None) for created_at, number in issues),
+            ((created_at, COMMENTED, number, user) for created_at, number, user in comments),
+            key=lambda event: event[:2]
+        )
+
+        numbers, opened, latencies = [], [], []
+        awaiting = {}
+        for created_at, kind, number, user in events:
+            if kind == OPENED:
+                awaiting[number] = len(numbers)
+                numbers.append(number)
+                opened.append(created_at)
+                latencies.append(np.nan)
+            elif number in awaiting and responds(user):
+                index = awaiting.pop(number)
+                latencies[index] = (created_at - opened[index]).total_seconds()
+
+        return cls(np.array(numbers, dtype=np.int64),
+                   np.array([week_start(moment) for moment in opened], dtype='datetime64[s]'),
+                   np.array(latencies, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.numbers)
+
+    @property
+    def answered(self):
+        return ~np.isnan(self.latencies)
+
+    def within(self, delta):
+        """
+        Returns the fraction of Issues answered within the timedelta.
+        """
+
+        if not len(self):
+            return 0.0
+        # comparisons with NaN are False
+        return float(np.mean(self.latencies <= delta.total_seconds()))
+
+    def quantile(self, q):
+        """
+        Returns the q-th quantile of the latencies as a timedelta, None if
+        the Issues at that rank were never answered.
+        """
+
+        if not len(self):
+            return None
+        # unanswered Issues rank last, the quantile is one of the latencies
+        latency = np.quantile(np.nan_to_num(self.latencies, nan=np.inf), q,
+                              method='inverted_cdf')
+        return dt.timedelta(seconds=float(latency)) if np.isfinite(latency) else None
+
+    def ignored(self, weeks=4):
+        """
+        Returns a dictionary mapping the Issue numbers to True if they were
+        not answered within the given number of weeks.
+        """
+
+        within = self.latencies <= dt.timedelta(weeks=weeks).total_seconds()
+        return dict(zip(self.numbers.tolist(), (~within).tolist()))
+
+    def distribution(self, weeks=(1, 4)):
+        """
+        Returns the LatencyDistribution, with the fractions of Issues
+        answered within the given numbers of weeks.
+        """
+
+        def days(delta):
+            return None if delta is None else delta.total_seconds() / DAY
+
+        return LatencyDistribution(
+            issues=len(self),
+            answered=int(self.answered.sum()),
+            median=days(self.quantile(0.5)),
+            p90=days(self.quantile(0.9)),
+            within={week: self.within(dt.timedelta(weeks=week)) for week in weeks},
+        )
+
+
+def rank(distributions, weeks=4):
+    """
+    Returns the names of the projects, given a dictionary mapping them to
+    their LatencyDistribution, most responsive first: by the fraction
+    answered within the given number of weeks, then by the median.
+    """
+
+    names = list(distributions)
+    within = np.array([distributions[name].within.get(weeks, 0.0) for name in names])
+    median = np.array([np.inf if distributions[name].median is None
+                       else distributions[name].median for name in names])
+
+    # lexsort sorts by the last key first
+    return [names[index] for index in np.lexsort((median, -within))]
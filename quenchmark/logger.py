@@ -1,6 +1,145 @@
-import coloredlogs
+"""
+Implements the logging of quenchmark. Records are handed over to a queue
+in the logging thread and written out by a separate writer thread, into
+the rate-limited console and into per-project JSON-lines files.
+"""
+
+import json
 import logging
 import os
+import time
+
+from quenchmark import context, instrumentation
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamps the records with the current project and collector. Runs in the
+    logging thread, before the record is queued, as the context is not
+    visible from the writer thread. Values passed explicitly (as extra) are
+    kept.
+    """
+
+    def filter(self, record):
+        if getattr(record, 'project', None) is None:
+            record.project = context.current_project.get()
+        if getattr(record, 'collector', None) is None:
+            record.collector = context.current_collector.get()
+        return True
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """
+    Formats every record as a compact single-line JSON object.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'project': getattr(record, 'project', None),
+            'collector': getattr(record, 'collector', None),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+
+class RateLimitedHandler(logging.Handler):
+    """
+    Passes the records to the wrapped handler at a sustained rate of rate
+    records per second, allowing bursts of up to burst records (a token
+    bucket). Excess records below WARNING are dropped, their count is
+    reported once records are let through again.
+    """
+
+    def __init__(self, handler, rate=20, burst=100, clock=time.monotonic):
+        super().__init__()
+        self.handler = handler
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+        self.suppressed = 0
+
+    def allow(self, record):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return record.levelno >= logging.WARNING
+
+    def emit(self, record):
+        if not self.allow(record):
+            self.suppressed += 1
+            return
+
+        if self.suppressed:
+            self.handler.handle(logging.makeLogRecord({
+                'name': record.name,
+                'levelno': logging.WARNING,
+                'levelname': logging.getLevelName(logging.WARNING),
+                'msg': f"{self.suppressed} log messages suppressed by "
+                       "the console rate limit",
+            }))
+            self.suppressed = 0
+
+        self.handler.handle(record)
+
+    def close(self):
+        self.handler.close()
+        super().close()
+
+
+class ProjectFileHandler(logging.Handler):
+    """
+    Routes the records into rotating <directory>/<project>.jsonl files, the
+    records not attributed to any project go into <directory>/main.jsonl.
+    Does nothing until the directory is set.
+    """
+
+    def __init__(self, directory=None, max_size=10 * 1024 ** 2, backups=3):
+        super().__init__()
+        self.directory = directory
+        self.max_size = max_size
+        self.backups = backups
+        self.files = {}
+        self.setFormatter(JSONLinesFormatter())
+
+    def file_handler(self, project):
+        name = project or 'main'
+        if name not in self.files:
+            from logging.handlers import RotatingFileHandler
+
+            os.makedirs(self.directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(self.directory, f'{name}.jsonl'),
+                maxBytes=self.max_size,
+                backupCount=self.backups,
+                encoding='utf-8'
+            )
+            handler.setFormatter(self.formatter)
+            self.files[name] = handler
+
+        return self.files[name]
+
+    def emit(self, record):
+        if self.directory is None:
+            return
+        self.file_handler(getattr(record, 'project', None)).handle(record)
+
+    def close(self):
+        for handler in self.files.values():
+            handler.close()
+        self.files.clear()
+        super().close()
 
 
 class LoggerMixin(object):
@@ -8,11 +147,17 @@ class LoggerMixin(object):
     This mixin adds logging capabilities to a class. All clases inheriting
     from this mixin use the 'main' logger unless overriden otherwise.
 
-    LoggerMixin also provides convenient shortcut methods for logging.
+    LoggerMixin also provides convenient shortcut methods for logging, and
+    for timing spans and counters (see quenchmark.instrumentation).
     """
 
     logger = logging.getLogger('main')
 
+    # Set up by setup_logging
+    console = None
+    files = None
+    listener = None
+
     # Define verbosity levels
     verbosity_to_level = {
         -2: logging.ERROR,
@@ -47,13 +192,38 @@ class LoggerMixin(object):
     def critical(cls, message, *args):
         cls.logger.critical(message, *args)
 
+    # Instrumentation, no-ops unless the recorder is enabled
+    @classmethod
+    def span(cls, name, **args):
+        return instrumentation.recorder.span(name, **args)
+
+    @classmethod
+    def count(cls, name, value=1):
+        instrumentation.recorder.count(name, value)
+
+    timed = staticmethod(instrumentation.timed)
+
     # Logging setup related methods
     @classmethod
-    def setup_logging(cls):
+    def setup_logging(cls, console_rate=20, console_burst=100):
         """
-        Perform the default logging setup.
+        Perform the default logging setup. Called by the command line
+        entry point, not at import time, as coloredlogs is slow to import.
+
+        The root logger only puts the records into a queue, the console
+        and the project files are written by the thread of a QueueListener,
+        so that logging never blocks the collectors on I/O.
         """
 
+        import atexit
+        import queue
+        import sys
+        from logging.handlers import QueueHandler, QueueListener
+
+        import coloredlogs
+
+        cls.stop_logging()
+
         # Add custom logging level 'VERBOSE'
         logging.addLevelName(15, "VERBOSE")
 
@@ -69,13 +239,71 @@ class LoggerMixin(object):
 
         field_styles['asctime']['faint'] = True
 
-        coloredlogs.install(
-            level=logging.INFO,
-            fmt='%(asctime)s: %(message)s',
-            datefmt='%d/%m/%Y %H:%M:%S',
-            level_styles=level_styles,
-            field_styles=field_styles
-        )
+        fmt, datefmt = '%(asctime)s: %(message)s', '%d/%m/%Y %H:%M:%S'
+        stream = coloredlogs.StandardErrorHandler()
+        if coloredlogs.terminal_supports_colors(sys.stderr):
+            stream.setFormatter(coloredlogs.ColoredFormatter(
+                fmt=fmt,
+                datefmt=datefmt,
+                level_styles=level_styles,
+                field_styles=field_styles
+            ))
+        else:
+            stream.setFormatter(logging.Formatter(fmt, datefmt))
+
+        LoggerMixin.console = RateLimitedHandler(stream, console_rate, console_burst)
+        # the files get the output of the commands (see ProcessRunner) too
+        cls.console.setLevel(logging.INFO)
+        LoggerMixin.files = ProjectFileHandler()
+
+        handler = QueueHandler(queue.SimpleQueue())
+        handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+
+        LoggerMixin.listener = QueueListener(handler.queue, cls.console, cls.files,
+                                     respect_handler_level=True)
+        cls.listener.queue_handler = handler
+        cls.listener.start()
+        atexit.register(cls.stop_logging)
+
+    @classmethod
+    def configure_logging(cls, directory=None, max_size=10 * 1024 ** 2, backups=3,
+                          console_rate=None, console_burst=None):
+        """
+        Applies the logging section of the configuration file: the
+        directory of the per-project JSON-lines files and the console rate
+        limit.
+        """
+
+        if cls.listener is None:
+            return
+
+        if directory:
+            cls.files.directory = os.path.expanduser(directory)
+            cls.files.max_size = max_size
+            cls.files.backups = backups
+        if console_rate is not None:
+            cls.console.rate = console_rate
+        if console_burst is not None:
+            cls.console.burst = console_burst
+
+    @classmethod
+    def stop_logging(cls):
+        """
+        Writes out the queued records and stops the writer thread.
+        """
+
+        if cls.listener is None:
+            return
+
+        listener, LoggerMixin.listener = cls.listener, None
+        logging.getLogger().removeHandler(listener.queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
 
     @classmethod
     def set_loglevel(cls, level):
@@ -95,10 +323,8 @@ class LoggerMixin(object):
 
         level_value = cls.verbosity_to_level[level]
 
-        coloredlogs.set_level(level_value)
+        logging.getLogger().setLevel(level_value)
+        if cls.console is not None:
+            cls.console.setLevel(level_value)
         cls.info("Setting output logging level to '{}'"
                  .format(logging.getLevelName(level_value)))
-
-
-# Setup logging
-LoggerMixin.setup_logging()
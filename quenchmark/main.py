@@ -1,13 +1,15 @@
-import importlib
+import argparse
 import pprint
 from dataclasses import dataclass
 
-import yaml
-
-import quenchmark.collectors as collectors
+from quenchmark import instrumentation
 from quenchmark.logger import LoggerMixin
 from quenchmark.plugins import Collector
 
+# The modules needed by the collection run only (PyYAML, requests, asyncio,
+# sqlite3, ...) are imported by the methods using them, so that commands
+# which do not collect anything start quickly.
+
 
 @dataclass
 class Project:
@@ -22,59 +24,279 @@ class EntryPoint(LoggerMixin):
     The main class that governs the run of the data collection process.
     """
 
-    def import_plugins(self):
-        for module in collectors.__all__:
-            try:
-                module_id = f"{collectors.__name__}.{module}"
-                importlib.import_module(module_id)
-                self.debug(f"{module_id} loaded successfully.")
-            except Exception as exc:
-                self.important(f"The module {module} could not be loaded: {exc}")
+    def import_plugins(self, selected=None):
+        """
+        Imports the selected collectors (all of them by default), along with
+        the collectors they require.
+        """
 
-    def load_configuration(self):
+        self.plugin_classes = Collector.load(selected)
+        for plugin_cls in self.plugin_classes:
+            self.debug(f"{plugin_cls.__name__} loaded successfully.")
+
+    def list_collectors(self):
+        for identifier, (module, provides) in sorted(Collector.manifest().items()):
+            print(f"{identifier} ({module})")
+
+    def read_configuration(self):
         """
-        Loads configuration from the config file and determines the list of
-        projects.
+        Reads the config file and determines the list of projects.
         """
 
-        config = yaml.load(open('config.yaml', 'r'))
+        import yaml
+
+        with open('config.yaml', 'r') as f:
+            self.config = yaml.safe_load(f)
+
         self.projects = [
             Project(identifier=identifier, **spec)
-            for identifier, spec in config['projects'].items()
+            for identifier, spec in self.config['projects'].items()
         ]
 
-    def collect_data(self):
+    def check_configuration(self):
+        """
+        Checks the config file without importing any collector. Returns True
+        if it is valid.
+        """
+
+        self.read_configuration()
+        manifest = Collector.manifest()
+
+        unknown = set(self.config.get('collectors') or {}) - set(manifest)
+        for identifier in sorted(unknown):
+            self.error(f"Unknown collector '{identifier}' in the configuration")
+
+        valid = not unknown and self.check_engine_configuration()
+        print(f"{len(self.projects)} projects, {len(manifest)} collectors available")
+        return valid
+
+    def check_engine_configuration(self):
+        """
+        Returns True if the heavy collectors leave workers to the others.
+        """
+
+        from quenchmark.engine import ExecutionEngine
+
+        engine_config = self.config.get('engine') or {}
+        workers = engine_config.get('workers') or ExecutionEngine.default_workers
+        limits = {**ExecutionEngine.default_limits, **(engine_config.get('limits') or {})}
+
+        if limits['heavy'] >= workers:
+            self.error(f"The limit of heavy collectors ({limits['heavy']}) must be "
+                       f"below the number of workers ({workers})")
+            return False
+        return True
+
+    def load_configuration(self, resume=False):
+        """
+        Loads configuration from the config file and determines the list of
+        projects. If resume is set, the checkpoints of the previous run are
+        kept and used.
+        """
+
+        from quenchmark import process
+        from quenchmark.checkpoint import CheckpointStore
+        from quenchmark.engine import ExecutionEngine
+        from quenchmark.store import SnapshotStore
+
+        self.read_configuration()
+        config = self.config
+
+        # Only the selected collectors are configured (and imported)
+        for identifier, options in (config.get('collectors') or {}).items():
+            if identifier in Collector.plugins:
+                Collector.get(identifier).configure(**options)
+
+        store_config = config.get('store')
+        self.store = SnapshotStore(**store_config) if store_config else None
+
+        checkpoints_config = config.get('checkpoints')
+        self.checkpoints = CheckpointStore(**checkpoints_config) if checkpoints_config else None
+        if self.checkpoints is not None and not resume:
+            self.checkpoints.clear()
+
+        self.configure_logging(**(config.get('logging') or {}))
+
+        processes_config = config.get('processes')
+        if processes_config:
+            process.install(process.ProcessRunner(**processes_config))
+
+        engine_config = config.get('engine') or {}
+        self.engine = ExecutionEngine(
+            workers=engine_config.get('workers'),
+            limits=engine_config.get('limits'),
+            store=self.store,
+            checkpoints=self.checkpoints,
+            resume=resume
+        )
+
+    def setup_transport(self):
         """
-        Collect data for every project using all available (applicable)
-        collectors.
+        Installs the transport chain used by all the GitHub API requests.
         """
 
-        data = {}
+        from quenchmark import transport
+        from quenchmark.cache import CachingTransport, ResponseCache
+        from quenchmark.ratelimit import RequestScheduler
+
+        # Tokens are secret, hence they live in quenchmark.config and not
+        # in the configuration file
+        try:
+            import quenchmark.config as secrets
+            tokens = getattr(secrets, 'OAUTH_TOKENS', None) or [secrets.OAUTH_TOKEN]
+        except ImportError:
+            tokens = []
 
-        for project in self.projects:
-            project_data = {}
+        self.scheduler = RequestScheduler(
+            transport.Transport(),
+            tokens=[token for token in tokens if token],
+            **(self.config.get('scheduler') or {})
+        )
+        chain = self.scheduler
 
-            for plugin_cls in Collector.plugin_classes:
-                plugin = plugin_cls()
-                new_data = plugin.run(project) or {}
-                if set(data.keys()) & set(new_data.keys()):
-                    raise Exception("Duplicate key")
+        cache_config = self.config.get('cache')
+        if cache_config:
+            cache = ResponseCache(**cache_config)
+            chain = CachingTransport(chain, cache)
+            self.debug(f"Using response cache at {cache.path}")
 
-                project_data.update(new_data)
+        transport.install(chain)
 
-            data[project.identifier] = project_data
+    def collect_data(self):
+        """
+        Collect data for every project using all the selected (applicable)
+        collectors. Projects are processed concurrently, failures are
+        recorded per project in self.failures.
+        """
+
+        # work shared by the projects, e.g. the owners of the repositories
+        for plugin_cls in self.plugin_classes:
+            with self.span('prepare', collector=plugin_cls.__name__):
+                try:
+                    plugin_cls.prepare(self.projects)
+                except Exception as e:
+                    self.important(f"Preparing {plugin_cls.__name__} failed with {e}, "
+                                   "the projects are collected on their own")
+
+        data, self.failures = self.engine.run(
+            self.projects,
+            self.plugin_classes
+        )
 
         return data
 
-    def main(self):
-        self.import_plugins()
-        self.load_configuration()
-        pprint.pprint(self.collect_data())
+    def report_latencies(self, data, weeks=4):
+        """
+        Logs the projects whose response latencies were collected (see the
+        latency option of MetaCollector), most responsive first. Returns
+        their identifiers in that order.
+        """
+
+        collected = {identifier: project_data['meta_response_latency']
+                     for identifier, project_data in data.items()
+                     if project_data.get('meta_response_latency')}
+        if not collected:
+            return []
+
+        # Imported here, quenchmark.latency imports NumPy
+        from quenchmark.latency import LatencyDistribution, rank
+
+        # the weeks are strings once restored from a checkpoint
+        distributions = {
+            identifier: LatencyDistribution(**{
+                **distribution,
+                'within': {int(w): share for w, share in distribution['within'].items()}
+            })
+            for identifier, distribution in collected.items()
+        }
+
+        ranking = rank(distributions, weeks=weeks)
+        self.info(f"Projects by the share of Issues and PRs answered within {weeks} weeks:")
+        for position, identifier in enumerate(ranking, 1):
+            distribution = distributions[identifier]
+            median = ('never' if distribution.median is None
+                      else f'{distribution.median:.1f} days')
+            self.info(f"{position}. {identifier}: {distribution.within.get(weeks, 0.0):.0%} "
+                      f"of {distribution.issues}, median {median}")
+
+        return ranking
+
+    def report_failures(self):
+        for failure in self.failures:
+            self.important(f"{failure.project}: {failure.collector} "
+                           f"failed with {failure.error}")
+
+    def main(self, resume=False, selected=None, trace=None, trace_format='chrome'):
+        """
+        Runs the collection. If trace is given, the timing spans and counters
+        of the run (see quenchmark.instrumentation) are written into it.
+        """
+
+        if trace:
+            instrumentation.recorder.enable()
+
+        try:
+            with self.span('import_plugins'):
+                self.import_plugins(selected)
+            with self.span('load_configuration'):
+                self.load_configuration(resume=resume)
+            self.setup_transport()
+            with self.span('collect_data'):
+                data = self.collect_data()
+            pprint.pprint(data)
+            self.report_latencies(data)
+            self.scheduler.report()
+            self.report_failures()
+        finally:
+            if trace:
+                instrumentation.recorder.export(trace, trace_format)
+                self.info(f"Trace written to {trace}")
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark suite for open-source quantum software projects."
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="resume the previous run, skipping the collectors that "
+             "already finished successfully"
+    )
+    parser.add_argument(
+        '--collectors', metavar='NAME[,NAME...]',
+        help="run the given collectors only (and the collectors they require)"
+    )
+    parser.add_argument(
+        '--trace', metavar='FILE',
+        help="record timing spans and counters of the run into the file"
+    )
+    parser.add_argument(
+        '--trace-format', choices=['chrome', 'json'], default='chrome',
+        help="format of the trace: Chrome trace events (default) or a JSON "
+             "summary with per-project and per-collector histograms"
+    )
+    parser.add_argument(
+        '--list-collectors', action='store_true',
+        help="list the available collectors and exit"
+    )
+    parser.add_argument(
+        '--check-config', action='store_true',
+        help="check the configuration file and exit"
+    )
+    args = parser.parse_args()
+
     ep = EntryPoint()
-    ep.main()
+
+    if args.list_collectors:
+        ep.list_collectors()
+        return
+    if args.check_config:
+        raise SystemExit(0 if ep.check_configuration() else 1)
+
+    LoggerMixin.setup_logging()
+    selected = args.collectors.split(',') if args.collectors else None
+    ep.main(resume=args.resume, selected=selected,
+            trace=args.trace, trace_format=args.trace_format)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,189 @@
+"""
+Implements mining of commit and contributor statistics from local bare git
+mirrors, as an alternative to the (slow and often not yet computed) GitHub
+statistics endpoints.
+"""
+
+import datetime as dt
+import os
+import re
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from quenchmark.instrumentation import timed
+from quenchmark.logger import LoggerMixin
+
+NOREPLY_EMAIL = re.compile(r'^(?:\d+\+)?(?P<login>[^@]+)@users\.noreply\.github\.com$')
+
+# Every commit header starts with a NUL byte, which can not appear in the
+# numstat lines
+LOG_FORMAT = '%x00%H%x09%an%x09%ae%x09%ct'
+
+
+class GitError(Exception):
+    """
+    Raised when a git command fails.
+    """
+    pass
+
+
+@dataclass
+class Commit:
+    sha: str
+    author: str
+    date: dt.datetime
+    additions: int = 0
+    deletions: int = 0
+    login: bool = False
+
+
+@dataclass
+class MirrorStatistics:
+    """
+    Statistics computed in a single pass over the history. The contributors
+    and totals have the same shape as MetaCollector.get_contributors and
+    MetaCollector.get_total_adds_and_dels. Samples maps the authors known by
+    their git name rather than their GitHub login to one of their commits.
+    """
+
+    contributors: list = field(default_factory=list)
+    samples: dict = field(default_factory=dict)
+    totals: dict = field(default_factory=dict)
+    commit_dates: list = field(default_factory=list)
+    head: str = None
+
+    @property
+    def commit_count(self):
+        return len(self.commit_dates)
+
+
+class GitMirror(LoggerMixin):
+    """
+    A bare mirror of a remote repository, kept in the cache directory and
+    updated incrementally.
+    """
+
+    def __init__(self, url, cache_dir='~/.cache/quenchmark/mirrors'):
+        self.url = url
+        name = re.sub(r'[^A-Za-z0-9._-]+', '_', url.split('://')[-1].strip('/'))
+        self.path = os.path.join(os.path.expanduser(cache_dir), f'{name}.git')
+
+    def git(self, *args):
+        child = subprocess.run(
+            ['git', '--git-dir', self.path, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding='utf-8',
+            errors='replace'
+        )
+        if child.returncode != 0:
+            raise GitError(f"git {' '.join(args)} failed: {child.stderr.strip()}")
+        return child.stdout
+
+    @timed('git.sync')
+    def sync(self):
+        """
+        Clones the mirror if it does not exist yet, otherwise fetches the
+        new objects only.
+        """
+
+        if os.path.isdir(self.path):
+            self.debug(f"Updating mirror of {self.url}")
+            self.git('remote', 'update', '--prune')
+        else:
+            self.debug(f"Cloning mirror of {self.url}")
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            child = subprocess.run(
+                ['git', 'clone', '--mirror', '--quiet', self.url, self.path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding='utf-8',
+                errors='replace'
+            )
+            if child.returncode != 0:
+                raise GitError(f"Cloning {self.url} failed: {child.stderr.strip()}")
+
+    @staticmethod
+    def identify(name, email):
+        """
+        Returns the GitHub login of the author if it can be determined from
+        the email address, the author name otherwise.
+        """
+
+        match = NOREPLY_EMAIL.match(email)
+        return match.group('login') if match else name
+
+    def log(self, revision='HEAD'):
+        """
+        Streams the commits reachable from the revision, newest first,
+        including their number of added and deleted lines.
+        """
+
+        child = subprocess.Popen(
+            ['git', '--git-dir', self.path, 'log', '--numstat', '--no-renames',
+             f'--format={LOG_FORMAT}', revision],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding='utf-8',
+            errors='replace'
+        )
+
+        commit = None
+        try:
+            for line in child.stdout:
+                line = line.rstrip('\n')
+
+                if line.startswith('\x00'):
+                    if commit is not None:
+                        yield commit
+                    sha, name, email, timestamp = line[1:].split('\t')
+                    commit = Commit(
+                        sha=sha,
+                        author=self.identify(name, email),
+                        date=dt.datetime.fromtimestamp(int(timestamp), dt.timezone.utc),
+                        login=NOREPLY_EMAIL.match(email) is not None
+                    )
+                elif line and commit is not None:
+                    added, deleted, _ = line.split('\t', 2)
+                    # binary files are reported with '-'
+                    commit.additions += int(added) if added != '-' else 0
+                    commit.deletions += int(deleted) if deleted != '-' else 0
+
+            if commit is not None:
+                yield commit
+        finally:
+            child.stdout.close()
+            if child.wait() != 0 and commit is None:
+                raise GitError(f"git log failed for {self.url}")
+
+    @timed('git.statistics')
+    def statistics(self, revision='HEAD'):
+        """
+        Computes per-author additions, deletions and commit counts, the
+        totals and the commit dates in a single pass over the history.
+        """
+
+        per_author = defaultdict(lambda: {'additions': 0, 'deletions': 0, 'commits': 0})
+        stats = MirrorStatistics(totals={'additions': 0, 'deletions': 0})
+
+        for commit in self.log(revision):
+            if stats.head is None:
+                stats.head = commit.sha
+
+            author = per_author[commit.author]
+            author['additions'] += commit.additions
+            author['deletions'] += commit.deletions
+            author['commits'] += 1
+            if not commit.login:
+                stats.samples.setdefault(commit.author, commit.sha)
+
+            stats.totals['additions'] += commit.additions
+            # GitHub reports the total deletions as a negative number
+            stats.totals['deletions'] -= commit.deletions
+            stats.commit_dates.append(commit.date)
+
+        stats.contributors = [
+            {'name': name, **counts} for name, counts in per_author.items()
+        ]
+        return stats
@@ -0,0 +1,119 @@
+"""
+Implements resolving the owners of the repositories once per run. Projects
+sharing an owner (e.g. the four dwavesystems repositories) share its
+profile and, for organizations, the logins of its members.
+"""
+
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import github
+
+from quenchmark.logger import LoggerMixin
+from quenchmark.pagination import paginate
+
+
+def owner_login(repo_url):
+    return repo_url.rstrip('/').split('/')[-2]
+
+
+def group_by_owner(projects):
+    """
+    Returns the projects grouped by the owner of their repository. Logins
+    are case insensitive.
+    """
+
+    groups = defaultdict(list)
+    for project in projects:
+        groups[owner_login(project.repo_url).casefold()].append(project)
+    return dict(groups)
+
+
+@dataclass
+class Owner:
+    """
+    The resolved owner of repositories. Members are the logins of the
+    members of the organization visible to the token, empty for users.
+    """
+
+    login: str
+    user: object
+    members: frozenset = field(default_factory=frozenset)
+
+
+class OwnerDirectory(LoggerMixin):
+    """
+    Resolves every owner once, however many projects of the owner are
+    collected and from however many threads.
+    """
+
+    def __init__(self):
+        self.owners = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def resolve(self, client, login):
+        """
+        Returns the Owner of the given login, looking it up using the given
+        github.Github client on first use. Concurrent callers asking for the
+        same owner wait for a single lookup.
+        """
+
+        key = login.casefold()
+        with self.lock:
+            if key in self.owners:
+                return self.owners[key]
+            pending = self.pending.setdefault(key, threading.Lock())
+
+        with pending:
+            if key not in self.owners:
+                self.owners[key] = self.lookup(client, login)
+            return self.owners[key]
+
+    def lookup(self, client, login):
+        with self.span('owner', owner=login):
+            # adding @ ensures finding users exactly
+            user = client.search_users('@' + login)[0]
+            self.count('owners_resolved')
+
+            # completes the profile once, for all the projects of the owner
+            user.name
+
+            members = frozenset()
+            if user.type == 'Organization':
+                try:
+                    members = frozenset(member.login for member in paginate(
+                        client.get_organization(user.login).get_members()
+                    ))
+                except github.GithubException as e:
+                    self.important(f"Could not list the members of {user.login}: {e}")
+
+        return Owner(user.login, user, members)
+
+    def prefetch(self, client, logins, workers=8):
+        """
+        Resolves the given owners concurrently.
+        """
+
+        logins = list({login.casefold(): login for login in logins}.values())
+        if not logins:
+            return
+
+        with ThreadPoolExecutor(min(workers, len(logins)),
+                                thread_name_prefix='quenchmark-owners') as pool:
+            list(pool.map(lambda login: self.resolve(client, login), logins))
+
+
+# The directory shared by the MetaCollector instances
+directory = OwnerDirectory()
+
+
+def install(instance):
+    """
+    Makes the given directory the one shared by the MetaCollector instances.
+    """
+
+    global directory
+    directory = instance
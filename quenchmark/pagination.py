@@ -0,0 +1,102 @@
+"""
+Implements fetching the pages of paginated GitHub listings concurrently.
+PyGithub fetches the next page of a listing once the previous one is
+consumed, hence a listing of n pages takes n round trips. The number of
+the last page is known from the Link header of the first page, so the
+following pages are fetched ahead of the consumer, a bounded number at a
+time, and their items are yielded in order.
+"""
+
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from github.GithubObject import GithubObject
+from github.PaginatedList import PaginatedList
+
+from quenchmark.logger import LoggerMixin
+from quenchmark.ratelimit import PREFETCH_PRIORITY, priority
+
+
+def last_page(link):
+    """
+    Returns the number of the last page given the Link header of a page,
+    None if it links no last page.
+    """
+
+    for part in (link or '').split(','):
+        url, _, parameters = part.partition(';')
+        if 'rel="last"' in parameters:
+            page = parse_qs(urlsplit(url.strip().strip('<>')).query).get('page')
+            return int(page[0]) if page else None
+    return None
+
+
+class PagePrefetcher(LoggerMixin):
+    """
+    Iterates over a REST PaginatedList, fetching up to concurrency pages
+    ahead of the consumer. Pages not consumed by then are wasted when the
+    consumer stops early, at most concurrency of them. The pages fetched
+    ahead are requested with PREFETCH_PRIORITY, so that they do not delay
+    the requests which are needed right away.
+    """
+
+    def __init__(self, listing, concurrency=4):
+        self.listing = listing
+        self.concurrency = concurrency
+
+    @property
+    def totalCount(self):
+        return self.listing.totalCount
+
+    def __iter__(self):
+        first = self.listing.get_page(0)
+        if not first:
+            return
+
+        # the headers of the page the item was listed in, the raw_headers of
+        # completable objects would fetch the item itself
+        headers = GithubObject.raw_headers.fget(first[0])
+        link = next((value for key, value in headers.items() if key.lower() == 'link'), None)
+        pages = iter(range(1, last_page(link) or 1))
+
+        executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix='quenchmark-pages')
+        pending = deque()
+
+        def fetch(page):
+            with priority(PREFETCH_PRIORITY):
+                return self.listing.get_page(page)
+
+        def prefetch():
+            page = next(pages, None)
+            if page is not None:
+                # runs on behalf of the current project and collector
+                pending.append(executor.submit(
+                    contextvars.copy_context().run, fetch, page
+                ))
+
+        try:
+            for _ in range(self.concurrency):
+                prefetch()
+            yield from first
+
+            while pending:
+                items = pending.popleft().result()
+                self.count('pages_prefetched')
+                prefetch()
+                yield from items
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def paginate(listing, concurrency=4):
+    """
+    Returns the listing with its pages fetched concurrently, if it is a
+    REST PaginatedList, other listings (lists, GraphQL listings) are
+    returned unchanged.
+    """
+
+    if isinstance(listing, PaginatedList) and listing.is_rest and concurrency > 1:
+        return PagePrefetcher(listing, concurrency)
+    return listing
@@ -0,0 +1,302 @@
+"""
+Implements the pipeline building the Docker images of the projects and
+running their test-suites concurrently, within a CPU and memory budget.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from quenchmark.logger import LoggerMixin
+from quenchmark.transport import Request, Transport
+from quenchmark.utils import run
+
+SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+# Files added to the image from the build context
+LOCAL_SOURCE = re.compile(r'^\s*(?:ADD|COPY)\s+(?P<source>\S+)\s', re.M)
+
+# Dependency files of the upstream project, fetched by the pipeline
+DEPENDENCY_SOURCE = re.compile(
+    r'^\s*COPY\s+dockerfiles/deps/(?P<identifier>[^/\s]+)/(?P<path>\S+)\s', re.M
+)
+
+
+def parse_size(size):
+    """
+    Parses a size in the format used by Docker ('512m', '2g') into bytes.
+    """
+
+    if isinstance(size, int):
+        return size
+
+    match = re.match(r'^(\d+(?:\.\d+)?)\s*([kmg]?)b?$', str(size).strip().lower())
+    if match is None:
+        raise ValueError(f"Invalid size: '{size}'")
+
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+class DockerError(Exception):
+    """
+    Raised when a Docker command fails.
+    """
+    pass
+
+
+class ResourceBudget(object):
+    """
+    A pool of CPUs and memory shared by the running test containers.
+    """
+
+    def __init__(self, cpus, memory):
+        self.total_cpus = self.cpus = cpus
+        self.total_memory = self.memory = memory
+        self.condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def reserve(self, cpus, memory):
+        """
+        Blocks until the requested resources are available and holds them
+        for the duration of the with block. Requests larger than the whole
+        budget are clamped, so that they can eventually run alone.
+        """
+
+        cpus, memory = min(cpus, self.total_cpus), min(memory, self.total_memory)
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.cpus >= cpus and self.memory >= memory)
+            self.cpus -= cpus
+            self.memory -= memory
+
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.cpus += cpus
+                self.memory += memory
+                self.condition.notify_all()
+
+
+class DockerPipeline(LoggerMixin):
+    """
+    Builds images and runs the test containers. Builds are limited by the
+    number of build slots, test containers by the resource budget, so the
+    build stage of one project overlaps with the test stage of the others.
+
+    Every test run writes its reports into its own directory, so that
+    concurrently running containers never overwrite each other's reports.
+
+    Images are tagged by the hash of their Dockerfile (and the local files
+    it adds) and the upstream HEAD commit, and are only built if no such
+    image exists yet. Stale images are removed to keep within the disk
+    budget.
+
+    The output of the builds and test runs is streamed into the log, see
+    quenchmark.process.
+    """
+
+    def __init__(self, build_slots=2, cpus=None, memory='8g',
+                 container_cpus=2, container_memory='2g',
+                 reports='/tmp/quenchmark/reports', disk_budget='20g',
+                 raw_url='https://raw.githubusercontent.com',
+                 build_timeout=3600, test_timeout=3600):
+        self.build_timeout = build_timeout
+        self.test_timeout = test_timeout
+        self.disk_budget = parse_size(disk_budget)
+        self.raw_url = raw_url
+        self.transport = Transport()
+        self.garbage_lock = threading.Lock()
+        self.in_use = set()
+        self.build_slots = threading.BoundedSemaphore(build_slots)
+        self.budget = ResourceBudget(cpus or os.cpu_count() or 1, parse_size(memory))
+        self.container_cpus = container_cpus
+        self.container_memory = parse_size(container_memory)
+        self.reports = reports
+
+    @staticmethod
+    def repository(project):
+        return f'qosstest_{project.identifier}'.lower()
+
+    @staticmethod
+    def upstream_head(project):
+        """
+        Returns the SHA of the HEAD commit of the upstream repository.
+        """
+
+        stdout, stderr, returncode = run(['git', 'ls-remote', project.repo_url, 'HEAD'],
+                                         timeout=60)
+        if returncode != 0 or not stdout.strip():
+            raise DockerError(f"Could not determine the HEAD of {project.repo_url}: "
+                              f"{stderr.strip()}")
+
+        return stdout.split()[0]
+
+    @staticmethod
+    def fingerprint(project):
+        """
+        Returns the hash of the Dockerfile and the local files it adds. The
+        fetched dependency files are covered by the upstream commit.
+        """
+
+        digest = hashlib.sha256()
+        with open(project.dockerfile, 'rb') as f:
+            content = f.read()
+        digest.update(content)
+
+        for match in LOCAL_SOURCE.finditer(content.decode('utf-8')):
+            source = match.group('source')
+            if source.startswith('dockerfiles/deps/') or not os.path.isfile(source):
+                continue
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+
+        return digest.hexdigest()
+
+    def image(self, project, upstream):
+        return f'{self.repository(project)}:{self.fingerprint(project)[:12]}-{upstream[:12]}'
+
+    @staticmethod
+    def image_exists(image):
+        return run(['docker', 'image', 'inspect', image])[2] == 0
+
+    def fetch_dependencies(self, project, upstream):
+        """
+        Fetches the dependency files the Dockerfile copies from
+        dockerfiles/deps/<identifier>/, as of the upstream commit. Docker
+        caches COPY instructions by the content of the copied files, hence
+        the dependency layer is only rebuilt when the dependencies change.
+        """
+
+        owner, name = project.repo_url.rstrip('/').split('/')[-2:]
+        with open(project.dockerfile) as f:
+            content = f.read()
+
+        for match in DEPENDENCY_SOURCE.finditer(content):
+            path = match.group('path')
+            self.count('dependency_files')
+            response = self.transport.send(Request(
+                'GET', f'{self.raw_url}/{owner}/{name}/{upstream}/{path}'
+            ))
+            if response.status != 200:
+                raise DockerError(f"Could not fetch {path} of {project.repo_url}: "
+                                  f"HTTP {response.status}")
+
+            target = os.path.join('dockerfiles', 'deps', match.group('identifier'), path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(response.body)
+
+    def build(self, project, upstream=None):
+        """
+        Builds the image of the project at the given upstream commit (the
+        current HEAD if not given), unless it exists already. Returns its
+        tag.
+        """
+
+        upstream = upstream or self.upstream_head(project)
+        image = self.image(project, upstream)
+        self.in_use.add(image)
+
+        if self.image_exists(image):
+            self.info(f"Reusing {image}")
+            return image
+
+        self.fetch_dependencies(project, upstream)
+
+        with self.build_slots, self.span('docker.build', image=image):
+            self.info(f"Building {image}")
+            stdout, stderr, returncode = run([
+              'docker', 'build',
+              '-t', image,
+              '--label', f'quenchmark.project={project.identifier}',
+              '--build-arg', f'UPSTREAM_SHA={upstream}',
+              '-f', project.dockerfile,
+              '.'
+            ], timeout=self.build_timeout)
+
+        if returncode != 0:
+            raise DockerError(f"Building {image} failed: {stderr.strip()[-500:]}")
+
+        self.collect_garbage()
+        return image
+
+    def collect_garbage(self):
+        """
+        Removes the oldest qosstest_* images not used by this run until
+        their total size fits into the disk budget. Layers shared between
+        images are counted repeatedly, so the estimate errs on the safe side.
+        """
+
+        with self.garbage_lock:
+            stdout, stderr, returncode = run([
+                'docker', 'images', '--filter', 'reference=qosstest_*',
+                '--format', '{{.Repository}}:{{.Tag}}'
+            ])
+            images = [image for image in stdout.split() if not image.endswith(':<none>')]
+            if returncode != 0 or not images:
+                return
+
+            stdout, stderr, returncode = run([
+                'docker', 'image', 'inspect', '--format', '{{.Size}} {{.Created}}', *images
+            ])
+            if returncode != 0:
+                return
+
+            entries = sorted(
+                (line.split()[1], image, int(line.split()[0]))
+                for image, line in zip(images, stdout.splitlines())
+            )
+            total = sum(size for created, image, size in entries)
+
+            for created, image, size in entries:
+                if total <= self.disk_budget:
+                    break
+                if image in self.in_use:
+                    continue
+
+                self.info(f"Removing stale image {image}")
+                if run(['docker', 'rmi', image])[2] == 0:
+                    total -= size
+
+    @contextlib.contextmanager
+    def report_directory(self, project):
+        """
+        Creates a report directory dedicated to a single test run, removed
+        once the with block is left.
+        """
+
+        os.makedirs(self.reports, exist_ok=True)
+        directory = tempfile.mkdtemp(prefix=f'{project.identifier}-', dir=self.reports)
+
+        try:
+            yield directory
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test(self, project, image, reports):
+        """
+        Runs the test container of the project, mounting the given report
+        directory. Returns the exit code of the test-suite.
+        """
+
+        with self.budget.reserve(self.container_cpus, self.container_memory), \
+             self.span('docker.run', image=image):
+            self.info(f"Testing {image}")
+            stdout, stderr, returncode = run([
+              'docker',
+              'run',
+              '--rm',
+              '--network=host',
+              '--cpus', self.container_cpus,
+              '--memory', self.container_memory,
+              '-v', f'{reports}:/reports/:rw',
+              '--security-opt', 'label=type:container_runtime_t',
+              image,
+            ], timeout=self.test_timeout)
+
+        return returncode
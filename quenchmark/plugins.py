@@ -1,3 +1,7 @@
+import importlib
+import threading
+
+from quenchmark.collectors import ENTRY_POINT_GROUP, MANIFEST
 from quenchmark.logger import LoggerMixin
 from quenchmark.utils import classproperty
 
@@ -9,6 +13,30 @@ class NoSuchPlugin(Exception):
     pass
 
 
+class Artifact(object):
+    """
+    A value published by a collector for the collectors requiring it. The
+    value may be given lazily, as a function computing it on first use.
+
+    The fingerprint identifies the version of the value (e.g. the commit it
+    was computed at), None if unknown.
+    """
+
+    def __init__(self, value=None, fingerprint=None, load=None):
+        self.fingerprint = fingerprint
+        self.loaded = value
+        self.load = load
+        self.lock = threading.Lock()
+
+    @property
+    def value(self):
+        with self.lock:
+            if self.load is not None:
+                self.loaded = self.load()
+                self.load = None
+            return self.loaded
+
+
 class PluginMount(type):
 
     def __init__(cls, name, bases, attrs):
@@ -25,10 +53,148 @@ class Collector(LoggerMixin, metaclass=PluginMount):
     Serves as a base class for all collector classes.
     """
 
+    # Collectors in the same group share a concurrency limit, see
+    # quenchmark.engine.ExecutionEngine
+    concurrency_group = 'io'
+
+    # Options given in the 'collectors' section of the configuration file
+    options = {}
+
+    # The snapshot taken by the previous run (see quenchmark.store), set by
+    # the engine before the collector is run
+    previous = None
+
+    # Names of the artifacts the collector publishes, the ones it needs and
+    # the ones it uses if the collectors run provide them (the collectors
+    # providing them are not loaded for it), see quenchmark.graph.DependencyGraph
+    provides = ()
+    requires = ()
+    uses = ()
+
+    # The required and used artifacts, set by the engine before the
+    # collector is run
+    artifacts = {}
+
+    # The artifacts published by the collector
+    published = None
+
+    @classmethod
+    def configure(cls, **options):
+        cls.options = options
+
+    @classmethod
+    def prepare(cls, projects):
+        """
+        Called once before the projects are collected, for the work shared
+        by several projects. Does nothing by default.
+        """
+        pass
+
+    def publish(self, name, value=None, fingerprint=None, load=None):
+        """
+        Publishes the artifact for the collectors requiring it. Every name
+        listed in provides needs to be published by the end of the run.
+        """
+
+        if self.published is None:
+            self.published = {}
+        self.published[name] = Artifact(value, fingerprint, load)
+
+    def artifact(self, name):
+        return self.artifacts[name].value
+
+    def fingerprint(self, project):
+        """
+        Returns a digest of the inputs of the collector, None if they are not
+        known. A collector whose inputs did not change since the previous run
+        is not run again, its previous data are used instead.
+
+        By default, the inputs are the required artifacts. Collectors without
+        requirements are always run, collectors depending on anything else
+        than their requirements need to extend the digest.
+        """
+
+        import hashlib
+
+        fingerprints = [self.artifacts[name].fingerprint for name in self.requires]
+        if not fingerprints or None in fingerprints:
+            return None
+
+        return hashlib.sha256('\0'.join(fingerprints).encode('utf-8')).hexdigest()
+
+    def snapshot(self, project, data):
+        """
+        Returns the snapshot of the collected data to be stored. Collectors
+        supporting incremental collection add their high water marks and
+        state here.
+        """
+
+        from quenchmark.store import Snapshot
+
+        return Snapshot(project.identifier, type(self).__name__, data)
+
+    @classmethod
+    def manifest(cls):
+        """
+        Returns a dictionary mapping the names of the available collectors to
+        the (module, provides) tuples, without importing any of them. The
+        artifacts provided by collectors registered using entry points are
+        not known until they are imported.
+        """
+
+        # Imported here, importlib.metadata is slow to import
+        from importlib.metadata import entry_points
+
+        manifest = dict(MANIFEST)
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            manifest.setdefault(entry_point.name, (entry_point.module, None))
+
+        return manifest
+
+    @classmethod
+    def load(cls, identifiers=None):
+        """
+        Imports the given collectors (all the available ones by default),
+        along with the collectors providing the artifacts they require.
+        Returns the list of the loaded plugin classes. Modules which can not
+        be imported are reported and skipped.
+        """
+
+        manifest = cls.manifest()
+        queue = list(manifest) if identifiers is None else list(identifiers)
+        seen = set()
+        loaded = []
+
+        while queue:
+            identifier = queue.pop(0)
+            if identifier in seen:
+                continue
+            if identifier not in manifest:
+                raise NoSuchPlugin(f"Plugin '{identifier}' is not available")
+            seen.add(identifier)
+
+            try:
+                plugin_cls = cls.get(identifier)
+            except Exception as exc:
+                cls.important(f"The module {manifest[identifier][0]} could not be loaded: {exc}")
+                continue
+
+            loaded.append(plugin_cls)
+
+            provided = {name for plugin in loaded for name in plugin.provides}
+            for name in plugin_cls.requires:
+                if name in provided:
+                    continue
+                providers = [provider for provider, (module, provides) in manifest.items()
+                             if provides is None or name in provides]
+                queue.extend(providers)
+
+        return loaded
+
     @classproperty
     def plugins(cls):
         """
-        Returns a dictionary of Protocol plugins discovered.
+        Returns a dictionary of Protocol plugins imported so far.
         """
 
         return {
@@ -39,10 +205,17 @@ class Collector(LoggerMixin, metaclass=PluginMount):
     @classmethod
     def get(cls, identifier):
         """
-        Returns a plugin class corresponding to the given identifier. Raises
-        NoSuchPlugin exception if none was found.
+        Returns a plugin class corresponding to the given identifier, importing
+        its module if necessary. Raises NoSuchPlugin exception if none was
+        found.
         """
 
+        if identifier not in cls.plugins:
+            module = cls.manifest().get(identifier, (None,))[0]
+            if module is None:
+                raise NoSuchPlugin(f"Plugin '{identifier}' is not available")
+            importlib.import_module(module)
+
         try:
             return cls.plugins[identifier]
         except KeyError:
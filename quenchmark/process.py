@@ -0,0 +1,208 @@
+"""
+Implements running external commands on a shared asyncio event loop. The
+output of the commands is streamed line by line into the log (and the log
+file of the project), only a bounded tail of it is kept in memory.
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import signal
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from quenchmark import context
+from quenchmark.logger import LoggerMixin
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ProcessTimeout(Exception):
+    """
+    Raised when a command does not finish within its timeout.
+    """
+    pass
+
+
+@dataclass
+class Result:
+    """
+    The outcome of a command. Unpacks into (stdout, stderr, returncode) like
+    the tuples returned by utils.run used to.
+    """
+
+    stdout: str
+    stderr: str
+    returncode: int
+    truncated: bool = False
+
+    def __iter__(self):
+        return iter((self.stdout, self.stderr, self.returncode))
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+
+class OutputBuffer(object):
+    """
+    Keeps the last lines of a stream, up to the given number of characters.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.lines = deque()
+        self.size = 0
+        self.truncated = False
+
+    def append(self, line):
+        self.lines.append(line)
+        self.size += len(line)
+
+        while self.size > self.limit and self.lines:
+            self.size -= len(self.lines.popleft())
+            self.truncated = True
+
+    def __str__(self):
+        return ''.join(self.lines)
+
+
+class ProcessRunner(LoggerMixin):
+    """
+    Runs commands as asyncio subprocesses on an event loop living in its own
+    thread, hence any number of commands can run at once without a thread
+    per child. Every command is started in its own process group, which is
+    killed as a whole on timeout or cancellation.
+
+    The output of the commands goes through the queued logging (see
+    LoggerMixin.setup_logging), into the file of the project they run on
+    behalf of, whatever the verbosity of the console.
+    """
+
+    output = logging.getLogger('main.process')
+    output.setLevel(15)
+
+    def __init__(self, max_buffer=1024 ** 2):
+        self.max_buffer = max_buffer
+        self.lock = threading.Lock()
+        self.loop = None
+
+    def event_loop(self):
+        """
+        Returns the event loop of the runner, starting it on first use.
+        """
+
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, daemon=True,
+                                 name='quenchmark-processes').start()
+            return self.loop
+
+    async def pump(self, stream, buffer, emit, encoding):
+        """
+        Reads the stream until its end, passing every line to emit and
+        keeping the tail of the output in the buffer. Overlong lines are
+        split rather than held in memory.
+        """
+
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        pending = ''
+
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            pending += decoder.decode(chunk, final=not chunk)
+
+            *lines, pending = pending.split('\n')
+            if len(pending) > self.max_buffer or (not chunk and pending):
+                lines.append(pending)
+                pending = ''
+
+            for line in lines:
+                buffer.append(line + '\n')
+                emit(line)
+
+            if not chunk:
+                return
+
+    @staticmethod
+    def kill(process):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    async def execute(self, args, timeout=None, project=None, encoding='utf-8'):
+        """
+        Runs the command and returns its Result. Raises ProcessTimeout if it
+        does not finish within timeout seconds.
+        """
+
+        args = [str(arg) for arg in args]
+        name = os.path.basename(args[0])
+
+        def emit(line):
+            # The event loop thread has no current project, hence it is
+            # passed explicitly for the routing into the project file
+            self.output.log(15, f"[{project or '-'}] {name}: {line}",
+                            extra={'project': project})
+
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+
+        stdout, stderr = OutputBuffer(self.max_buffer), OutputBuffer(self.max_buffer)
+        try:
+            await asyncio.wait_for(asyncio.gather(
+                self.pump(process.stdout, stdout, emit, encoding),
+                self.pump(process.stderr, stderr, emit, encoding),
+                process.wait()
+            ), timeout)
+        except asyncio.TimeoutError:
+            self.kill(process)
+            await process.wait()
+            raise ProcessTimeout(f"{' '.join(args)} did not finish within {timeout}s")
+        except BaseException:
+            self.kill(process)
+            await process.wait()
+            raise
+
+        return Result(str(stdout), str(stderr), process.returncode,
+                      stdout.truncated or stderr.truncated)
+
+    def run(self, args, timeout=None, encoding='utf-8'):
+        """
+        Runs the command on the event loop of the runner and blocks until it
+        finishes. The output is logged on behalf of the current project.
+        """
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.execute(args, timeout, context.current_project.get(), encoding),
+            self.event_loop()
+        )
+
+        try:
+            with self.span('process', command=os.path.basename(str(args[0]))):
+                return future.result()
+        except BaseException:
+            # Cancels the command if the waiting thread is interrupted
+            future.cancel()
+            raise
+
+
+# The runner used by utils.run
+runner = ProcessRunner()
+
+
+def install(instance):
+    """
+    Makes the given runner the one used by utils.run.
+    """
+
+    global runner
+    runner = instance
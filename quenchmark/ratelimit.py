@@ -0,0 +1,260 @@
+"""
+Implements the process-wide, rate-limit aware scheduler of GitHub API
+requests.
+"""
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from quenchmark import context
+from quenchmark.transport import TransportWrapper
+
+# Repository and criteria requests are dispatched first, then the comments
+# of single Issues, then the pages fetched ahead of their consumer
+DEFAULT_PRIORITY = 10
+SCAN_PRIORITY = 20
+PREFETCH_PRIORITY = 30
+
+current_priority = contextvars.ContextVar('current_priority', default=DEFAULT_PRIORITY)
+
+
+def priority(value):
+    """
+    Requests issued within the with block are scheduled with the given
+    priority. Lower values are dispatched first.
+    """
+
+    return context.activate(current_priority, value)
+
+
+@dataclass
+class TokenBudget:
+    """
+    Tracks the remaining quota of a single OAuth token.
+    """
+
+    token: str
+    limit: int = 5000
+    remaining: int = 5000
+    reset_at: float = 0.0
+
+    def available(self, now):
+        return self.remaining > 0 or now >= self.reset_at
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request could not be completed within the allowed number of
+    retries due to rate limiting.
+    """
+    pass
+
+
+class RequestScheduler(TransportWrapper):
+    """
+    Dispatches requests in priority order while keeping track of the quota
+    of all the configured tokens, as reported by the X-RateLimit-* headers.
+
+    Once the remaining quota of a token drops below a fraction of its limit,
+    requests are paced so that the rest of the budget is spread until the
+    reset time. Secondary rate limits are handled by backing off and
+    retrying. Quota usage is accounted for per project (see
+    quenchmark.context).
+    """
+
+    pace_below = 0.2
+    default_backoff = 60
+
+    def __init__(self, inner, tokens=None, max_in_flight=8, min_interval=0.0,
+                 max_retries=5, clock=time.time, sleep=time.sleep):
+        super().__init__(inner)
+        self.budgets = [TokenBudget(token) for token in tokens or []]
+        self.max_in_flight = max_in_flight
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+
+        self.condition = threading.Condition()
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.in_flight = 0
+        self.next_slot = 0.0
+        self.usage = defaultdict(lambda: {'requests': 0, 'quota': 0})
+
+    # Dispatching
+
+    def pick_budget(self, now):
+        """
+        Returns the budget of the token with the most quota left, None if no
+        tokens are configured. Returns False if all tokens are exhausted.
+        """
+
+        if not self.budgets:
+            return None
+
+        available = [budget for budget in self.budgets if budget.available(now)]
+        if not available:
+            return False
+
+        return max(available, key=lambda budget: (
+            budget.limit if now >= budget.reset_at else budget.remaining
+        ))
+
+    def interval(self, budget, now):
+        """
+        Returns the minimal delay between two consecutive dispatches.
+        """
+
+        if not budget or now >= budget.reset_at:
+            return self.min_interval
+
+        if budget.remaining < budget.limit * self.pace_below:
+            return max(self.min_interval,
+                       (budget.reset_at - now) / max(budget.remaining, 1))
+
+        return self.min_interval
+
+    def acquire(self):
+        """
+        Waits until the calling request may be dispatched. Returns the budget
+        of the token the request should use.
+        """
+
+        ticket = (current_priority.get(), next(self.sequence))
+
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+
+            while True:
+                if self.waiting[0] == ticket and self.in_flight < self.max_in_flight:
+                    now = self.clock()
+                    budget = self.pick_budget(now)
+
+                    if budget is False:
+                        delay = min(b.reset_at for b in self.budgets) - now
+                    else:
+                        delay = self.next_slot - now
+
+                    if delay <= 0:
+                        heapq.heappop(self.waiting)
+                        self.in_flight += 1
+                        self.next_slot = now + self.interval(budget, now)
+                        if budget:
+                            budget.remaining -= 1
+                        self.condition.notify_all()
+                        return budget
+
+                    # Sleep outside of the condition, so that the clock used in
+                    # tests can advance, then re-check
+                    self.condition.release()
+                    try:
+                        self.sleep(delay)
+                    finally:
+                        self.condition.acquire()
+                else:
+                    self.condition.wait()
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self):
+        budget = self.acquire()
+        try:
+            yield budget
+        finally:
+            self.release()
+
+    # Accounting
+
+    def update(self, budget, response):
+        """
+        Updates the budget of the token using the rate limit headers.
+        """
+
+        headers = response.headers
+        if budget is None or 'x-ratelimit-remaining' not in headers:
+            return
+
+        with self.condition:
+            budget.limit = int(headers.get('x-ratelimit-limit', budget.limit))
+            budget.remaining = int(headers['x-ratelimit-remaining'])
+            budget.reset_at = float(headers.get('x-ratelimit-reset', budget.reset_at))
+
+    def account(self, response):
+        with self.condition:
+            project_usage = self.usage[context.current_project.get()]
+            project_usage['requests'] += 1
+
+            # Conditional requests answered with 304 are free
+            if response.status != 304:
+                project_usage['quota'] += 1
+
+    def backoff(self, response, attempt):
+        """
+        Returns the number of seconds to wait before retrying the request, or
+        None if the response is not rate limited.
+        """
+
+        if response.status not in (403, 429):
+            return None
+
+        headers = response.headers
+        if 'retry-after' in headers:
+            return float(headers['retry-after'])
+
+        if headers.get('x-ratelimit-remaining') == '0':
+            # Primary limit hit, acquire() waits for a token with quota left
+            if self.budgets:
+                return 0.0
+            return max(float(headers.get('x-ratelimit-reset', 0)) - self.clock(), 0.0)
+
+        if b'secondary rate limit' in response.body.lower() or response.status == 429:
+            return self.default_backoff * 2 ** attempt
+
+        return None
+
+    # Transport interface
+
+    def send(self, request):
+        for attempt in range(self.max_retries + 1):
+            with self.slot() as budget:
+                if budget:
+                    request.headers['Authorization'] = f'token {budget.token}'
+                response = self.inner.send(request)
+
+            self.count('api_calls')
+            self.update(budget, response)
+            self.account(response)
+
+            delay = self.backoff(response, attempt)
+            if delay is None:
+                return response
+
+            self.important(f"Rate limited on {request.url}, "
+                           f"retrying in {delay:.0f}s")
+            self.sleep(delay)
+
+        raise RateLimitExceeded(f"Giving up on {request.url} after "
+                                f"{self.max_retries} retries")
+
+    def report(self):
+        """
+        Logs the quota usage per project.
+        """
+
+        with self.condition:
+            usages = sorted(self.usage.items(), key=lambda item: str(item[0]))
+
+        for project, usage in usages:
+            self.info(f"{project or 'unassigned'}: {usage['requests']} requests, "
+                      f"{usage['quota']} counted against the rate limit")
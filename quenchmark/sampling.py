@@ -0,0 +1,123 @@
+"""
+Implements estimating the fraction of items with some property from a
+stratified random sample, with a confidence interval.
+"""
+
+import math
+import random
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass
+class Estimate:
+    """
+    The estimated fraction along with its confidence interval [low, high],
+    from sampled out of the (estimated) population of items.
+    """
+
+    fraction: float
+    low: float
+    high: float
+    sampled: int
+    population: int
+
+    def decided(self, threshold):
+        """
+        Returns True if the whole interval lies on one side of the
+        threshold, i.e. above it or at most equal to it.
+        """
+
+        return self.low > threshold or self.high <= threshold
+
+
+class StratifiedSample(object):
+    """
+    A random sample of the items, drawn from every stratum (given by the
+    key of the items) in proportion to its size, which can grow in rounds.
+    """
+
+    def __init__(self, items, key, seed=None):
+        rng = random.Random(seed)
+        self.strata = defaultdict(list)
+        for item in items:
+            self.strata[key(item)].append(item)
+        for members in self.strata.values():
+            rng.shuffle(members)
+
+        self.population = sum(len(members) for members in self.strata.values())
+        self.outcomes = {stratum: [] for stratum in self.strata}
+
+    @property
+    def size(self):
+        return sum(len(outcomes) for outcomes in self.outcomes.values())
+
+    @property
+    def exhausted(self):
+        return self.size == self.population
+
+    def draw(self, size):
+        """
+        Yields (stratum, item) pairs growing the sample to about the given
+        size, at least one item from every stratum.
+        """
+
+        for stratum, members in self.strata.items():
+            share = round(size * len(members) / self.population)
+            wanted = min(len(members), max(1, share))
+            for item in members[len(self.outcomes[stratum]):wanted]:
+                yield stratum, item
+
+    def record(self, stratum, outcome):
+        """
+        Records the outcome of a drawn item, None if the item turned out
+        not to belong to the estimated domain after all.
+        """
+
+        self.outcomes[stratum].append(outcome if outcome is None else bool(outcome))
+
+    def estimate(self, confidence=0.95):
+        """
+        Returns the Estimate of the fraction of items with a True outcome,
+        among the items of the domain. The size of the domain within every
+        stratum is estimated from the share of the drawn items belonging to
+        it.
+
+        The variance of every stratum uses the Agresti-Coull adjusted
+        fraction, so that small samples of uniform outcomes do not yield
+        overconfident intervals, and the finite population correction, so
+        that the interval closes once the whole stratum is sampled.
+        """
+
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        strata = []
+
+        for stratum, members in self.strata.items():
+            drawn = self.outcomes[stratum]
+            outcomes = [outcome for outcome in drawn if outcome is not None]
+            if not drawn:
+                # nothing is known about the stratum yet
+                strata.append((len(members), 0.5, 0.25))
+                continue
+            if not outcomes:
+                continue
+
+            domain = len(members) * len(outcomes) / len(drawn)
+            adjusted = (sum(outcomes) + 1) / (len(outcomes) + 2)
+            correction = 1 - len(drawn) / len(members)
+            strata.append((domain, sum(outcomes) / len(outcomes),
+                           correction * adjusted * (1 - adjusted) / len(outcomes)))
+
+        total = sum(domain for domain, fraction, variance in strata)
+        if not total:
+            return Estimate(0.0, 0.0, 0.0, 0, 0)
+
+        fraction = sum(domain * fraction for domain, fraction, variance in strata) / total
+        variance = sum((domain / total) ** 2 * variance for domain, fraction, variance in strata)
+
+        margin = z * math.sqrt(variance)
+        sampled = sum(outcome is not None
+                      for outcomes in self.outcomes.values() for outcome in outcomes)
+        return Estimate(fraction, max(0.0, fraction - margin), min(1.0, fraction + margin),
+                        sampled, round(total))
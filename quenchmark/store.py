@@ -0,0 +1,117 @@
+"""
+Implements the persistent store of per-project snapshots, which allows
+subsequent runs to collect only what changed since the previous one.
+"""
+
+import datetime as dt
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+
+from quenchmark.logger import LoggerMixin
+
+
+@dataclass
+class Snapshot:
+    """
+    The data collected by a collector for a project, along with the high
+    water marks (last commit SHA, last issue update, ...) it was computed
+    from and any state needed to update it incrementally.
+    """
+
+    project: str
+    collector: str
+    metrics: dict = field(default_factory=dict)
+    marks: dict = field(default_factory=dict)
+    state: dict = field(default_factory=dict)
+    collected_at: str = None
+
+
+class SnapshotStore(LoggerMixin):
+    """
+    Keeps the history of snapshots in an append-only SQLite table.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.lock = threading.Lock()
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project TEXT,
+                collector TEXT,
+                collected_at TEXT,
+                metrics TEXT,
+                marks TEXT,
+                state TEXT
+            )
+        """)
+        self.db.execute("""
+            CREATE INDEX IF NOT EXISTS snapshots_lookup
+            ON snapshots (project, collector, id)
+        """)
+        self.db.commit()
+
+    def record(self, snapshot):
+        """
+        Appends the snapshot to the store.
+        """
+
+        snapshot.collected_at = snapshot.collected_at or dt.datetime.now(dt.timezone.utc).isoformat()
+
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO snapshots (project, collector, collected_at, "
+                "metrics, marks, state) VALUES (?, ?, ?, ?, ?, ?)",
+                (snapshot.project, snapshot.collector, snapshot.collected_at,
+                 json.dumps(snapshot.metrics, default=str),
+                 json.dumps(snapshot.marks, default=str),
+                 json.dumps(snapshot.state, default=str))
+            )
+            self.db.commit()
+
+    def latest(self, project, collector):
+        """
+        Returns the most recent snapshot of the project taken by the
+        collector, None if there is none.
+        """
+
+        with self.lock:
+            row = self.db.execute(
+                "SELECT collected_at, metrics, marks, state FROM snapshots "
+                "WHERE project = ? AND collector = ? ORDER BY id DESC LIMIT 1",
+                (project, collector)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        collected_at, metrics, marks, state = row
+        return Snapshot(project, collector, json.loads(metrics), json.loads(marks),
+                        json.loads(state), collected_at)
+
+    def history(self, project, collector):
+        """
+        Returns all the snapshots of the project taken by the collector,
+        oldest first.
+        """
+
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT collected_at, metrics, marks, state FROM snapshots "
+                "WHERE project = ? AND collector = ? ORDER BY id ASC",
+                (project, collector)
+            ).fetchall()
+
+        return [
+            Snapshot(project, collector, json.loads(metrics), json.loads(marks),
+                     json.loads(state), collected_at)
+            for collected_at, metrics, marks, state in rows
+        ]
@@ -0,0 +1,15 @@
+import pytest
+
+from quenchmark import affiliation, owners
+
+
+@pytest.fixture(autouse=True)
+def fresh_lookups():
+    """
+    Owners and affiliations are memoized for the whole run, every test
+    starts without them.
+    """
+
+    owners.install(owners.OwnerDirectory())
+    affiliation.install(affiliation.Affiliations())
+    yield
@@ -16,6 +16,8 @@ class MonkeyRepo():
 class MonkeyUser():
     get_repo = lambda self, y: MonkeyRepo()
     login = property(lambda self: 'Peter Shor')
+    name = property(lambda self: None)
+    type = property(lambda self: 'User')
     weeks = property(lambda self: StatsContributor())
 
 class MonkeyContentFile():
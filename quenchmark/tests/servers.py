@@ -0,0 +1,57 @@
+"""
+Local HTTP servers to test the network facing code against.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeServer():
+    """
+    A threaded HTTP server answering requests using a routing function.
+
+    The routing function receives the request handler and returns a tuple
+    (status, headers, body). Every request is recorded in self.requests as a
+    (path, headers) tuple, the request body is available as handler.body.
+    """
+
+    def __init__(self, route):
+        self.route = route
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self.body = self.rfile.read(length)
+                server.requests.append((self.path, dict(self.headers)))
+                status, headers, body = server.route(self)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode('utf-8')
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       args=(0.01,), daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
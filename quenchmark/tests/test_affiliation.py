@@ -0,0 +1,98 @@
+import itertools
+from difflib import SequenceMatcher
+
+import mock
+
+from quenchmark.affiliation import Affiliations, matches, normalize
+
+
+class User(object):
+
+    def __init__(self, login, company=None, name=None):
+        self.login = login
+        self.name = name
+        self.fetches = 0
+        self._company = company
+
+    @property
+    def company(self):
+        self.fetches += 1
+        return self._company
+
+
+def test_normalize():
+    """
+    Test that mentions, surrounding whitespace and case do not matter.
+    """
+
+    assert normalize(' @DWaveSystems ') == 'dwavesystems'
+    assert normalize('Rigetti Computing') == 'rigetti computing'
+    assert normalize(None) == ''
+
+
+def test_matches_agrees_with_the_full_ratio():
+    """
+    Test that the prefilters never change the verdict of the full ratio.
+    """
+
+    strings = ['dwavesystems', 'dwave systems', 'd-wave systems', 'dwave', 'ibm',
+               'ibm research', 'rigetti', 'rigetticomputing', 'qutip', 'qutip org',
+               'google', 'googl', 'xanaduai', 'xanadu', '']
+
+    for company, target in itertools.product(strings, repeat=2):
+        expected = (bool(company) and bool(target)
+                    and SequenceMatcher(None, company, target).ratio() > 0.9)
+        assert matches(company, target) == expected, (company, target)
+
+
+def test_verdicts_are_memoized_per_user():
+    """
+    Test that the company of a user is read once, however many Issues,
+    comments and repositories of the owner they appear in.
+    """
+
+    affiliations = Affiliations()
+    owner = User('dwavesystems', name='D-Wave Systems')
+    employee = User('alice', '@dwavesystems')
+    outsider = User('bob', 'Rigetti')
+
+    for _ in range(10):
+        assert affiliations.is_affiliated(employee, owner)
+        assert not affiliations.is_affiliated(outsider, owner)
+
+    assert employee.fetches == 1
+    assert outsider.fetches == 1
+
+
+def test_owner_name_is_read_lazily():
+    """
+    Test that the name of the owner is only needed if the login does not
+    match, and that a missing name is handled.
+    """
+
+    owner = mock.Mock(spec=['login'], login='qutip')
+    assert Affiliations().is_affiliated(User('alice', 'QuTiP'), owner)
+
+    owner = User('quantumlib', name=None)
+    assert not Affiliations().is_affiliated(User('bob', 'Google'), owner)
+
+    owner = User('quantumlib', name='Google')
+    assert Affiliations().is_affiliated(User('bob', 'google'), owner)
+
+
+def test_companies_are_kept_across_runs(tmp_path):
+    """
+    Test that stored companies are reused until they expire.
+    """
+
+    path = str(tmp_path / 'affiliations.sqlite')
+    owner = User('rigetti')
+
+    Affiliations(path).is_affiliated(User('alice', 'Rigetti'), owner)
+
+    user = User('alice', 'Rigetti')
+    assert Affiliations(path).is_affiliated(user, owner)
+    assert user.fetches == 0
+
+    assert Affiliations(path, max_age=-1).is_affiliated(user, owner)
+    assert user.fetches == 1
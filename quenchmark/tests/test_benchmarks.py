@@ -0,0 +1,49 @@
+from quenchmark.benchmarks.suite import BenchmarkSuite, Measurement, compare
+
+TINY = {'projects': 2, 'commits': 40, 'contributors': 3, 'issues': 6, 'comments': 2}
+
+
+def test_scenarios_run_against_the_fake():
+    """
+    Testing that all the scenarios complete, collecting the data issues the
+    requests of the decision tree only.
+    """
+    measurements = BenchmarkSuite(TINY).run()
+
+    assert [m.scenario for m in measurements] == ['criteria', 'is_valid', 'collect_data']
+    assert all(m.projects == 2 and m.requests > 0 for m in measurements)
+    criteria, is_valid, collect_data = measurements
+    assert criteria.requests >= is_valid.requests == collect_data.requests
+
+
+def test_memory_is_measured_per_scenario():
+    """
+    Testing that the peak memory of a scenario does not carry over the
+    peak of the previous ones.
+    """
+    suite = BenchmarkSuite(TINY, memory=True)
+    large = BenchmarkSuite({**TINY, 'commits': 4000}, memory=True)
+
+    first, = large.run(['criteria'])
+    second, = suite.run(['criteria'])
+
+    assert 0 < second.peak_memory < first.peak_memory
+    assert BenchmarkSuite(TINY).run(['criteria'])[0].peak_memory is None
+
+
+def test_regressions_are_detected():
+    """
+    Testing that only the request counts are compared, the wall time
+    depends on the machine.
+    """
+    baseline = {
+        'sizes': TINY,
+        'scenarios': {'is_valid': {'requests': 100}},
+    }
+
+    fine = Measurement('is_valid', 2, requests=100, bytes=0, wall=3.0)
+    more = Measurement('is_valid', 2, requests=101, bytes=0, wall=1.0)
+
+    assert compare([fine], baseline, TINY) == []
+    assert len(compare([more], baseline, TINY)) == 1
+    assert compare([more], baseline, {**TINY, 'issues': 7}) == []
@@ -0,0 +1,147 @@
+import time
+
+import github
+import pytest
+
+from quenchmark import transport
+from quenchmark.cache import CachingTransport, ResponseCache
+from quenchmark.transport import Request, Response, Transport
+from servers import FakeServer
+
+
+def etag_route(handler):
+    """
+    Serves a repository, honouring the If-None-Match header.
+    """
+    if handler.headers.get('If-None-Match') == '"v1"':
+        return 304, {'ETag': '"v1"', 'X-RateLimit-Remaining': '4999'}, b''
+    return 200, {'ETag': '"v1"', 'X-RateLimit-Remaining': '4998'}, {
+        'name': 'repo', 'full_name': 'owner/repo', 'path': handler.path
+    }
+
+
+def make_transport(cache=None):
+    return CachingTransport(Transport(), cache or ResponseCache(':memory:'))
+
+
+def test_conditional_revalidation():
+    """
+    Testing that a cached response is revalidated with its ETag.
+    """
+    with FakeServer(etag_route) as server:
+        chain = make_transport()
+        first = chain.send(Request('GET', server.url + '/repos/owner/repo'))
+        second = chain.send(Request('GET', server.url + '/repos/owner/repo'))
+
+    assert first.status == second.status == 200
+    assert first.body == second.body
+    assert second.headers['x-ratelimit-remaining'] == '4999'
+    assert 'If-None-Match' not in server.requests[0][1]
+    assert server.requests[1][1]['If-None-Match'] == '"v1"'
+    assert (chain.hits, chain.misses) == (1, 1)
+
+
+def test_last_modified_revalidation():
+    """
+    Testing that responses without ETag are revalidated by date.
+    """
+    stamp = 'Mon, 01 Jan 2018 00:00:00 GMT'
+
+    def route(handler):
+        if handler.headers.get('If-Modified-Since') == stamp:
+            return 304, {}, b''
+        return 200, {'Last-Modified': stamp}, b'[]'
+
+    with FakeServer(route) as server:
+        chain = make_transport()
+        chain.send(Request('GET', server.url + '/issues'))
+        assert chain.send(Request('GET', server.url + '/issues')).body == b'[]'
+
+    assert chain.hits == 1
+
+
+def test_parameter_order_does_not_matter():
+    """
+    Testing that the cache key normalizes the query string.
+    """
+    first = Request('GET', 'https://api.github.com/issues?state=all&page=2')
+    second = Request('GET', 'https://api.github.com/issues?page=2&state=all')
+    assert ResponseCache.key(first) == ResponseCache.key(second)
+
+
+def test_credentials_are_part_of_the_key():
+    """
+    Testing that responses are not shared between credentials, which are
+    not stored in the clear.
+    """
+    anonymous = Request('GET', 'https://api.github.com/repos/owner/repo')
+    alice = Request('GET', anonymous.url, {'Authorization': 'token secret-a'})
+    bob = Request('GET', anonymous.url, {'Authorization': 'token secret-b'})
+
+    keys = {ResponseCache.key(request) for request in (anonymous, alice, bob)}
+    assert len(keys) == 3
+    assert not any('secret' in key for key in keys)
+
+
+def test_size_is_tracked_incrementally():
+    """
+    Testing that storing responses within the size limit evicts nothing
+    and keeps track of the total size, replaced responses included.
+    """
+    with FakeServer(etag_route) as server:
+        cache = ResponseCache(':memory:')
+        cache.evict = lambda: pytest.fail('evicted within the size limit')
+        chain = make_transport(cache)
+        for index in range(3):
+            chain.send(Request('GET', f'{server.url}/repos/owner/repo{index}'))
+        # replaces the entry of the first request
+        cache.store(ResponseCache.key(Request('GET', f'{server.url}/repos/owner/repo0')),
+                    Response(200, {'etag': '"v2"'}, b'{}'))
+
+    stored = cache.db.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+    assert cache.size == stored
+
+
+def test_size_eviction():
+    """
+    Testing that the least recently used entries are evicted first.
+    """
+    with FakeServer(etag_route) as server:
+        cache = ResponseCache(':memory:', max_size=250)
+        chain = make_transport(cache)
+        for index in range(5):
+            chain.send(Request('GET', f'{server.url}/repos/owner/repo{index}'))
+
+    assert 0 < cache.size <= 250
+    assert cache.get(ResponseCache.key(Request('GET', f'{server.url}/repos/owner/repo0'))) is None
+    assert cache.get(ResponseCache.key(Request('GET', f'{server.url}/repos/owner/repo4'))) is not None
+
+
+def test_age_eviction(tmp_path):
+    """
+    Testing that expired entries are dropped when the cache is opened.
+    """
+    path = str(tmp_path / 'responses.sqlite')
+    with FakeServer(etag_route) as server:
+        make_transport(ResponseCache(path)).send(Request('GET', server.url + '/repos/owner/repo'))
+
+    time.sleep(0.01)
+    assert ResponseCache(path).size > 0
+    assert ResponseCache(path, max_age=0).size == 0
+
+
+def test_pygithub_integration():
+    """
+    Testing that PyGithub requests are routed through the cache.
+    """
+    with FakeServer(etag_route) as server:
+        chain = make_transport()
+        transport.install(chain)
+        try:
+            client = github.Github(base_url=server.url)
+            assert client.get_repo('owner/repo').name == 'repo'
+            assert client.get_repo('owner/repo').name == 'repo'
+        finally:
+            transport.uninstall()
+
+    assert chain.hits == 1
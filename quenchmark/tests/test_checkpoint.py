@@ -0,0 +1,66 @@
+import os
+
+from quenchmark.checkpoint import Checkpoint, CheckpointStore
+from quenchmark.engine import ExecutionEngine
+from quenchmark.main import Project
+
+
+class FlakyCollector():
+    """
+    Fails for every project listed in the 'broken' set.
+    """
+    concurrency_group = 'io'
+    broken = set()
+    runs = []
+
+    def run(self, project):
+        FlakyCollector.runs.append(project.identifier)
+        if project.identifier in self.broken:
+            raise RuntimeError('API rate limit exceeded')
+        return {'flaky': project.identifier}
+
+
+def make_projects(*identifiers):
+    return [Project(name=identifier, identifier=identifier, repo_url='')
+            for identifier in identifiers]
+
+
+def test_roundtrip(tmp_path):
+    """
+    Testing that checkpoints are persisted without leftovers.
+    """
+    store = CheckpointStore(str(tmp_path))
+    store.save('cirq', 'MetaCollector', Checkpoint('done', {'meta_valid': True}))
+
+    assert store.load('cirq', 'MetaCollector') == Checkpoint('done', {'meta_valid': True})
+    assert store.load('cirq', 'TestCollector') is None
+    assert os.listdir(tmp_path / 'cirq') == ['MetaCollector.json']
+
+    store.clear()
+    assert store.load('cirq', 'MetaCollector') is None
+
+
+def test_resume_retries_only_failed_steps(tmp_path):
+    """
+    Testing that resuming skips the collectors which already finished.
+    """
+    store = CheckpointStore(str(tmp_path))
+    projects = make_projects('cirq', 'qutip', 'pyquil')
+
+    FlakyCollector.broken = {'qutip'}
+    FlakyCollector.runs = []
+    data, failures = ExecutionEngine(checkpoints=store).run(projects, [FlakyCollector])
+    assert [failure.project for failure in failures] == ['qutip']
+    assert store.load('qutip', 'FlakyCollector').status == 'failed'
+
+    FlakyCollector.broken = set()
+    FlakyCollector.runs = []
+    data, failures = ExecutionEngine(checkpoints=store, resume=True).run(projects, [FlakyCollector])
+
+    assert FlakyCollector.runs == ['qutip']
+    assert failures == []
+    assert data == {
+        'cirq': {'flaky': 'cirq'},
+        'qutip': {'flaky': 'qutip'},
+        'pyquil': {'flaky': 'pyquil'},
+    }
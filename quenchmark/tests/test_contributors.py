@@ -0,0 +1,107 @@
+import datetime as dt
+import json
+from types import SimpleNamespace
+
+import mock
+import pytest
+
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.contributors import ContributorStats
+
+START = dt.datetime(2024, 1, 7, tzinfo=dt.timezone.utc)
+
+
+def contributor(login, weeks):
+    return SimpleNamespace(
+        author=SimpleNamespace(login=login),
+        weeks=[SimpleNamespace(w=START + dt.timedelta(weeks=index), a=a, d=d, c=c)
+               for index, (a, d, c) in enumerate(weeks)]
+    )
+
+
+STATS = [
+    contributor('alice', [(100, 10, 5), (0, 0, 0), (50, 5, 2)]),
+    contributor('bob', [(1, 1, 1), (2, 2, 1), (0, 0, 0)]),
+    contributor('carol', [(0, 0, 0), (0, 0, 0), (500, 0, 1)]),
+]
+
+
+def test_from_github():
+    """
+    Test that the weekly series are loaded into a single array.
+    """
+
+    stats = ContributorStats.from_github(STATS)
+
+    assert stats.names == ['alice', 'bob', 'carol']
+    assert stats.counts.shape == (3, 3, 3)
+    assert stats.last_week == START + dt.timedelta(weeks=2)
+    assert stats.totals().tolist() == [[150, 15, 7], [3, 3, 2], [500, 0, 1]]
+
+
+def test_as_dicts_are_plain():
+    """
+    Test that the contributors are returned as JSON serializable dicts.
+    """
+
+    contributors = ContributorStats.from_github(STATS).as_dicts()
+
+    assert contributors[0] == {'name': 'alice', 'additions': 150, 'deletions': 15, 'commits': 7}
+    json.dumps(contributors)
+
+    assert ContributorStats.from_totals(contributors).as_dicts() == contributors
+
+
+def test_time_windows():
+    """
+    Test the totals and the active contributors within a time window.
+    """
+
+    stats = ContributorStats.from_github(STATS)
+    since = START + dt.timedelta(weeks=1)
+
+    assert stats.totals(since=since).tolist() == [[50, 5, 2], [2, 2, 1], [500, 0, 1]]
+    assert stats.totals(until=since).tolist() == [[100, 10, 5], [1, 1, 1], [0, 0, 0]]
+    assert stats.active(since + dt.timedelta(weeks=1)) == ['alice', 'carol']
+
+    with pytest.raises(ValueError):
+        ContributorStats.from_totals(stats.as_dicts()).totals(since=since)
+
+
+def test_core_thresholds():
+    """
+    Test that the core developers are selected by any of the thresholds.
+    """
+
+    stats = ContributorStats.from_github(STATS)
+
+    # totals of 653 additions, -18 deletions and 10 commits
+    assert stats.core(653, -18, 10).tolist() == [True, True, True]
+    assert stats.core(653, -18, 10, share=0.5, commit_share=0.5).tolist() == [True, False, True]
+    assert stats.core(653, -18, 10, share=0.9, commit_share=0.5).tolist() == [True, False, False]
+    assert stats.core(0, 0, 0).tolist() == [True, True, True]
+
+
+@mock.patch('github.Github')
+def test_core_developers_what_if(github_mock):
+    """
+    Test that the core developers for other thresholds are computed
+    without fetching the statistics again.
+    """
+
+    repo = github_mock.return_value.search_users.return_value[0].get_repo.return_value
+    repo.get_stats_contributors.return_value = STATS
+    repo.get_stats_code_frequency.return_value = [
+        SimpleNamespace(additions=653, deletions=-18)
+    ]
+    repo.get_commits.return_value = list(range(10))
+
+    collector = MetaCollector('owner', 'repo')
+
+    assert [dev['name'] for dev in collector.core_developers] == ['alice', 'bob', 'carol']
+    assert [dev['name'] for dev in collector.find_core_developers(share=0.5, commit_share=0.5)] \
+        == ['alice', 'carol']
+    assert collector.contributor_count == 3
+    assert collector.marks['stats_week'] == '2024-01-21T00:00:00+00:00'
+
+    repo.get_stats_contributors.assert_called_once()
@@ -0,0 +1,90 @@
+import io
+import tracemalloc
+
+from quenchmark import coverage
+
+REPORT = """<?xml version="1.0" ?>
+<coverage branch-rate="0.5" branches-covered="2" branches-valid="4" line-rate="0.75"
+          lines-covered="3" lines-valid="4" version="4.5">
+  <sources><source>/pyquil</source></sources>
+  <packages>
+    <package branch-rate="0.5" line-rate="0.75" name="pyquil">
+      <classes>
+        <class branch-rate="0.5" filename="pyquil/gates.py" line-rate="0.6667" name="gates.py">
+          <methods>
+            <method name="X"><lines><line hits="1" number="1"/></lines></method>
+          </methods>
+          <lines>
+            <line hits="1" number="1"/>
+            <line branch="true" condition-coverage="50% (1/2)" hits="1" number="2"/>
+            <line hits="0" number="3"/>
+          </lines>
+        </class>
+      </classes>
+    </package>
+    <package branch-rate="0.5" line-rate="1" name="pyquil.api">
+      <classes>
+        <class branch-rate="0.5" filename="pyquil/api/qvm.py" line-rate="1" name="qvm.py">
+          <lines>
+            <line branch="true" condition-coverage="50% (1/2)" hits="2" number="7"/>
+          </lines>
+        </class>
+      </classes>
+    </package>
+  </packages>
+</coverage>
+"""
+
+
+def test_parse():
+    """
+    Testing that the totals and the per-package and per-file metrics are read.
+    """
+    report = coverage.parse(io.StringIO(REPORT))
+
+    assert report.totals['lines-valid'] == '4'
+    assert report.totals['branch-rate'] == '0.5'
+    assert report.packages == {
+        'name': ['pyquil', 'pyquil.api'],
+        'line_rate': [0.75, 1.0],
+        'branch_rate': [0.5, 0.5],
+    }
+    assert report.files == {
+        'package': ['pyquil', 'pyquil.api'],
+        'filename': ['pyquil/gates.py', 'pyquil/api/qvm.py'],
+        'lines': [3, 1],
+        'covered_lines': [2, 1],
+        'branches': [2, 2],
+        'covered_branches': [1, 1],
+        'line_rate': [0.6667, 1.0],
+        'branch_rate': [0.5, 0.5],
+    }
+
+
+def generate_report(path, files, lines):
+    with open(path, 'w') as f:
+        f.write('<coverage line-rate="0.5" lines-covered="1" lines-valid="2"><packages>')
+        f.write('<package name="big" line-rate="0.5" branch-rate="0"><classes>')
+        for index in range(files):
+            f.write(f'<class filename="f{index}.py" line-rate="0.5" branch-rate="0"><lines>')
+            f.writelines(f'<line hits="{number % 2}" number="{number}"/>'
+                         for number in range(lines))
+            f.write('</lines></class>')
+        f.write('</classes></package></packages></coverage>')
+
+
+def test_memory_does_not_grow_with_the_report(tmp_path):
+    """
+    Testing that the parsed elements are not kept in memory.
+    """
+    path = str(tmp_path / 'coverage.xml')
+    generate_report(path, files=20, lines=5000)
+
+    tracemalloc.start()
+    report = coverage.parse(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert report.files['lines'] == [5000] * 20
+    assert report.files['covered_lines'] == [2500] * 20
+    assert peak < 2 * 1024 ** 2
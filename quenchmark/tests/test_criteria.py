@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.criteria import CriteriaEngine, Criterion, check_cancelled
+
+
+class Subject(object):
+    """
+    Computes every attribute once, after the given delay, counting the
+    computations and their overlaps.
+    """
+
+    def __init__(self, delay=0.0, **values):
+        self.delay = delay
+        self.values = values
+        self.computed = Counter()
+        self.running = 0
+        self.overlaps = 0
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name not in self.__dict__.get('values', {}):
+            raise AttributeError(name)
+
+        with self.lock:
+            self.running += 1
+            self.overlaps += self.running > 1
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+            self.computed[name] += 1
+
+        # cached like cached_property does
+        self.__dict__[name] = self.values[name]
+        return self.values[name]
+
+
+def criterion(name, cost, after=()):
+    return Criterion(name, lambda subject: getattr(subject, name), cost=cost,
+                     requires=(name,), after=after)
+
+
+def test_cheapest_first():
+    """
+    Test that criteria are evaluated cheapest first, after the criteria
+    they need to pass.
+    """
+
+    engine = CriteriaEngine([criterion('slow', 10), criterion('guarded', 0, after=('slow',)),
+                             criterion('cheap', 1), criterion('free', 0)])
+
+    assert [c.name for c in engine.order] == ['free', 'cheap', 'slow', 'guarded']
+
+
+def test_invalid_order():
+    with pytest.raises(ValueError):
+        CriteriaEngine([criterion('a', 1, after=('b',)), criterion('b', 1, after=('a',))])
+    with pytest.raises(ValueError):
+        CriteriaEngine([criterion('a', 1, after=('missing',))])
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_short_circuit(prefetch):
+    """
+    Test that the evaluation stops at the first failed criterion and that
+    the verdict reports it.
+    """
+
+    subject = Subject(a=True, b=False, c=True)
+    engine = CriteriaEngine([criterion('a', 1), criterion('b', 2), criterion('c', 3)],
+                            prefetch=prefetch)
+
+    verdict = engine.evaluate(subject)
+
+    assert not verdict
+    assert verdict.failed == 'b'
+    assert verdict.skipped == ['c']
+    assert [(e.criterion, e.passed) for e in verdict.evaluations] == [('a', True), ('b', False)]
+    assert verdict.as_dict()['evaluations'][0]['criterion'] == 'a'
+    if not prefetch:
+        assert 'c' not in subject.computed
+
+
+def test_prefetch_overlaps_evaluation():
+    """
+    Test that the data of the next criterion is fetched while the current
+    one is evaluated, and that every attribute is computed once, by one
+    thread at a time.
+    """
+
+    def slow_check(name):
+        def check(subject):
+            time.sleep(0.05)
+            return getattr(subject, name)
+        return check
+
+    subject = Subject(delay=0.05, a=True, b=True, c=True, d=True)
+    criteria = [Criterion(name, slow_check(name), cost=index, requires=(name,))
+                for index, name in enumerate('abcd')]
+
+    start = time.perf_counter()
+    verdict = CriteriaEngine(criteria).evaluate(subject)
+    elapsed = time.perf_counter() - start
+
+    assert verdict.valid and verdict.failed is None
+    # 0.4s if fetching and checking did not overlap
+    assert elapsed < 0.35
+    assert subject.computed == {'a': 1, 'b': 1, 'c': 1, 'd': 1}
+    assert subject.overlaps == 0
+
+
+def test_failure_cancels_prefetch():
+    """
+    Test that a criterion failing while the data of the next one is being
+    fetched stops the prefetch at its next step, and returns the verdict
+    right away.
+    """
+
+    steps = []
+
+    def scan(subject):
+        for step in range(50):
+            check_cancelled()
+            time.sleep(0.01)
+            steps.append(step)
+        return ()
+
+    subject = Subject(a=False)
+    slow = Criterion('slow', lambda subject: True, cost=2, requires=scan)
+
+    start = time.perf_counter()
+    verdict = CriteriaEngine([criterion('a', 1), slow]).evaluate(subject)
+    elapsed = time.perf_counter() - start
+    finished = len(steps)
+    time.sleep(0.05)
+
+    assert verdict.failed == 'a'
+    assert elapsed < 0.25
+    # the prefetch stopped before the verdict was returned
+    assert finished == len(steps) < 50
+
+
+def test_conditional_requirements():
+    """
+    Test that requirements listed by the subject are the only ones loaded.
+    """
+
+    subject = Subject(young=False, commits=True, recent=True)
+    young_or_mature = Criterion(
+        'young_or_mature', lambda subject: subject.young or subject.commits, cost=1,
+        requires=lambda subject: ('young',) if subject.young else ('young', 'commits')
+    )
+    recently_active = Criterion(
+        'recently_active', lambda subject: not subject.young or subject.recent, cost=1,
+        requires=lambda subject: ('young', 'recent') if subject.young else ('young',)
+    )
+
+    verdict = CriteriaEngine([young_or_mature, recently_active]).evaluate(subject)
+
+    assert verdict.valid
+    assert subject.computed == {'young': 1, 'commits': 1}
+
+
+def test_meta_collector_order():
+    """
+    Test that the expensive Issue analysis of MetaCollector comes last.
+    """
+
+    order = [c.name for c in CriteriaEngine(MetaCollector.criteria).order]
+
+    assert order == ['osi_license', 'young_or_mature', 'recently_active',
+                     'multiple_contributors', 'external_issues', 'responsive']
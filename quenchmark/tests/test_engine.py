@@ -0,0 +1,334 @@
+import threading
+import time
+
+import pytest
+
+from quenchmark.engine import ExecutionEngine
+from quenchmark.graph import DependencyError, DependencyGraph
+from quenchmark.main import EntryPoint, Project
+from quenchmark.plugins import Artifact, Collector
+from quenchmark.store import Snapshot, SnapshotStore
+
+
+class SlowCollector():
+    concurrency_group = 'io'
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def run(self, project):
+        with self.lock:
+            SlowCollector.running += 1
+            SlowCollector.peak = max(SlowCollector.peak, SlowCollector.running)
+        time.sleep(0.05)
+        with self.lock:
+            SlowCollector.running -= 1
+        return {'slow': project.identifier}
+
+
+class FailingCollector():
+    concurrency_group = 'heavy'
+
+    def run(self, project):
+        if project.identifier == 'broken':
+            raise ValueError('no coverage')
+        return {'fast': project.name}
+
+
+def make_projects(*identifiers):
+    return [
+        Project(name=identifier.upper(), identifier=identifier,
+                repo_url=f'https://github.com/test/{identifier}')
+        for identifier in identifiers
+    ]
+
+
+def test_results_are_merged_in_project_order():
+    """
+    Testing that the results do not depend on the order of completion.
+    """
+    projects = make_projects('c', 'a', 'b')
+    data, failures = ExecutionEngine(workers=3).run(projects, [SlowCollector, FailingCollector])
+
+    assert list(data.keys()) == ['c', 'a', 'b']
+    assert data['a'] == {'slow': 'a', 'fast': 'A'}
+    assert failures == []
+
+
+def test_failures_are_isolated_per_project():
+    """
+    Testing that a failing collector does not abort the other projects.
+    """
+    projects = make_projects('ok', 'broken')
+    data, failures = ExecutionEngine(workers=2).run(projects, [FailingCollector, SlowCollector])
+
+    assert data['ok'] == {'fast': 'OK', 'slow': 'ok'}
+    assert data['broken'] == {'slow': 'broken'}
+    assert len(failures) == 1
+    assert failures[0].project == 'broken'
+    assert failures[0].collector == 'FailingCollector'
+    assert 'no coverage' in failures[0].error
+
+
+def test_group_limits_are_respected():
+    """
+    Testing that the number of concurrently running collectors of a group
+    does not exceed the configured limit.
+    """
+    SlowCollector.peak = 0
+    projects = make_projects(*'abcdefgh')
+    ExecutionEngine(workers=8, limits={'io': 3}).run(projects, [SlowCollector])
+
+    assert 1 < SlowCollector.peak <= 3
+
+
+class HeavySleeper():
+    concurrency_group = 'heavy'
+
+    def run(self, project):
+        time.sleep(0.3)
+        return {'heavy': True}
+
+
+class QuickCollector():
+    concurrency_group = 'io'
+    finished = []
+
+    def run(self, project):
+        time.sleep(0.01)
+        QuickCollector.finished.append(time.monotonic())
+        return {'quick': True}
+
+
+def test_saturated_group_does_not_delay_others():
+    """
+    Testing that collectors waiting for a busy group do not hold workers
+    needed by the collectors of other groups.
+    """
+    QuickCollector.finished = []
+    start = time.monotonic()
+    ExecutionEngine(workers=4, limits={'heavy': 1}).run(make_projects(*'abcdefgh'),
+                                                        [HeavySleeper, QuickCollector])
+
+    # the heavy collectors run one after the other, for 2.4s
+    assert len(QuickCollector.finished) == 8
+    assert max(QuickCollector.finished) - start < 0.25
+
+
+@pytest.mark.parametrize('engine, valid', [
+    ({}, True),
+    ({'workers': 8, 'limits': {'heavy': 4}}, True),
+    ({'workers': 8, 'limits': {'heavy': 8}}, False),
+    ({'limits': {'heavy': 12}}, False),
+])
+def test_heavy_limit_below_workers(engine, valid):
+    entry_point = EntryPoint()
+    entry_point.config = {'engine': engine}
+
+    assert entry_point.check_engine_configuration() == valid
+
+
+class RepositoryCollector():
+    """
+    Provides a repository handle, versioned by its head commit.
+    """
+    concurrency_group = 'io'
+    provides = ('repository',)
+    heads = {}
+    runs = []
+
+    def run(self, project):
+        RepositoryCollector.runs.append(project.identifier)
+        if project.identifier == 'broken':
+            raise ConnectionError('repository not found')
+        head = self.heads.get(project.identifier, 'abc')
+        self.published['repository'] = Artifact(f'repo:{project.identifier}', head)
+        return {'head': head}
+
+    def snapshot(self, project, data):
+        return Snapshot(project.identifier, 'RepositoryCollector', data)
+
+
+class StarsCollector():
+    """
+    Requires the repository handle, its inputs are the artifacts only.
+    """
+    concurrency_group = 'io'
+    requires = ('repository',)
+    runs = []
+
+    # Not subclassing Collector, which would register the plugin
+    artifact = Collector.artifact
+    fingerprint = Collector.fingerprint
+
+    def run(self, project):
+        StarsCollector.runs.append(self.artifact('repository'))
+        return {'stars': len(StarsCollector.runs)}
+
+    def snapshot(self, project, data):
+        return Snapshot(project.identifier, 'StarsCollector', data)
+
+
+class Sleeper():
+    concurrency_group = 'io'
+    intervals = []
+
+    def run(self, project):
+        start = time.monotonic()
+        time.sleep(0.1)
+        self.intervals.append((start, time.monotonic()))
+        return {type(self).__name__: True}
+
+
+class OtherSleeper(Sleeper):
+    pass
+
+
+def test_artifacts_are_shared():
+    """
+    Testing that required artifacts are computed once and passed on.
+    """
+    RepositoryCollector.runs = []
+    StarsCollector.runs = []
+    projects = make_projects('a', 'b')
+
+    data, failures = ExecutionEngine().run(projects, [StarsCollector, RepositoryCollector])
+
+    assert failures == []
+    assert sorted(RepositoryCollector.runs) == ['a', 'b']
+    assert sorted(StarsCollector.runs) == ['repo:a', 'repo:b']
+    assert list(data['a'].keys()) == ['head', 'stars']
+
+
+def test_independent_collectors_run_concurrently():
+    Sleeper.intervals = []
+    ExecutionEngine(workers=2).run(make_projects('a'), [Sleeper, OtherSleeper])
+
+    (first_start, first_end), (second_start, second_end) = sorted(Sleeper.intervals)
+    assert second_start < first_end
+
+
+def test_failed_requirements_fail_the_dependents():
+    """
+    Testing that collectors are not run without their requirements.
+    """
+    StarsCollector.runs = []
+    data, failures = ExecutionEngine().run(make_projects('broken'),
+                                           [RepositoryCollector, StarsCollector])
+
+    assert StarsCollector.runs == []
+    assert [failure.collector for failure in failures] == ['RepositoryCollector', 'StarsCollector']
+    assert 'RepositoryCollector' in failures[1].error
+
+
+def test_unchanged_inputs_are_skipped():
+    """
+    Testing that collectors are only run again if their inputs changed.
+    """
+    StarsCollector.runs = []
+    RepositoryCollector.heads = {'a': 'abc'}
+    engine = ExecutionEngine(store=SnapshotStore(':memory:'))
+    projects = make_projects('a')
+
+    engine.run(projects, [RepositoryCollector, StarsCollector])
+    data, failures = engine.run(projects, [RepositoryCollector, StarsCollector])
+    assert data['a'] == {'head': 'abc', 'stars': 1}
+    assert len(StarsCollector.runs) == 1
+
+    RepositoryCollector.heads = {'a': 'def'}
+    data, failures = engine.run(projects, [RepositoryCollector, StarsCollector])
+    assert data['a'] == {'head': 'def', 'stars': 2}
+
+
+def test_invalid_graphs():
+    class A():
+        provides = ('a',)
+        requires = ('b',)
+
+    class B():
+        provides = ('b',)
+        requires = ('a',)
+
+    with pytest.raises(DependencyError, match='Circular'):
+        DependencyGraph([A, B])
+    with pytest.raises(DependencyError, match="requires 'b'"):
+        DependencyGraph([A])
+    with pytest.raises(DependencyError, match='provided by both'):
+        DependencyGraph([A, B, type('C', (), {'provides': ('a',)})])
+
+
+def test_used_artifacts_are_optional():
+    """
+    Testing that used artifacts are passed on if provided, and that their
+    absence is not an error.
+    """
+    class User():
+        uses = ('repository',)
+
+    graph = DependencyGraph([User, RepositoryCollector])
+    assert graph.dependencies[User] == [RepositoryCollector]
+    assert graph.inputs[User] == ['repository']
+
+    graph = DependencyGraph([User])
+    assert graph.dependencies[User] == []
+    assert graph.inputs[User] == []
+
+
+class HeadUser():
+    """
+    Uses the repository if it is provided, records what it received.
+    """
+    concurrency_group = 'io'
+    uses = ('repository',)
+    received = []
+
+    def run(self, project):
+        HeadUser.received.append(dict(self.artifacts))
+        return {'used': sorted(self.artifacts)}
+
+
+def test_failed_providers_of_used_artifacts():
+    """
+    Testing that a collector is run without the used artifacts of a failed
+    collector.
+    """
+    HeadUser.received = []
+    RepositoryCollector.heads = {}
+    data, failures = ExecutionEngine().run(make_projects('broken', 'a'),
+                                           [RepositoryCollector, HeadUser])
+
+    assert [failure.collector for failure in failures] == ['RepositoryCollector']
+    assert data['broken'] == {'used': []}
+    assert data['a'] == {'head': 'abc', 'used': ['repository']}
+
+
+def test_resume_keeps_providers_of_used_artifacts(tmp_path):
+    """
+    Testing that resuming a collector does not run again the collectors
+    whose artifacts it only uses.
+    """
+    from quenchmark.checkpoint import CheckpointStore
+
+    class FlakyUser(HeadUser):
+        fail = True
+
+        def run(self, project):
+            if FlakyUser.fail:
+                raise RuntimeError('docker build failed')
+            return super().run(project)
+
+    store = CheckpointStore(str(tmp_path))
+    RepositoryCollector.runs = []
+    RepositoryCollector.heads = {}
+    ExecutionEngine(checkpoints=store).run(make_projects('a'), [RepositoryCollector, FlakyUser])
+
+    FlakyUser.fail = False
+    HeadUser.received = []
+    data, failures = ExecutionEngine(checkpoints=store, resume=True).run(
+        make_projects('a'), [RepositoryCollector, FlakyUser]
+    )
+
+    assert failures == []
+    assert RepositoryCollector.runs == ['a']
+    assert HeadUser.received == [{}]
+    assert data['a'] == {'head': 'abc', 'used': []}
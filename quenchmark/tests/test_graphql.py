@@ -0,0 +1,255 @@
+import mock
+from unittest.mock import patch
+
+import pytest
+
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.graphql import GraphQLBackend, GraphQLError, HTTPTransport
+from quenchmark.transport import Transport
+import monkeys
+from servers import FakeServer
+
+
+def issue_node(number, author, company=None, comments=()):
+    return {
+        'number': number,
+        'createdAt': '2018-03-01T10:00:00Z',
+        'author': {'login': author, 'company': company},
+        'comments': {'nodes': [
+            {'createdAt': f'2018-03-0{day}T10:00:00Z',
+             'author': {'login': login, 'company': None}}
+            for day, login in comments
+        ]},
+    }
+
+
+def connection(nodes, cursor=None, total=None):
+    return {
+        'totalCount': len(nodes) if total is None else total,
+        'pageInfo': {'hasNextPage': cursor is not None, 'endCursor': cursor},
+        'nodes': nodes,
+    }
+
+
+def repository_node(issues, prs):
+    return {
+        'createdAt': '2017-01-01T00:00:00Z',
+        'hasIssuesEnabled': True,
+        'licenseInfo': {'spdxId': 'MIT'},
+        'owner': {'login': 'owner', 'name': 'Owner Inc.'},
+        'issues': issues,
+        'pullRequests': prs,
+    }
+
+
+class RecordedTransport():
+    """
+    Replays recorded responses in order, keeping the executed queries.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.queries = []
+
+    def __call__(self, query, variables):
+        self.queries.append((query, variables))
+        return self.responses.pop(0)
+
+
+def test_issues_with_comments_are_fetched_in_bulk():
+    """
+    Testing that issues, pull requests, comments and companies are parsed.
+    """
+    recorded = RecordedTransport({'data': {'r0': repository_node(
+        connection([issue_node(1, 'alice', 'Rigetti', comments=[(2, 'bob')])]),
+        connection([issue_node(2, 'carol')]),
+    )}})
+
+    issues = list(GraphQLBackend(recorded).issues('owner', 'repo'))
+
+    assert [(issue.number, issue.pull_request) for issue in issues] == [(1, False), (2, True)]
+    assert issues[0].user.company == 'Rigetti'
+    assert issues[0].get_comments()[0].user.login == 'bob'
+    assert issues[0].get_comments()[0].created_at.day == 2
+    assert len(recorded.queries) == 1
+
+
+def test_pagination_follows_cursors():
+    """
+    Testing that only the connections with further pages are requested.
+    """
+    recorded = RecordedTransport(
+        {'data': {'r0': repository_node(
+            connection([issue_node(1, 'alice')], cursor='c1', total=2),
+            connection([issue_node(2, 'bob')]),
+        )}},
+        {'data': {'repository': {
+            'issues': connection([issue_node(3, 'carol')]),
+        }}},
+    )
+
+    issues = GraphQLBackend(recorded).issues('owner', 'repo')
+    assert issues.totalCount == 3
+    assert len(recorded.queries) == 1
+
+    assert sorted(issue.number for issue in issues) == [1, 2, 3]
+    query, variables = recorded.queries[1]
+    assert 'after: "c1"' in query
+    assert 'pullRequests' not in query
+    assert variables == {'owner': 'owner', 'name': 'repo'}
+
+
+def test_multiple_repositories_in_one_query():
+    """
+    Testing that the first page of several repositories is fetched at once.
+    """
+    empty = repository_node(connection([]), connection([]))
+    recorded = RecordedTransport({'data': {'r0': empty, 'r1': empty, 'r2': empty}})
+    backend = GraphQLBackend(recorded)
+
+    result = backend.repositories([('dwavesystems', 'dimod'),
+                                   ('dwavesystems', 'qbsolv'),
+                                   ('dwavesystems', 'dwave-system')])
+
+    assert backend.requests == 1
+    assert result[('dwavesystems', 'qbsolv')]['license'] == 'MIT'
+
+
+def test_comments_are_paged():
+    """
+    Testing that the comments beyond the first ones are fetched when the
+    comments of the issue are listed, so that late replies are found.
+    """
+    first = issue_node(1, 'alice', comments=[(2, f'user{index}') for index in range(10)])
+    first['comments']['pageInfo'] = {'hasNextPage': True, 'endCursor': 'k10'}
+    recorded = RecordedTransport(
+        {'data': {'r0': repository_node(connection([first]), connection([]))}},
+        {'data': {'repository': {'issue': {'comments': {
+            'pageInfo': {'hasNextPage': False, 'endCursor': 'k11'},
+            'nodes': [{'createdAt': '2018-03-03T10:00:00Z',
+                       'author': {'login': 'core', 'company': None}}],
+        }}}}},
+    )
+
+    issue, = GraphQLBackend(recorded).issues('owner', 'repo')
+    assert len(recorded.queries) == 1
+
+    assert [comment.user.login for comment in issue.get_comments()][10:] == ['core']
+    assert len(issue.get_comments()) == 11
+    query, variables = recorded.queries[1]
+    assert 'issue(number: $number)' in query
+    assert variables == {'owner': 'owner', 'name': 'repo', 'number': 1, 'cursor': 'k10'}
+
+    collector = MetaCollector()
+    collector.is_part_of_company = lambda user: False
+    assert collector.is_ignored(issue, ['core']) == False
+
+
+def test_prefetched_repositories_are_shared():
+    """
+    Testing that prefetched repositories need no further queries, and that
+    unknown ones are still fetched.
+    """
+    empty = repository_node(connection([]), connection([]))
+    recorded = RecordedTransport(
+        {'data': {f'r{index}': empty for index in range(5)}},
+        {'data': {'r0': empty, 'r1': empty}},
+        {'data': {'r0': empty}},
+    )
+    backend = GraphQLBackend(recorded)
+
+    backend.prefetch([('dwavesystems', f'repo{index}') for index in range(7)])
+
+    assert backend.requests == 2
+    assert list(backend.issues('DWaveSystems', 'Repo6')) == []
+    assert backend.metadata('dwavesystems', 'repo0')['license'] == 'MIT'
+    assert backend.requests == 2
+    assert backend.metadata('qutip', 'qutip') is None
+    assert list(backend.issues('qutip', 'qutip')) == []
+    assert backend.requests == 3
+
+
+def test_prefetch_fetches_the_first_page_only():
+    """
+    Testing that prefetching leaves the following pages to the collector
+    listing the issues, and that a scan stopping early does not fetch them.
+    """
+    recorded = RecordedTransport(
+        {'data': {'r0': repository_node(
+            connection([issue_node(1, 'alice')], cursor='c1', total=2), connection([]),
+        )}},
+        {'data': {'repository': {'issues': connection([issue_node(2, 'bob')])}}},
+    )
+    backend = GraphQLBackend(recorded)
+
+    backend.prefetch([('owner', 'repo')])
+    assert backend.requests == 1
+
+    first = next(iter(backend.issues('owner', 'repo')))
+    assert first.number == 1
+    assert backend.requests == 1
+
+    assert [issue.number for issue in backend.issues('owner', 'repo')] == [1, 2]
+    assert backend.requests == 2
+
+
+def test_errors_are_raised():
+    """
+    Testing that errors reported by the API are not silently ignored.
+    """
+    recorded = RecordedTransport({'errors': [{'message': 'Bad credentials'}]})
+    with pytest.raises(GraphQLError):
+        GraphQLBackend(recorded).issues('owner', 'repo')
+
+
+def test_http_transport():
+    """
+    Testing that queries are posted to the GraphQL endpoint.
+    """
+    empty = repository_node(connection([]), connection([]))
+
+    with FakeServer(lambda handler: (200, {}, {'data': {'r0': empty}})) as server:
+        execute = HTTPTransport(Transport(), url=server.url + '/graphql', token='secret')
+        assert list(GraphQLBackend(execute).issues('owner', 'repo')) == []
+
+    path, headers = server.requests[0]
+    assert path == '/graphql'
+    assert headers['Authorization'] == 'bearer secret'
+
+
+@patch('monkeys.MonkeyRepo')
+@patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
+def test_meta_collector_backend(repo_mock):
+    """
+    Testing that the MetaCollector filters the issues of the backend.
+    """
+    repo_mock.return_value.owner.login = 'owner'
+    repo_mock.return_value.name = 'TestRepoName'
+    recorded = RecordedTransport({'data': {'r0': repository_node(
+        connection([issue_node(1, 'owner'), issue_node(2, 'shor', 'Peter Shor'),
+                    issue_node(3, 'core'), issue_node(4, 'alice')]),
+        connection([]),
+    )}})
+
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName', backend=GraphQLBackend(recorded))
+    collector.core_developers = [{'name': 'core'}]
+
+    assert [issue.number for issue in collector.get_xtrnl_issues_and_prs()] == [4]
+    assert 'owner: "Peter Shor", name: "TestRepoName"' in recorded.queries[0][0]
+
+
+def test_license_from_prefetched_metadata():
+    """
+    Testing that the license of a prefetched repository needs no request.
+    """
+    empty = repository_node(connection([]), connection([]))
+    backend = GraphQLBackend(RecordedTransport({'data': {'r0': empty}}))
+    backend.prefetch([('owner', 'repo')])
+
+    collector = MetaCollector(backend=backend)
+    collector.user = mock.Mock(login='Owner')
+    collector.repo = mock.Mock()
+    collector.repo.name = 'repo'
+
+    assert collector.osi_license
+    collector.repo.get_license.assert_not_called()
@@ -0,0 +1,80 @@
+import json
+import threading
+
+from quenchmark import context
+from quenchmark.instrumentation import NULL_SPAN, Recorder, timed
+from quenchmark.logger import LoggerMixin
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = Recorder()
+
+    assert recorder.span('http') is NULL_SPAN
+    with recorder.span('http'):
+        recorder.count('api_calls')
+
+    assert recorder.spans == []
+    assert recorder.totals() == {}
+
+
+def test_spans_are_attributed():
+    """
+    Testing that spans and counters are attributed to the current project
+    and collector, also across threads.
+    """
+    recorder = Recorder(enabled=True)
+
+    def work(project):
+        with context.project(project), context.collector('MetaCollector'):
+            with recorder.span('http', method='GET'):
+                recorder.count('api_calls')
+                recorder.count('bytes_transferred', 100)
+
+    threads = [threading.Thread(target=work, args=(project,)) for project in ('cirq', 'qutip')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(span.project for span in recorder.spans) == ['cirq', 'qutip']
+    assert recorder.spans[0].args == {'method': 'GET'}
+    assert recorder.totals() == {'api_calls': 2, 'bytes_transferred': 200}
+
+    histograms = recorder.histograms('collector')
+    assert histograms['MetaCollector']['http']['count'] == 2
+    assert sum(histograms['MetaCollector']['http']['buckets']) == 2
+    assert set(recorder.histograms('project')) == {'cirq', 'qutip'}
+
+
+def test_chrome_trace(tmp_path):
+    recorder = Recorder(enabled=True)
+    with recorder.span('docker.build', image='qosstest_cirq:abc'):
+        recorder.count('api_calls', 3)
+
+    path = tmp_path / 'trace.json'
+    recorder.export(str(path))
+    events = json.loads(path.read_text())['traceEvents']
+
+    assert events[0]['ph'] == 'X' and events[0]['name'] == 'docker.build'
+    assert events[0]['args'] == {'project': None, 'image': 'qosstest_cirq:abc'}
+    assert events[1] == {'name': 'api_calls', 'ph': 'C', 'ts': events[1]['ts'],
+                         'pid': events[0]['pid'], 'args': {'api_calls': 3}}
+
+
+def test_timed(monkeypatch):
+    """
+    Testing the decorator and the LoggerMixin shortcuts.
+    """
+    recorder = Recorder(enabled=True)
+    monkeypatch.setattr('quenchmark.instrumentation.recorder', recorder)
+
+    class Parser(LoggerMixin):
+
+        @timed()
+        def parse(self):
+            self.count('files')
+            return 42
+
+    assert Parser().parse() == 42
+    assert [span.name for span in recorder.spans] == ['test_timed.<locals>.Parser.parse']
+    assert recorder.totals() == {'files': 1}
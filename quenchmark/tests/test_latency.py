@@ -0,0 +1,178 @@
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+
+from quenchmark import affiliation, owners, transport
+from quenchmark.benchmarks.fakegithub import FakeGitHub, LocalGitHub, SyntheticRepository
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.latency import LatencyDistribution, ResponseLatencies, rank
+from quenchmark.main import EntryPoint
+from quenchmark.ratelimit import RequestScheduler
+
+START = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def day(days):
+    return START + dt.timedelta(days=days)
+
+
+def user(login):
+    return SimpleNamespace(login=login)
+
+
+def merge(issues, comments, responders=('core',)):
+    """
+    Merges (day, number) issues with (day, number, login) comments.
+    """
+    asked = []
+
+    def responds(commenter):
+        asked.append(commenter.login)
+        return commenter.login in responders
+
+    latencies = ResponseLatencies.merge(
+        [(day(days), number) for days, number in issues],
+        [(day(days), number, user(login)) for days, number, login in comments],
+        responds
+    )
+    return latencies, asked
+
+
+def test_first_response():
+    """
+    Test that the latency is the time to the first comment of a responder,
+    and that later comments on answered Issues are not considered.
+    """
+
+    latencies, asked = merge(
+        issues=[(0, 1), (1, 2), (2, 3)],
+        comments=[(1, 1, 'someone'), (3, 1, 'core'), (4, 2, 'core'), (5, 1, 'core'),
+                  (40, 1, 'other'), (50, 4, 'core')],
+    )
+
+    assert latencies.numbers.tolist() == [1, 2, 3]
+    assert latencies.latencies[:2].tolist() == [3 * 86400, 3 * 86400]
+    assert not latencies.answered[2]
+    # answered Issue 1 and unknown Issue 4 need no verdict on the commenters
+    assert asked == ['someone', 'core', 'core']
+
+
+def test_response_at_creation():
+    """
+    Test that a comment made when the Issue was opened is a response.
+    """
+
+    latencies, asked = merge(issues=[(0, 1)], comments=[(0, 1, 'core')])
+
+    assert latencies.latencies.tolist() == [0.0]
+
+
+def test_distribution():
+    """
+    Test the quantiles and the fractions answered within some weeks, the
+    unanswered Issues ranking last.
+    """
+
+    latencies, asked = merge(
+        issues=[(0, number) for number in range(1, 11)],
+        comments=[(number, number, 'core') for number in range(1, 9)] + [(60, 9, 'core')],
+    )
+
+    distribution = latencies.distribution(weeks=(1, 4))
+
+    assert distribution.issues == 10
+    assert distribution.answered == 9
+    assert distribution.median == pytest.approx(5)
+    assert distribution.p90 == pytest.approx(60)
+    assert distribution.within == {1: 0.7, 4: 0.8}
+    assert latencies.quantile(1.0) is None
+    assert latencies.ignored(weeks=4) == {number: number > 8 for number in range(1, 11)}
+
+
+def test_empty_distribution():
+    latencies, asked = merge(issues=[], comments=[(1, 1, 'core')])
+
+    distribution = latencies.distribution()
+
+    assert distribution.issues == distribution.answered == 0
+    assert distribution.median is None
+    assert distribution.within == {1: 0.0, 4: 0.0}
+    assert latencies.ignored() == {}
+
+
+def test_rank():
+    """
+    Test that projects are ranked by the fraction answered within four
+    weeks, then by the median latency.
+    """
+
+    distributions = {
+        'slow': LatencyDistribution(10, 9, median=20.0, within={4: 0.9}),
+        'fast': LatencyDistribution(10, 9, median=1.0, within={4: 0.9}),
+        'silent': LatencyDistribution(10, 0, within={4: 0.0}),
+        'best': LatencyDistribution(10, 10, median=3.0, within={4: 1.0}),
+    }
+
+    assert rank(distributions) == ['best', 'fast', 'slow', 'silent']
+
+
+def test_ranking_is_reported():
+    """
+    Test that the projects with collected latencies are ranked after the
+    collection, checkpointed ones included.
+    """
+
+    data = {
+        'slow': {'meta_response_latency': {'issues': 10, 'answered': 9, 'median': 20.0,
+                                           'p90': None, 'within': {4: 0.9}}},
+        'skipped': {'meta_valid': False},
+        'restored': {'meta_response_latency': {'issues': 10, 'answered': 10, 'median': 3.0,
+                                               'p90': 5.0, 'within': {'4': 1.0}}},
+    }
+
+    assert EntryPoint().report_latencies(data) == ['restored', 'slow']
+    assert EntryPoint().report_latencies({'skipped': {'meta_valid': False}}) == []
+
+
+def test_latency_mode_of_meta_collector():
+    """
+    Test that the latency mode of MetaCollector reaches the verdicts of
+    the Issue by Issue evaluation, listing the comments of the whole
+    repository rather than those of every Issue.
+    """
+
+    repository = SyntheticRepository('owner', 'large', commits=20, contributors=2,
+                                     issues=300, comments=2)
+
+    def evaluate(options):
+        owners.install(owners.OwnerDirectory())
+        affiliation.install(affiliation.Affiliations())
+        local = LocalGitHub(transport.Transport(), server.url)
+        transport.install(RequestScheduler(local))
+        try:
+            with pytest.MonkeyPatch.context() as monkeypatch:
+                monkeypatch.setattr(MetaCollector, 'options', options)
+                # the Issue by Issue scan must not stop early
+                monkeypatch.setattr(MetaCollector, 'ignorance_is_decided',
+                                    staticmethod(lambda *args: False))
+                collector = MetaCollector('owner', 'large')
+                collector.core_developers
+                requests = local.requests
+                verdicts = collector.issue_verdicts
+                return collector, verdicts, local.requests - requests
+        finally:
+            transport.uninstall()
+
+    with FakeGitHub([repository]) as server:
+        scanned, scanned_verdicts, scanned_requests = evaluate({})
+        merged, merged_verdicts, merged_requests = evaluate({'latency': True})
+
+    assert merged_verdicts == scanned_verdicts
+    assert merged_requests * 2 < scanned_requests
+
+    distribution = merged.response_latencies.distribution()
+    assert distribution.issues == len(scanned_verdicts)
+    assert distribution.within[4] == pytest.approx(
+        1 - sum(scanned_verdicts.values()) / len(scanned_verdicts)
+    )
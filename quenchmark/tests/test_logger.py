@@ -0,0 +1,195 @@
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from quenchmark import context
+from quenchmark.logger import (ContextFilter, JSONLinesFormatter, LoggerMixin,
+                               ProjectFileHandler, RateLimitedHandler)
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.records = []
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.records.append(record)
+
+
+def make_record(message, level=logging.INFO, **extra):
+    record = logging.makeLogRecord({
+        'name': 'main', 'levelno': level,
+        'levelname': logging.getLevelName(level), 'msg': message
+    })
+    record.__dict__.update(extra)
+    return record
+
+
+def test_context_filter_stamps_project_and_collector():
+    """
+    Test that records are attributed to the current project and collector,
+    unless given explicitly.
+    """
+
+    record, explicit = make_record('a'), make_record('b', project='cirq')
+    with context.project('qutip'), context.collector('MetaCollector'):
+        ContextFilter().filter(record)
+        ContextFilter().filter(explicit)
+
+    assert (record.project, record.collector) == ('qutip', 'MetaCollector')
+    assert (explicit.project, explicit.collector) == ('cirq', 'MetaCollector')
+
+
+def test_json_lines_format():
+    """
+    Test that records are formatted as compact single-line JSON objects.
+    """
+
+    record = make_record('built %s\nin %ds', project='qutip', collector='TestCollector')
+    record.args = ('image', 3)
+
+    line = JSONLinesFormatter().format(record)
+
+    assert '\n' not in line and ', ' not in line
+    entry = json.loads(line)
+    assert entry['message'] == 'built image\nin 3s'
+    assert entry['level'] == 'INFO'
+    assert entry['project'] == 'qutip'
+    assert entry['collector'] == 'TestCollector'
+
+
+def test_rate_limit_drops_excess_records():
+    """
+    Test that the console gets at most the burst of records at once, that
+    warnings always get through and that the suppressed records are counted.
+    """
+
+    target = ListHandler()
+    handler = RateLimitedHandler(target, rate=0.001, burst=5)
+
+    for index in range(20):
+        handler.handle(make_record(f'info {index}'))
+    handler.handle(make_record('warning', logging.WARNING))
+
+    messages = [record.getMessage() for record in target.records]
+    assert messages[:5] == [f'info {index}' for index in range(5)]
+    assert messages[5] == '15 log messages suppressed by the console rate limit'
+    assert messages[6] == 'warning'
+    assert len(messages) == 7
+
+
+def test_rate_limit_refills():
+    """
+    Test that the records get through again once the bucket refills.
+    """
+
+    now = [0.0]
+    target = ListHandler()
+    handler = RateLimitedHandler(target, rate=1000, burst=1, clock=lambda: now[0])
+
+    handler.handle(make_record('first'))
+    handler.handle(make_record('dropped'))
+    now[0] += 0.01
+    handler.handle(make_record('second'))
+
+    assert [record.getMessage() for record in target.records] == [
+        'first', '1 log messages suppressed by the console rate limit', 'second'
+    ]
+
+
+def test_project_files(tmp_path):
+    """
+    Test that the records are routed into the JSON-lines file of their
+    project, the unattributed ones into main.jsonl.
+    """
+
+    handler = ProjectFileHandler()
+    handler.handle(make_record('not written', project='qutip'))
+
+    handler.directory = str(tmp_path)
+    handler.handle(make_record('qutip 1', project='qutip'))
+    handler.handle(make_record('cirq', project='cirq'))
+    handler.handle(make_record('qutip 2', project='qutip'))
+    handler.handle(make_record('run', project=None))
+    handler.close()
+
+    def messages(name):
+        with open(tmp_path / f'{name}.jsonl') as f:
+            return [json.loads(line)['message'] for line in f]
+
+    assert messages('qutip') == ['qutip 1', 'qutip 2']
+    assert messages('cirq') == ['cirq']
+    assert messages('main') == ['run']
+
+
+def test_queued_logging_does_not_block():
+    """
+    Test that a slow output does not slow the logging threads down, while
+    every record from every thread still gets written.
+    """
+
+    output = ListHandler(delay=0.01)
+    handler = QueueHandler(queue.SimpleQueue())
+    handler.addFilter(ContextFilter())
+    listener = QueueListener(handler.queue, output)
+
+    logger = logging.getLogger('quenchmark.tests.queued')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    listener.start()
+
+    def work(project):
+        with context.project(project):
+            for index in range(10):
+                logger.info(f'{project} {index}')
+
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=work, args=(f'project{n}',)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    # 40 records written at 10ms each take 0.4s
+    assert elapsed < 0.2
+    assert len(output.records) == 40
+    assert all(record.getMessage().startswith(record.project)
+               for record in output.records)
+
+
+def test_setup_logging_writes_project_files(tmp_path):
+    """
+    Test the whole setup, from the mixin through the writer thread into the
+    project files.
+    """
+
+    root = logging.getLogger()
+    level = root.level
+
+    LoggerMixin.setup_logging()
+    try:
+        LoggerMixin.configure_logging(directory=str(tmp_path), console_rate=1000)
+        with context.project('qutip'):
+            LoggerMixin.info('collecting')
+        LoggerMixin.important('done')
+    finally:
+        LoggerMixin.stop_logging()
+        root.setLevel(level)
+
+    assert LoggerMixin.listener is None
+    with open(tmp_path / 'qutip.jsonl') as f:
+        assert json.loads(f.read())['message'] == 'collecting'
+    with open(tmp_path / 'main.jsonl') as f:
+        assert json.loads(f.read())['level'] == 'WARNING'
@@ -1,11 +1,13 @@
 import mock
 import datetime as dt
+import threading
 from unittest.mock import patch
 
 import pytest
 import github
 import numpy as np
 
+from quenchmark import context, criteria, ratelimit
 from quenchmark.collectors.meta import MetaCollector
 import monkeys
 
@@ -43,12 +45,39 @@ def test_is_young(repo_mock):
     assert MetaCollector('TestRepoOwner', 'TestRepoName').is_young == False
 
 
+@patch('monkeys.MonkeyRepo')
+@patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
+def test_commit_count_is_not_paged(repo_mock):
+    """
+    Testing that the commit count is taken from the paginated listing.
+    """
+    repo_mock.return_value.get_commits.return_value = mock.MagicMock(totalCount=5000)
+    assert MetaCollector('TestRepoOwner', 'TestRepoName').commit_count == 5000
+    repo_mock.return_value.get_commits.return_value.__iter__.assert_not_called()
+
+@patch('monkeys.MonkeyRepo')
 @patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
-def test_has_recent_commits():
+def test_has_recent_commits(repo_mock):
     """
     Testing if a project had at least 20 commits in the past year.
     """
-    pass # TODO: needs to be tested
+    fetched = []
+
+    def commits(age):
+        for i in range(100):
+            fetched.append(i)
+            commit = mock.MagicMock()
+            commit.commit.committer.date = dt.datetime.now(dt.timezone.utc) - age - dt.timedelta(days=i)
+            yield commit
+
+    repo_mock.return_value.get_commits.side_effect = lambda: commits(dt.timedelta(weeks=2))
+    assert MetaCollector('TestRepoOwner', 'TestRepoName').has_recent_commits == True
+    assert len(fetched) == 1
+
+    fetched.clear()
+    repo_mock.return_value.get_commits.side_effect = lambda: commits(dt.timedelta(weeks=60))
+    assert MetaCollector('TestRepoOwner', 'TestRepoName').has_recent_commits == False
+    assert len(fetched) == 19
 
 @patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
 def test_contributor_count():
@@ -152,3 +181,102 @@ def test_core_developers(repo_mock, stats_mock, weeks_mock):
     weeks_mock.return_value.c = 0
 
     assert len(MetaCollector('TestRepoOwner', 'TestRepoName').core_developers) == 0
+
+
+def external_issue(number, comments=(), created_at=dt.datetime(2018, 1, 1)):
+    """
+    Returns an Issue whose comments are (days after creation, login)
+    tuples, recording how many of them were consumed and the priority
+    they were requested with.
+    """
+    issue = mock.MagicMock(number=number, created_at=created_at, updated_at=None,
+                           comments=len(comments), consumed=0, priorities=[])
+    issue.user.login = f'user{number}'
+    issue.user.company = None
+
+    def get_comments():
+        for days, login in comments:
+            issue.consumed += 1
+            issue.priorities.append(ratelimit.current_priority.get())
+            comment = mock.MagicMock(created_at=created_at + dt.timedelta(days=days))
+            comment.user.login = login
+            comment.user.company = None
+            yield comment
+
+    issue.get_comments.side_effect = get_comments
+    return issue
+
+
+@patch('github.Github')
+def test_is_ignored_within_first_month(github_mock):
+    """
+    Testing that only replies within the first month count, and that the
+    later comments are not fetched.
+    """
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName')
+
+    answered = external_issue(1, [(1, 'someone'), (3, 'core'), (60, 'other')])
+    assert collector.is_ignored(answered, ['core']) == False
+
+    late = external_issue(2, [(1, 'someone'), (40, 'core'), (41, 'core')])
+    assert collector.is_ignored(late, ['core']) == True
+    assert late.consumed == 2
+
+    silent = external_issue(3)
+    assert collector.is_ignored(silent, ['core']) == True
+    silent.get_comments.assert_not_called()
+
+    # the comments are scanned after the requests about the repositories
+    assert set(answered.priorities + late.priorities) == {ratelimit.SCAN_PRIORITY}
+    assert ratelimit.current_priority.get() == ratelimit.DEFAULT_PRIORITY
+
+
+@patch('github.Github')
+def test_cancelled_prefetch_stops_the_scan(github_mock):
+    """
+    Testing that the comments of an Issue are no longer fetched once the
+    prefetch scanning them is cancelled.
+    """
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName')
+    issue = external_issue(1, [(1, 'someone'), (2, 'other')])
+    cancellation = threading.Event()
+    cancellation.set()
+
+    with context.activate(criteria.current_cancellation, cancellation):
+        with pytest.raises(criteria.Cancelled):
+            collector.is_ignored(issue, ['core'])
+    assert issue.consumed == 1
+
+
+@pytest.mark.parametrize('ignored, evaluated, remaining, revisable, decided', [
+    (0, 0, 10, False, False),
+    (6, 6, 5, False, True),     # 6 of at most 11 ignored
+    (5, 5, 5, False, False),    # 5 of 10 is not more than half
+    (0, 5, 5, False, True),     # at most 5 of 10 ignored
+    (0, 5, 6, False, False),
+    (0, 5, 5, True, False),     # re-evaluations may turn 5 of 5 ignored
+    (0, 10, 5, True, True),
+])
+def test_ignorance_is_decided(ignored, evaluated, remaining, revisable, decided):
+    assert MetaCollector.ignorance_is_decided(ignored, evaluated, remaining, revisable) == decided
+
+
+@patch('github.Github')
+def test_issue_scan_stops_early(github_mock):
+    """
+    Testing that the scan of the Issues stops once the share of ignored
+    ones can no longer exceed one half, and that the Issues are listed
+    least recently updated first.
+    """
+    repo = github_mock.return_value.search_users.return_value[0].get_repo.return_value
+    repo.owner.login = 'TestRepoOwner'
+    issues = [external_issue(number, [(1, 'core')]) for number in range(1, 101)]
+    repo.get_issues.return_value = issues
+
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName')
+    collector.core_developers = [{'name': 'core'}]
+
+    assert collector.has_ignored_issues_and_prs == False
+    assert len(collector.issue_verdicts) == 50
+    assert sum(issue.consumed for issue in issues) == 50
+    assert repo.get_issues.call_args[1] == {'state': 'all', 'sort': 'updated', 'direction': 'asc'}
@@ -0,0 +1,96 @@
+import mock
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.mirror import GitError, GitMirror
+import monkeys
+
+
+def git(path, *args, author=('Alice', 'alice@example.com')):
+    env = {
+        **os.environ,
+        'GIT_AUTHOR_NAME': author[0], 'GIT_AUTHOR_EMAIL': author[1],
+        'GIT_COMMITTER_NAME': author[0], 'GIT_COMMITTER_EMAIL': author[1],
+    }
+    subprocess.run(['git', '-C', str(path), *args], env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def commit(path, filename, lines, author=('Alice', 'alice@example.com')):
+    with open(path / filename, 'w') as f:
+        f.write(''.join(f'{line}\n' for line in lines))
+    git(path, 'add', filename, author=author)
+    git(path, 'commit', '-q', '-m', f'Update {filename}', author=author)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    path = tmp_path / 'upstream'
+    path.mkdir()
+    git(path, 'init', '-q')
+    commit(path, 'a.py', range(10))
+    commit(path, 'b.py', range(5), author=('Bob', '1234+bobby@users.noreply.github.com'))
+    commit(path, 'a.py', range(4))
+    return path
+
+
+def test_statistics(upstream, tmp_path):
+    """
+    Testing per author statistics mined from the mirror.
+    """
+    mirror = GitMirror(str(upstream), cache_dir=str(tmp_path / 'mirrors'))
+    mirror.sync()
+    stats = mirror.statistics()
+
+    assert sorted(stats.contributors, key=lambda c: c['name']) == [
+        {'name': 'Alice', 'additions': 10, 'deletions': 6, 'commits': 2},
+        {'name': 'bobby', 'additions': 5, 'deletions': 0, 'commits': 1},
+    ]
+    assert stats.totals == {'additions': 15, 'deletions': -6}
+    assert stats.commit_count == 3
+    assert stats.commit_dates == sorted(stats.commit_dates, reverse=True)
+    assert list(stats.samples) == ['Alice']
+
+
+def test_incremental_sync(upstream, tmp_path):
+    """
+    Testing that an existing mirror picks up new commits.
+    """
+    mirror = GitMirror(str(upstream), cache_dir=str(tmp_path / 'mirrors'))
+    mirror.sync()
+    commit(upstream, 'c.py', range(3))
+    mirror.sync()
+
+    stats = mirror.statistics()
+    assert stats.commit_count == 4
+    assert stats.head == mirror.git('rev-parse', 'HEAD').strip()
+
+
+def test_missing_remote(tmp_path):
+    """
+    Testing that failures to clone are reported.
+    """
+    mirror = GitMirror(str(tmp_path / 'nothing'), cache_dir=str(tmp_path / 'mirrors'))
+    with pytest.raises(GitError):
+        mirror.sync()
+
+
+@patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
+def test_meta_collector_mirror(upstream, tmp_path):
+    """
+    Testing that the MetaCollector uses the mirror for commit statistics.
+    """
+    mirror = GitMirror(str(upstream), cache_dir=str(tmp_path / 'mirrors'))
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName', mirror=mirror)
+
+    assert collector.commit_count == 3
+    assert collector.has_recent_commits == True
+    assert collector.contributor_count == 2
+    collector.repo.get_commit = mock.Mock(return_value=mock.Mock(author=mock.Mock(login='alice')))
+    # issues and comments name their authors by login
+    assert [dev['name'] for dev in collector.core_developers] == ['alice', 'bobby']
+    assert collector.repo.get_commit.call_count == 1
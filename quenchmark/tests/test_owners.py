@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import mock
+
+from quenchmark import owners, transport
+from quenchmark.benchmarks.fakegithub import FakeGitHub, LocalGitHub, SyntheticRepository
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.engine import ExecutionEngine
+from quenchmark.main import EntryPoint, Project
+from quenchmark.ratelimit import RequestScheduler
+
+
+class Client(object):
+    """
+    Resolves every login into an organization with a single member.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.searches = Counter()
+
+    def search_users(self, query):
+        self.searches[query] += 1
+        time.sleep(self.delay)
+        return [SimpleNamespace(login=query.lstrip('@'), name=None, type='Organization',
+                                get_repo=lambda name: mock.MagicMock())]
+
+    def get_organization(self, login):
+        return SimpleNamespace(get_members=lambda: [SimpleNamespace(login=f'{login}-dev')])
+
+
+def test_group_by_owner():
+    """
+    Test that projects are grouped by the (case insensitive) owner.
+    """
+
+    projects = [Project(name=name, identifier=name, repo_url=url) for name, url in [
+        ('dimod', 'https://github.com/dwavesystems/dimod'),
+        ('qbsolv', 'https://github.com/DWaveSystems/qbsolv/'),
+        ('cirq', 'https://github.com/quantumlib/Cirq'),
+    ]]
+
+    groups = owners.group_by_owner(projects)
+
+    assert {owner: [p.name for p in group] for owner, group in groups.items()} == {
+        'dwavesystems': ['dimod', 'qbsolv'],
+        'quantumlib': ['cirq'],
+    }
+
+
+def test_owner_is_resolved_once():
+    """
+    Test that concurrent lookups of the same owner issue a single search,
+    and that the members of organizations are listed.
+    """
+
+    client = Client(delay=0.05)
+    directory = owners.OwnerDirectory()
+    resolved = []
+
+    threads = [threading.Thread(target=lambda login=login: resolved.append(directory.resolve(client, login)))
+               for login in ['dwavesystems', 'DWaveSystems', 'dwavesystems', 'qiskit']]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(client.searches.values()) == 2
+    assert len({id(owner) for owner in resolved}) == 2
+    assert directory.resolve(client, 'qiskit').members == {'qiskit-dev'}
+
+
+@mock.patch('github.Github')
+def test_members_need_no_profile(github_mock):
+    """
+    Test that members of the owning organization are part of its company,
+    without fetching their profiles.
+    """
+
+    github_mock.return_value = Client()
+    collector = MetaCollector('dwavesystems', 'dimod')
+
+    member = mock.Mock(login='dwavesystems-dev')
+    type(member).company = mock.PropertyMock()
+
+    assert collector.is_part_of_company(member)
+    type(member).company.assert_not_called()
+
+
+def test_projects_share_the_owner():
+    """
+    Test that collecting several projects of an organization resolves the
+    owner and lists its members once.
+    """
+
+    repositories = [
+        SyntheticRepository('dwavesystems', name, commits=20, contributors=2, issues=4,
+                            comments=1, organization=True)
+        for name in ['dimod', 'qbsolv', 'dwave-system']
+    ] + [SyntheticRepository('quantumlib', 'cirq', commits=20, contributors=2, issues=4,
+                             comments=1)]
+
+    entry_point = EntryPoint()
+    entry_point.projects = [
+        Project(name=repository.name, identifier=repository.name,
+                repo_url=f'https://github.com/{repository.full_name}')
+        for repository in repositories
+    ]
+    entry_point.plugin_classes = [MetaCollector]
+    entry_point.engine = ExecutionEngine()
+
+    with FakeGitHub(repositories) as server:
+        transport.install(RequestScheduler(LocalGitHub(transport.Transport(), server.url)))
+        try:
+            data = entry_point.collect_data()
+        finally:
+            transport.uninstall()
+
+    assert entry_point.failures == []
+    assert len(data) == 4
+
+    paths = Counter(server.paths)
+    assert paths['/search/users'] == 2
+    assert paths['/users/dwavesystems'] == 1
+    assert paths['/orgs/dwavesystems/members'] == 1
+    assert '/orgs/quantumlib/members' not in paths
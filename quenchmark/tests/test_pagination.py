@@ -0,0 +1,104 @@
+import time
+from collections import Counter
+
+import github
+import pytest
+
+from quenchmark import transport
+from quenchmark.benchmarks.fakegithub import FakeGitHub, LocalGitHub, SyntheticRepository
+from quenchmark.pagination import PagePrefetcher, last_page, paginate
+from quenchmark.ratelimit import (DEFAULT_PRIORITY, PREFETCH_PRIORITY, RequestScheduler,
+                                  current_priority)
+
+
+@pytest.fixture
+def server():
+    repository = SyntheticRepository('owner', 'paged', commits=10, contributors=2,
+                                     issues=600, comments=0)
+    with FakeGitHub([repository], latency=0.05) as server:
+        transport.install(RequestScheduler(LocalGitHub(transport.Transport(), server.url),
+                                           max_in_flight=8))
+        try:
+            yield server
+        finally:
+            transport.uninstall()
+
+
+def listing():
+    client = github.Github(seconds_between_requests=None, lazy=True)
+    repo = client.get_repo('owner/paged')
+    return repo.get_issues(state='all', sort='created', direction='asc')
+
+
+def test_last_page():
+    link = ('<https://api.github.com/repositories/1/issues?state=all&page=2>; rel="next", '
+            '<https://api.github.com/repositories/1/issues?state=all&page=10>; rel="last"')
+
+    assert last_page(link) == 10
+    assert last_page('<https://api.github.com/issues?page=1>; rel="prev"') is None
+    assert last_page(None) is None
+
+
+def test_other_listings_are_unchanged():
+    issues = [1, 2, 3]
+
+    assert paginate(issues) is issues
+
+
+def test_pages_are_fetched_concurrently(server):
+    """
+    Test that the items come in the order of the listing, and that the
+    wall time drops with the number of pages fetched at a time.
+    """
+
+    start = time.perf_counter()
+    sequential = [issue.number for issue in listing()]
+    sequential_wall = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = [issue.number for issue in paginate(listing(), concurrency=8)]
+    concurrent_wall = time.perf_counter() - start
+
+    assert concurrent == sequential
+    assert sorted(concurrent) == list(range(1, 601))
+    # 20 pages, one after the other or the first one and then 8 at a time
+    assert concurrent_wall < sequential_wall / 2
+
+
+def test_early_exit_bounds_the_waste(server):
+    """
+    Test that a consumer stopping early leaves the last pages unfetched.
+    """
+
+    issues = PagePrefetcher(listing(), concurrency=2)
+
+    for index, issue in enumerate(issues):
+        if index == 45:
+            break
+
+    time.sleep(0.2)
+    pages = Counter(server.paths)
+    # the two consumed pages and at most two prefetched ones of 20
+    assert pages['/repos/owner/paged/issues'] <= 4
+    assert issues.totalCount == 600
+
+
+def test_prefetched_pages_yield_to_other_requests(server):
+    """
+    Test that the pages fetched ahead of the consumer are requested with a
+    lower priority than the first one.
+    """
+
+    issues = listing()
+    get_page = issues.get_page
+    priorities = {}
+
+    def recording_get_page(page):
+        priorities[page] = current_priority.get()
+        return get_page(page)
+
+    issues.get_page = recording_get_page
+    assert len(list(PagePrefetcher(issues, concurrency=4))) == 600
+
+    assert priorities == {page: DEFAULT_PRIORITY if page == 0 else PREFETCH_PRIORITY
+                          for page in range(20)}
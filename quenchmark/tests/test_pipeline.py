@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from quenchmark import coverage
+from quenchmark.collectors.tests import TestCollector
+from quenchmark.engine import ExecutionEngine
+from quenchmark.main import Project
+from quenchmark.pipeline import DockerError, DockerPipeline, ResourceBudget, parse_size
+from quenchmark.plugins import Artifact
+from servers import FakeServer
+
+COVERAGE = '<coverage lines-valid="200" lines-covered="150" line-rate="0.75"></coverage>'
+
+
+class FakeDocker():
+    """
+    Pretends to build images and run test containers, writing a coverage
+    report into the mounted report directory. Images are kept as a
+    {tag: (size, created)} dictionary.
+    """
+
+    def __init__(self, images=None):
+        self.lock = threading.Lock()
+        self.running = {'build': 0, 'run': 0}
+        self.peak = {'build': 0, 'run': 0}
+        self.mounts = []
+        self.images = dict(images or {})
+        self.removed = []
+
+    def __call__(self, args, timeout=None):
+        args = [str(arg) for arg in args]
+
+        if args[:2] == ['git', 'ls-remote']:
+            return 'a1b2c3d4e5f6a7b8c9d0\tHEAD\n', '', 0
+        if args[:3] == ['docker', 'image', 'inspect']:
+            tags = [arg for arg in args[3:] if arg.startswith('qosstest_')]
+            if not all(tag in self.images for tag in tags):
+                return '', 'No such image', 1
+            return ''.join('{} {}\n'.format(*self.images[tag]) for tag in tags), '', 0
+        if args[:2] == ['docker', 'images']:
+            return '\n'.join(self.images), '', 0
+        if args[:2] == ['docker', 'rmi']:
+            self.removed.append(args[2])
+            del self.images[args[2]]
+            return '', '', 0
+
+        command = args[1]
+        if command == 'build':
+            with self.lock:
+                self.images[args[args.index('-t') + 1]] = (100, f'2018-01-{len(self.images) + 10}')
+
+        with self.lock:
+            self.running[command] += 1
+            self.peak[command] = max(self.peak[command], self.running[command])
+
+        if command == 'run':
+            mount = args[args.index('-v') + 1].split(':')[0]
+            self.mounts.append(mount)
+            with open(os.path.join(mount, 'coverage.xml'), 'w') as f:
+                f.write(COVERAGE)
+
+        # tests take longer than builds, so that they pile up
+        time.sleep(0.1 if command == 'run' else 0.01)
+        with self.lock:
+            self.running[command] -= 1
+        return '', '', 0
+
+
+class HeadCollector():
+    """
+    Provides the upstream commit, like MetaCollector does.
+    """
+    concurrency_group = 'io'
+    provides = ('head',)
+
+    def run(self, project):
+        self.published['head'] = Artifact('a1b2c3d4e5f6a7b8c9d0', 'a1b2c3d4e5f6a7b8c9d0')
+        return {}
+
+
+@pytest.fixture
+def dockerfile(tmp_path):
+    path = tmp_path / 'test.docker'
+    path.write_text('FROM fedora:27\nCMD ["true"]\n')
+    return str(path)
+
+
+def make_projects(count, dockerfile):
+    return [Project(name=f'P{index}', identifier=f'p{index}',
+                    repo_url=f'https://github.com/test/p{index}', dockerfile=dockerfile)
+            for index in range(count)]
+
+
+def test_parse_size():
+    assert parse_size('512m') == 512 * 1024 ** 2
+    assert parse_size('2g') == 2 * 1024 ** 3
+    assert parse_size(1000) == 1000
+    with pytest.raises(ValueError):
+        parse_size('lots')
+
+
+def test_budget_is_respected():
+    """
+    Testing that the reserved resources never exceed the budget.
+    """
+    budget = ResourceBudget(cpus=4, memory=4096)
+    in_use = []
+    lock = threading.Lock()
+
+    def work():
+        with budget.reserve(2, 1024):
+            with lock:
+                in_use.append(4 - budget.cpus)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(in_use) <= 4
+    assert (budget.cpus, budget.memory) == (4, 4096)
+
+
+def test_oversized_requests_are_clamped():
+    budget = ResourceBudget(cpus=1, memory=100)
+    with budget.reserve(8, 1000):
+        assert (budget.cpus, budget.memory) == (0, 0)
+
+
+def test_concurrent_runs_use_separate_report_directories(tmp_path, dockerfile):
+    """
+    Testing that projects are tested concurrently without sharing reports.
+    """
+    docker = FakeDocker()
+    reports = tmp_path / 'reports'
+    pipeline = DockerPipeline(build_slots=1, cpus=4, memory='8g', container_cpus=2,
+                              reports=str(reports))
+
+    with patch('quenchmark.pipeline.run', docker), \
+         patch.object(TestCollector, 'pipeline', pipeline):
+        data, failures = ExecutionEngine(workers=6).run(make_projects(6, dockerfile),
+                                                        [HeadCollector, TestCollector])
+
+    assert failures == []
+    assert data['p3'] == {'coverage_total_lines': '200', 'coverage_covered_lines': '150',
+                          'coverage_fraction': '0.75', 'coverage_branch_fraction': None,
+                          'coverage_packages': coverage.columns(coverage.PACKAGE_COLUMNS),
+                          'coverage_files': coverage.columns(coverage.FILE_COLUMNS)}
+    assert len(set(docker.mounts)) == 6
+    assert docker.peak == {'build': 1, 'run': 2}
+    assert os.listdir(reports) == []
+
+
+def test_upstream_without_meta_collector(tmp_path, dockerfile):
+    """
+    Testing that the upstream commit is looked up once if no collector
+    provides it.
+    """
+    docker = FakeDocker()
+    calls = []
+
+    def recording(args, timeout=None):
+        calls.append(list(args[:2]))
+        return docker(args, timeout)
+
+    with patch('quenchmark.pipeline.run', recording), \
+         patch.object(TestCollector, 'pipeline', DockerPipeline(reports=str(tmp_path))):
+        data, failures = ExecutionEngine().run(make_projects(1, dockerfile), [TestCollector])
+
+    assert failures == []
+    assert data['p0']['coverage_fraction'] == '0.75'
+    assert calls.count(['git', 'ls-remote']) == 1
+    assert [image.split('-')[-1] for image in docker.images] == ['a1b2c3d4e5f6']
+
+
+def test_failed_build(dockerfile):
+    """
+    Testing that a failed build is reported.
+    """
+    pipeline = DockerPipeline()
+    with patch('quenchmark.pipeline.run', lambda args, timeout=None: ('', 'no space left', 1)):
+        with pytest.raises(DockerError):
+            pipeline.build(make_projects(1, dockerfile)[0])
+
+
+def test_existing_image_is_reused(dockerfile):
+    """
+    Testing that an image is only built once per Dockerfile and upstream commit.
+    """
+    docker = FakeDocker()
+    project = make_projects(1, dockerfile)[0]
+
+    with patch('quenchmark.pipeline.run', docker):
+        first = DockerPipeline().build(project)
+        second = DockerPipeline().build(project)
+
+    assert first == second
+    assert first.startswith('qosstest_p0:') and first.endswith('-a1b2c3d4e5f6')
+    assert docker.peak['build'] == 1
+    assert len(docker.images) == 1
+
+
+def test_dockerfile_changes_invalidate_the_image(dockerfile):
+    project = make_projects(1, dockerfile)[0]
+    with patch('quenchmark.pipeline.run', FakeDocker()):
+        before = DockerPipeline().image(project, 'a' * 40)
+        with open(dockerfile, 'a') as f:
+            f.write('RUN true\n')
+        assert DockerPipeline().image(project, 'a' * 40) != before
+
+
+def test_stale_images_are_removed(dockerfile):
+    """
+    Testing that the oldest unused images are removed over the disk budget.
+    """
+    docker = FakeDocker({
+        'qosstest_p0:old': (100, '2018-01-01'),
+        'qosstest_p1:old': (100, '2018-01-02'),
+        'qosstest_p2:old': (100, '2018-01-03'),
+    })
+
+    with patch('quenchmark.pipeline.run', docker):
+        image = DockerPipeline(disk_budget=250).build(make_projects(1, dockerfile)[0])
+
+    assert docker.removed == ['qosstest_p0:old', 'qosstest_p1:old']
+    assert set(docker.images) == {'qosstest_p2:old', image}
+
+
+def test_dependencies_are_fetched_at_the_upstream_commit(tmp_path, monkeypatch):
+    """
+    Testing that the copied dependency files are fetched into the context.
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'test.docker').write_text(
+        'FROM fedora:27\nCOPY dockerfiles/deps/p0/requirements.txt /deps/\n'
+    )
+    project = Project(name='P0', identifier='p0', repo_url='https://github.com/test/p0',
+                      dockerfile='test.docker')
+
+    with FakeServer(lambda handler: (200, {}, b'numpy\n')) as server:
+        DockerPipeline(raw_url=server.url).fetch_dependencies(project, 'abc')
+
+    assert server.requests[0][0] == '/test/p0/abc/requirements.txt'
+    assert (tmp_path / 'dockerfiles/deps/p0/requirements.txt').read_text() == 'numpy\n'
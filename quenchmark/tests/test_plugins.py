@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import pytest
+
+from quenchmark.collectors import MANIFEST
+from quenchmark.plugins import Collector, NoSuchPlugin
+
+# Modules the command line entry point must not import before collecting
+HEAVY_MODULES = ['github', 'requests', 'coloredlogs', 'yaml', 'asyncio',
+                 'cached_property', 'xml.etree.ElementTree', 'sqlite3',
+                 'numpy', 'quenchmark.collectors.meta', 'quenchmark.collectors.tests']
+
+
+def test_manifest_matches_the_collectors():
+    """
+    Testing that the manifest lists the artifacts the collectors provide.
+    """
+    for identifier, (module, provides) in MANIFEST.items():
+        plugin_cls = Collector.get(identifier)
+        assert plugin_cls.__module__ == module
+        assert tuple(plugin_cls.provides) == provides
+
+
+def test_requirements_are_loaded():
+    """
+    Testing that selecting a collector loads the collectors it requires,
+    but not the ones providing the artifacts it only uses.
+    """
+    loaded = [plugin_cls.__name__ for plugin_cls in Collector.load(['MetaCollector'])]
+    assert loaded == ['MetaCollector']
+
+    loaded = [plugin_cls.__name__ for plugin_cls in Collector.load(['TestCollector'])]
+    assert loaded == ['TestCollector']
+
+    with pytest.raises(NoSuchPlugin):
+        Collector.load(['NoCollector'])
+
+
+def test_entry_point_imports():
+    """
+    Testing that importing the entry point does not import the collectors
+    and their dependencies. The import time itself is measured by the
+    benchmark suite (see quenchmark.benchmarks.suite.import_time).
+    """
+    child = subprocess.run(
+        [sys.executable, '-c',
+         f'import sys, quenchmark.main; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding='utf-8'
+    )
+
+    assert child.stdout.strip() == '[]'
+
+    from quenchmark.benchmarks.suite import import_time
+    assert import_time() > 0
@@ -0,0 +1,101 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from quenchmark import context
+from quenchmark.logger import ProjectFileHandler
+from quenchmark.process import ProcessRunner, ProcessTimeout
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+def test_output_is_decoded_as_utf8():
+    """
+    Testing that non-ASCII output does not crash the runner.
+    """
+    stdout, stderr, returncode = ProcessRunner().run(python(
+        "import sys; print('Grüße ⟨ψ|φ⟩'); print('fehler', file=sys.stderr); sys.exit(3)"
+    ))
+
+    assert stdout == 'Grüße ⟨ψ|φ⟩\n'
+    assert stderr == 'fehler\n'
+    assert returncode == 3
+
+
+def test_output_is_logged_per_project(tmp_path):
+    """
+    Testing that the output is written into the file of the project, also
+    below the level of the root logger.
+    """
+    files = ProjectFileHandler(str(tmp_path))
+    ProcessRunner.output.addHandler(files)
+    try:
+        with context.project('cirq'):
+            ProcessRunner().run(python("print('collected 12 items')"))
+    finally:
+        ProcessRunner.output.removeHandler(files)
+        files.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['cirq.jsonl']
+    with open(tmp_path / 'cirq.jsonl', encoding='utf-8') as f:
+        assert 'collected 12 items' in f.read()
+
+
+def test_buffered_output_is_capped():
+    """
+    Testing that only the tail of a long output is kept in memory.
+    """
+    result = ProcessRunner(max_buffer=1000).run(python(
+        "for i in range(10000): print(f'line {i}')"
+    ))
+
+    assert result.truncated
+    assert len(result.stdout) <= 1000
+    assert result.stdout.endswith('line 9999\n')
+
+
+def is_alive(pid):
+    """
+    Orphaned children are reparented, hence a killed child may linger as a
+    zombie until its new parent reaps it.
+    """
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def test_timeout_kills_the_process_group(tmp_path):
+    """
+    Testing that the children of a timed out command are killed too.
+    """
+    pidfile = tmp_path / 'pid'
+    runner = ProcessRunner()
+    with pytest.raises(ProcessTimeout):
+        runner.run(['sh', '-c', f'sleep 30 & echo $! > {pidfile}; wait'], timeout=0.5)
+
+    time.sleep(0.1)
+    assert not is_alive(int(pidfile.read_text()))
+
+
+def test_commands_run_concurrently():
+    """
+    Testing that many commands run at once on the event loop.
+    """
+    runner = ProcessRunner()
+
+    async def run_all():
+        return await asyncio.gather(*[
+            runner.execute(['sleep', '0.5']) for _ in range(20)
+        ])
+
+    start = time.monotonic()
+    results = asyncio.run(run_all())
+
+    assert [result.returncode for result in results] == [0] * 20
+    assert time.monotonic() - start < 5
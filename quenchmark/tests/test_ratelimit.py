@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+
+from quenchmark import context, ratelimit
+from quenchmark.ratelimit import RateLimitExceeded, RequestScheduler
+from quenchmark.transport import Request, Response
+
+
+class RecordingTransport():
+    """
+    Answers requests with the responses produced by the given function,
+    recording the requests.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+
+    def send(self, request):
+        self.requests.append(request)
+        return self.respond(request, len(self.requests))
+
+
+def quota_headers(remaining, limit=5000, reset=1000):
+    return {
+        'X-RateLimit-Limit': str(limit),
+        'X-RateLimit-Remaining': str(remaining),
+        'X-RateLimit-Reset': str(reset),
+    }
+
+
+def test_token_with_most_quota_is_used():
+    """
+    Testing that the scheduler switches to the token with most quota left.
+    """
+    def respond(request, count):
+        if request.headers['Authorization'] == 'token first':
+            return Response(200, quota_headers(10), b'{}')
+        return Response(200, quota_headers(4000), b'{}')
+
+    inner = RecordingTransport(respond)
+    scheduler = RequestScheduler(inner, tokens=['first', 'second'], clock=lambda: 0)
+    for _ in range(3):
+        scheduler.send(Request('GET', 'https://api.github.com/rate_limit'))
+
+    used = [request.headers['Authorization'] for request in inner.requests]
+    assert used == ['token first', 'token second', 'token second']
+
+
+def test_secondary_limit_backoff():
+    """
+    Testing that a request hitting the secondary limit is retried.
+    """
+    def respond(request, count):
+        if count < 3:
+            return Response(403, {'Retry-After': '7'}, b'secondary rate limit')
+        return Response(200, quota_headers(100), b'{}')
+
+    sleeps = []
+    scheduler = RequestScheduler(RecordingTransport(respond), sleep=sleeps.append)
+    response = scheduler.send(Request('GET', 'https://api.github.com/repos/a/b'))
+
+    assert response.status == 200
+    assert sleeps == [7.0, 7.0]
+
+
+def test_retries_are_bounded():
+    """
+    Testing that the scheduler gives up after max_retries attempts.
+    """
+    respond = lambda request, count: Response(429, {}, b'')
+    scheduler = RequestScheduler(RecordingTransport(respond), max_retries=2,
+                                 sleep=lambda delay: None)
+    with pytest.raises(RateLimitExceeded):
+        scheduler.send(Request('GET', 'https://api.github.com/repos/a/b'))
+
+
+def test_pacing_when_quota_is_low():
+    """
+    Testing that the remaining quota is spread until the reset time.
+    """
+    respond = lambda request, count: Response(200, quota_headers(10, reset=100), b'{}')
+    now = [0.0]
+
+    def sleep(delay):
+        now[0] += delay
+
+    scheduler = RequestScheduler(RecordingTransport(respond), tokens=['token'],
+                                 clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        scheduler.send(Request('GET', 'https://api.github.com/repos/a/b'))
+
+    # 100 seconds left for 10 requests, the third request has to wait
+    assert now[0] == pytest.approx(10)
+
+
+def test_priority_order():
+    """
+    Testing that waiting requests are dispatched by priority.
+    """
+    order = []
+    respond = lambda request, count: order.append(request.url) or Response(200, {}, b'')
+    scheduler = RequestScheduler(RecordingTransport(respond), max_in_flight=1)
+
+    scheduler.acquire()
+
+    def issue(url, value):
+        with ratelimit.priority(value):
+            scheduler.send(Request('GET', url))
+
+    threads = [threading.Thread(target=issue, args=(url, value))
+               for url, value in (('low', 20), ('high', 1), ('medium', 10))]
+    for thread in threads:
+        thread.start()
+    while len(scheduler.waiting) < 3:
+        time.sleep(0.001)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == ['high', 'medium', 'low']
+
+
+def test_usage_per_project():
+    """
+    Testing that the quota is accounted per project and 304s are free.
+    """
+    respond = lambda request, count: Response(304 if count % 2 else 200, {}, b'')
+    scheduler = RequestScheduler(RecordingTransport(respond))
+
+    with context.project('cirq'):
+        for _ in range(4):
+            scheduler.send(Request('GET', 'https://api.github.com/repos/a/b'))
+
+    assert scheduler.usage['cirq'] == {'requests': 4, 'quota': 2}
+
+
+def test_usage_of_concurrent_requests():
+    """
+    Testing that requests of several threads are all accounted.
+    """
+    scheduler = RequestScheduler(RecordingTransport(lambda request, count: None))
+    response = Response(200, {}, b'')
+
+    def work():
+        with context.project('cirq'):
+            for _ in range(2000):
+                scheduler.account(response)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert scheduler.usage['cirq'] == {'requests': 16000, 'quota': 16000}
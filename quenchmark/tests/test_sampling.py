@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from quenchmark import affiliation, owners, transport
+from quenchmark.benchmarks.fakegithub import FakeGitHub, LocalGitHub, SyntheticRepository
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.ratelimit import RequestScheduler
+from quenchmark.sampling import Estimate, StratifiedSample
+
+
+def population(size, fraction, seed=0):
+    """
+    Returns (stratum, ignored) items, ignored with the given probability.
+    """
+    rng = random.Random(seed)
+    return [(index % 3, rng.random() < fraction) for index in range(size)]
+
+
+def sample_until_decided(items, threshold=0.5, initial=30, seed=1):
+    sample = StratifiedSample(items, key=lambda item: item[0], seed=seed)
+    size = initial
+    while True:
+        for stratum, item in list(sample.draw(size)):
+            sample.record(stratum, item[1])
+        estimate = sample.estimate()
+        if estimate.decided(threshold) or sample.exhausted:
+            return sample, estimate
+        size *= 2
+
+
+def test_draw_is_proportional():
+    """
+    Test that every stratum contributes in proportion to its size, and at
+    least one item.
+    """
+
+    items = [('large', index) for index in range(90)] + [('small', index) for index in range(9)] \
+        + [('tiny', 0)]
+    sample = StratifiedSample(items, key=lambda item: item[0], seed=0)
+
+    drawn = list(sample.draw(20))
+
+    strata = [stratum for stratum, item in drawn]
+    assert strata.count('large') == 18
+    assert strata.count('small') == 2
+    assert strata.count('tiny') == 1
+
+
+def test_interval_closes_on_the_whole_population():
+    """
+    Test that sampling everything yields the exact fraction.
+    """
+
+    items = population(50, 0.3)
+    sample = StratifiedSample(items, key=lambda item: item[0], seed=0)
+    for stratum, item in list(sample.draw(50)):
+        sample.record(stratum, item[1])
+
+    estimate = sample.estimate()
+    exact = sum(ignored for stratum, ignored in items) / len(items)
+
+    assert sample.exhausted
+    assert estimate.low == pytest.approx(exact) == estimate.high
+
+
+@pytest.mark.parametrize('fraction, ignorant', [(0.2, False), (0.8, True)])
+def test_verdict_from_a_small_sample(fraction, ignorant):
+    """
+    Test that the sample reaches the verdict of the whole population while
+    evaluating a small part of it.
+    """
+
+    items = population(5000, fraction)
+    sample, estimate = sample_until_decided(items)
+
+    assert (estimate.fraction > 0.5) == ignorant
+    assert estimate.decided(0.5)
+    assert sample.size < 200
+
+
+def test_estimate_decided():
+    assert Estimate(0.6, 0.51, 0.7, 10, 100).decided(0.5)
+    assert Estimate(0.4, 0.3, 0.5, 10, 100).decided(0.5)
+    assert not Estimate(0.45, 0.3, 0.6, 10, 100).decided(0.5)
+
+
+def test_sampling_mode_of_meta_collector():
+    """
+    Test that the sampling mode of MetaCollector reaches the verdict of the
+    exhaustive evaluation with fewer requests, and reports its estimate.
+    """
+
+    repository = SyntheticRepository('owner', 'large', commits=20, contributors=2,
+                                     issues=600, comments=1)
+
+    def evaluate(options):
+        owners.install(owners.OwnerDirectory())
+        affiliation.install(affiliation.Affiliations())
+        local = LocalGitHub(transport.Transport(), server.url)
+        transport.install(RequestScheduler(local))
+        try:
+            with pytest.MonkeyPatch.context() as monkeypatch:
+                monkeypatch.setattr(MetaCollector, 'options', options)
+                collector = MetaCollector('owner', 'large')
+                collector.core_developers
+                requests = local.requests
+                return collector, collector.has_ignored_issues_and_prs, local.requests - requests
+        finally:
+            transport.uninstall()
+
+    with FakeGitHub([repository]) as server:
+        exhaustive, exhaustive_verdict, exhaustive_requests = evaluate({})
+        sampled, sampled_verdict, sampled_requests = evaluate({'sampling': {'seed': 0}})
+
+    assert sampled_verdict == exhaustive_verdict
+    assert sampled_requests * 2 < exhaustive_requests
+    assert exhaustive.ignored_estimate is None
+    assert sampled.ignored_estimate.decided(0.5)
+    assert sampled.ignored_estimate.population > sampled.ignored_estimate.sampled
+
+
+def test_items_outside_the_domain():
+    """
+    Test that drawn items found outside the domain are left out of the
+    fraction and of the estimated population.
+    """
+
+    items = [('a', index) for index in range(40)]
+    sample = StratifiedSample(items, key=lambda item: item[0], seed=0)
+    for stratum, item in list(sample.draw(40)):
+        # odd items are outside, every other even item is True
+        sample.record(stratum, None if item[1] % 2 else item[1] % 4 == 0)
+
+    estimate = sample.estimate()
+
+    assert estimate.fraction == pytest.approx(0.5)
+    assert estimate.sampled == estimate.population == 20
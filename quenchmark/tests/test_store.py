@@ -0,0 +1,144 @@
+import mock
+import datetime as dt
+from unittest.mock import patch
+
+from quenchmark.collectors.meta import MetaCollector
+from quenchmark.engine import ExecutionEngine
+from quenchmark.main import Project
+from quenchmark.store import Snapshot, SnapshotStore
+import monkeys
+
+
+def test_latest_snapshot(tmp_path):
+    """
+    Testing that the most recent snapshot is returned and persisted.
+    """
+    path = str(tmp_path / 'snapshots.sqlite')
+    store = SnapshotStore(path)
+    store.record(Snapshot('cirq', 'MetaCollector', {'meta_commit_count': 10}, {'head': 'a'}))
+    store.record(Snapshot('cirq', 'MetaCollector', {'meta_commit_count': 12}, {'head': 'b'}))
+    store.record(Snapshot('qutip', 'MetaCollector', {'meta_commit_count': 99}))
+
+    latest = SnapshotStore(path).latest('cirq', 'MetaCollector')
+    assert latest.metrics == {'meta_commit_count': 12}
+    assert latest.marks == {'head': 'b'}
+    assert [s.marks['head'] for s in store.history('cirq', 'MetaCollector')] == ['a', 'b']
+    assert store.latest('cirq', 'TestCollector') is None
+
+
+class CountingCollector():
+    concurrency_group = 'io'
+    previous = None
+
+    def run(self, project):
+        count = self.previous.metrics['runs'] + 1 if self.previous else 1
+        return {'runs': count}
+
+    def snapshot(self, project, data):
+        return Snapshot(project.identifier, 'CountingCollector', data)
+
+
+def test_engine_records_snapshots():
+    """
+    Testing that collectors receive the snapshot of the previous run.
+    """
+    store = SnapshotStore(':memory:')
+    projects = [Project(name='Cirq', identifier='cirq', repo_url='https://github.com/quantumlib/Cirq')]
+    engine = ExecutionEngine(store=store)
+
+    engine.run(projects, [CountingCollector])
+    data, failures = engine.run(projects, [CountingCollector])
+
+    assert data == {'cirq': {'runs': 2}}
+
+
+def make_commit(sha):
+    commit = mock.MagicMock()
+    commit.sha = sha
+    return commit
+
+
+@patch('monkeys.MonkeyRepo')
+@patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
+def test_unchanged_head_is_not_recounted(repo_mock):
+    """
+    Testing that commit based values are carried over if nothing was committed.
+    """
+    commits = mock.MagicMock()
+    commits.__iter__.side_effect = lambda: iter([make_commit('abc')])
+    repo_mock.return_value.get_commits.return_value = commits
+
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName')
+    collector.restore(Snapshot('p', 'MetaCollector',
+                               {'meta_commit_count': 1234, 'meta_contributor_count': 7},
+                               {'head': 'abc'}, {'core_developers': [{'name': 'alice'}]}))
+
+    assert collector.commit_count == 1234
+    assert collector.contributor_count == 7
+    assert collector.core_developers == [{'name': 'alice'}]
+    repo_mock.return_value.get_stats_contributors.assert_not_called()
+
+
+@patch('monkeys.MonkeyRepo')
+@patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
+def test_moved_head_is_recounted_when_read(repo_mock):
+    """
+    Testing that nothing is requested to restore a moved head, the commit
+    count is listed again once it is read.
+    """
+    commits = mock.MagicMock(totalCount=103)
+    commits.__iter__.side_effect = lambda: iter([make_commit('def')])
+    repo_mock.return_value.get_commits.return_value = commits
+
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName')
+    collector.restore(Snapshot('p', 'MetaCollector', {'meta_commit_count': 100}, {'head': 'abc'}))
+
+    assert 'commit_count' not in collector.__dict__
+    assert collector.commit_count == 103
+    repo_mock.return_value.compare.assert_not_called()
+
+
+@patch('monkeys.MonkeyRepo')
+@patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
+def test_empty_repository_has_no_head(repo_mock):
+    """
+    Testing that a repository without commits has no head to compare with.
+    """
+    commits = mock.MagicMock()
+    commits.__iter__.side_effect = lambda: iter([])
+    repo_mock.return_value.get_commits.return_value = commits
+
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName')
+    collector.restore(Snapshot('p', 'MetaCollector', {'meta_commit_count': 100}, {'head': 'abc'}))
+
+    assert collector.head is None
+    assert 'commit_count' not in collector.__dict__
+    repo_mock.return_value.compare.assert_not_called()
+    assert collector.snapshot(mock.Mock(identifier='p'), {}).marks['head'] is None
+
+
+@patch('monkeys.MonkeyRepo')
+@patch('github.Github', mock.MagicMock(return_value=monkeys.MonkeyGithub()))
+def test_only_updated_issues_are_evaluated(repo_mock):
+    """
+    Testing that issue verdicts of the previous run are reused.
+    """
+    updated = dt.datetime(2018, 6, 1, tzinfo=dt.timezone.utc)
+    issue = mock.MagicMock(number=3, updated_at=updated)
+    issue.user.login = 'alice'
+    issue.user.company = None
+    issue.get_comments.return_value = []
+    repo_mock.return_value.get_issues.return_value = [issue]
+
+    collector = MetaCollector('TestRepoOwner', 'TestRepoName')
+    collector.core_developers = [{'name': 'core'}]
+    collector.previous = Snapshot(
+        'p', 'MetaCollector', {}, {'issues_updated': '2018-05-01T00:00:00+00:00'},
+        {'issue_verdicts': {'1': False, '2': False}, 'core_developer_names': ['core']}
+    )
+
+    assert collector.issue_verdicts == {1: False, 2: False, 3: True}
+    assert collector.has_ignored_issues_and_prs == False
+    assert collector.marks['issues_updated'] == updated.isoformat()
+    since = repo_mock.return_value.get_issues.call_args[1]['since']
+    assert since == dt.datetime(2018, 5, 1, tzinfo=dt.timezone.utc)
@@ -0,0 +1,160 @@
+"""
+Implements the HTTP layer used to talk to the GitHub API.
+
+PyGithub allows replacing the connection classes it uses to issue requests
+(its own test-suite relies on this to replay recorded sessions). We hook in
+there, so that every request issued through PyGithub passes through a chain
+of transports which can cache, schedule or otherwise inspect it.
+"""
+
+import threading
+from dataclasses import dataclass, field
+
+import requests
+
+from quenchmark.logger import LoggerMixin
+
+# The transport chain routing the PyGithub requests, see install()
+installed = None
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    headers: dict = field(default_factory=dict)
+    body: bytes = None
+
+
+class Response(object):
+    """
+    A fully read HTTP response. Mimics the parts of the httplib response
+    interface PyGithub relies upon.
+    """
+
+    def __init__(self, status, headers, body=b''):
+        self.status = status
+        self.headers = {key.lower(): value for key, value in headers.items()}
+        self.body = body
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self):
+        return self.body.decode('utf-8', errors='replace')
+
+    def iter_content(self, chunk_size=1):
+        chunk_size = chunk_size or len(self.body) or 1
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise requests.HTTPError(f"HTTP {self.status}")
+
+
+class Transport(LoggerMixin):
+    """
+    Sends requests over the network. Every thread uses its own session, so
+    that a single transport can be shared by concurrently running collectors.
+    """
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @property
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def send(self, request):
+        with self.span('http', method=request.method, url=request.url):
+            response = self.session.request(
+                request.method,
+                request.url,
+                headers=request.headers,
+                data=request.body,
+                timeout=self.timeout,
+                allow_redirects=False
+            )
+
+        self.count('bytes_transferred', len(response.content))
+        return Response(response.status_code, response.headers, response.content)
+
+
+class TransportWrapper(Transport):
+    """
+    Base class for transports that decorate another transport.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def send(self, request):
+        return self.inner.send(request)
+
+
+def connection_class(transport, protocol):
+    """
+    Returns a class implementing the PyGithub connection interface that
+    sends all the requests using the given transport.
+    """
+
+    class Connection(object):
+
+        def __init__(self, host, port=None, strict=False, timeout=None,
+                     retry=None, pool_size=None, **kwargs):
+            self.host = host
+            self.port = port or (443 if protocol == 'https' else 80)
+
+        def request(self, verb, url, input, headers, stream=False):
+            if hasattr(input, 'read'):
+                input = input.read()
+            if isinstance(input, str):
+                input = input.encode('utf-8')
+
+            self.pending = Request(
+                method=verb,
+                url=f"{protocol}://{self.host}:{self.port}{url}",
+                headers=dict(headers),
+                body=input
+            )
+
+        def getresponse(self):
+            return transport.send(self.pending)
+
+        def close(self):
+            pass
+
+    return Connection
+
+
+def install(transport):
+    """
+    Routes all requests issued by PyGithub through the given transport.
+    """
+
+    global installed
+    from github.Requester import Requester
+
+    installed = transport
+
+    Requester.injectConnectionClasses(
+        connection_class(transport, 'http'),
+        connection_class(transport, 'https')
+    )
+
+
+def uninstall():
+    """
+    Restores the default PyGithub connection classes.
+    """
+
+    global installed
+    from github.Requester import Requester
+
+    installed = None
+
+    Requester.resetConnectionClasses()
@@ -2,8 +2,6 @@
 Implements utilities and helper functions.
 """
 
-import subprocess
-
 
 class classproperty(object):
     """
@@ -17,13 +15,28 @@ class classproperty(object):
         return self.method(arg)
 
 
-def run(args, encoding='ascii'):
-    child = subprocess.Popen(
-        [str(arg) for arg in args],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    stdout, stderr = child.communicate()
-    code = child.returncode
+def run(args, encoding='utf-8', timeout=None):
+    """
+    Runs the command using the installed quenchmark.process runner and
+    returns its (stdout, stderr, returncode). The output is streamed into
+    the log, only its tail is returned.
+    """
+
+    # Imported here, asyncio is slow to import and not needed by most commands
+    from quenchmark import process
+
+    return process.runner.run(args, timeout=timeout, encoding=encoding)
+
+
+def count(listing):
+    """
+    Returns the number of items in the listing. Paginated listings report
+    their total count (determined from a single request listing one item per
+    page), other iterables are consumed.
+    """
+
+    total = getattr(listing, 'totalCount', None)
+    if isinstance(total, int):
+        return total
 
-    return stdout.decode(encoding), stderr.decode(encoding), code
+    return sum(1 for item in listing)